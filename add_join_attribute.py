@@ -1,11 +1,8 @@
 import json
 import os
-import matplotlib.pyplot as plt
 import argparse
 
-from matplotlib.legend_handler import HandlerLine2D
-from matplotlib.font_manager import FontProperties
-from common import read_json_file, check_attribute_exists
+from common import open_properties, read_json_file, check_attribute_exists
 
 def get_generator_function(gen_name):
     if gen_name == 'max':
@@ -42,7 +39,7 @@ def main():
     args = parser.parse_args()
 
     print('Reading file ...')
-    with open(args.json_file) as data_file:
+    with open_properties(args.json_file) as data_file:
         data = json.load(data_file)
     print('Generating new attribute ...')
     gen_func = get_generator_function(args.function)
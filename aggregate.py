@@ -0,0 +1,240 @@
+"""
+
+grouped aggregation of run attributes: every statistic of every attribute is computed for all the
+(domain, problem, algo) groups of a grouped data dictionary at once, with vectorized reductions over the values
+sorted by group.
+
+supported statistics: min, max, sum, count, mean (or avg), median, std, gmean, pNN (the NN-th percentile) and
+ciNN (the mean with its NN% bootstrap confidence interval)
+
+"""
+import multiprocessing
+import re
+
+import numpy as np
+
+STATISTICS = ['min', 'max', 'sum', 'count', 'mean', 'avg', 'median', 'std', 'gmean']
+_PERCENTILE = re.compile(r'^p(\d+(\.\d+)?)$')
+_CONFIDENCE = re.compile(r'^ci(\d+(\.\d+)?)$')
+# bound of the number of bootstrap means computed at once by a bootstrap block
+MAX_CELLS = 1 << 24
+
+
+def is_supported(stat):
+    for pattern in [_PERCENTILE, _CONFIDENCE]:
+        match = pattern.match(stat)
+        if match is not None and float(match.group(1)) <= 100:
+            return True
+    return stat in STATISTICS
+
+
+def _bootstrap_block(params):
+    """
+    Resamples a block of groups of n values each (values[g] holds the n values of group g) and returns the quantiles
+    qs of the bootstrap means of every group, and per roll-up level the rows of the groups (row_codes[level][g] is
+    the row of group g) with the sums of the bootstrap means of their groups
+    """
+    values, row_codes, resamples, qs, seed = params
+    rng = np.random.default_rng(seed)
+    group_count, n = values.shape
+    # a resample of n values is a multinomial weighting of the values. The weights are drawn once for the block and
+    # every group reads them from its own distinct offset, so that in every resample the groups use different,
+    # independent weights (which keeps the sums of the rows valid)
+    weights = rng.multinomial(n, np.full(n, 1.0 / n), size=resamples).astype(np.float64)
+    weights = np.concatenate([weights, weights])
+    offsets = rng.choice(resamples, size=group_count, replace=False)
+    means = np.empty((group_count, resamples), dtype=np.float64)
+    for g in range(group_count):
+        means[g] = weights[offsets[g]:offsets[g] + resamples] @ values[g]
+    means /= n
+    rolled = []
+    for codes in row_codes:
+        rows, block_codes = np.unique(codes, return_inverse=True)
+        order = np.argsort(block_codes, kind='stable')
+        starts = np.searchsorted(block_codes[order], np.arange(len(rows)))
+        rolled.append((rows, np.add.reduceat(means[order], starts, axis=0)))
+    return np.quantile(means, qs, axis=1), rolled
+
+
+class Aggregation:
+    """
+    Statistics of the groups of a dict[domain][problem][algo] = [list of experiment data].
+    values[(attr, stat)][g] is the statistic of group g (None if no run of the group has attr),
+    groups[g] is its (domain, problem, algo). A ciNN statistic is a (mean, low, high) tuple, resampling the runs of
+    every group resamples times; its domain and total rows are the intervals of the sums of the group means.
+    """
+    def __init__(self, grouped_data, attributes, stats, resamples=10000, seed=None, jobs=1):
+        self.resamples = resamples
+        self.seed = seed
+        self.jobs = jobs
+        self.groups = []
+        group_of = []
+        raw = {attr: [] for attr in attributes}
+        for domain, problems in grouped_data.items():
+            for problem, algos in problems.items():
+                for algo, val_list in algos.items():
+                    group_of += [len(self.groups)] * len(val_list)
+                    self.groups.append((domain, problem, algo))
+                    for attr in attributes:
+                        raw[attr] += [val.get(attr) for val in val_list]
+        group_of = np.array(group_of, dtype=np.int64)
+        self.rows = {'domain': {}, 'total': {}}
+        self.row_codes = {'domain': [], 'total': []}
+        for domain, problem, algo in self.groups:
+            for level, row in [('domain', (domain, algo)), ('total', algo)]:
+                self.row_codes[level].append(self.rows[level].setdefault(row, len(self.rows[level])))
+
+        self.values = {}
+        self.rolled = {}
+        for attr in attributes:
+            present = [v is not None for v in raw[attr]]
+            values = np.array([v for v in raw[attr] if v is not None], dtype=np.float64)
+            integral = all(isinstance(v, int) for v in raw[attr] if v is not None)
+            for stat, result in self._reduce(values, group_of[np.array(present, dtype=bool)], stats, attr).items():
+                if integral and stat in ['min', 'max', 'sum']:
+                    result = [None if v is None else int(v) for v in result]
+                self.values[(attr, stat)] = result
+
+    def _reduce(self, values, codes, stats, attr):
+        group_count = len(self.groups)
+        order = np.lexsort((values, codes))
+        values = values[order]
+        counts = np.bincount(codes, minlength=group_count)
+        starts = np.cumsum(counts) - counts
+        used = counts > 0
+        first = starts[used]
+        count = counts[used]
+
+        results = {}
+        confidences = [stat for stat in stats if _CONFIDENCE.match(stat)]
+        if len(confidences) > 0:
+            results.update(self._bootstrap(values, counts, first, count, used, confidences, attr))
+        for stat in stats:
+            if stat in confidences:
+                continue
+            if stat == 'count':
+                results[stat] = counts.tolist()
+                continue
+            with np.errstate(divide='ignore', invalid='ignore'):
+                if stat == 'min':
+                    result = values[first]
+                elif stat == 'max':
+                    result = values[first + count - 1]
+                elif stat == 'sum':
+                    result = np.add.reduceat(values, first) if len(first) > 0 else first
+                elif stat in ['mean', 'avg']:
+                    result = np.add.reduceat(values, first) / count if len(first) > 0 else first
+                elif stat == 'std':
+                    if len(first) > 0:
+                        mean = np.add.reduceat(values, first) / count
+                        deviation = values - np.repeat(mean, count)
+                        result = np.sqrt(np.add.reduceat(deviation * deviation, first) / count)
+                    else:
+                        result = first
+                elif stat == 'gmean':
+                    result = np.exp(np.add.reduceat(np.log(values), first) / count) if len(first) > 0 else first
+                else:
+                    q = 50.0 if stat == 'median' else float(_PERCENTILE.match(stat).group(1))
+                    # linear interpolation between the closest ranks, as numpy.percentile
+                    pos = (count - 1) * q / 100.0
+                    low = np.floor(pos).astype(np.int64)
+                    high = np.ceil(pos).astype(np.int64)
+                    result = values[first + low] + (values[first + high] - values[first + low]) * (pos - low)
+            full = [None] * group_count
+            for g, v in zip(np.flatnonzero(used).tolist(), np.asarray(result, dtype=np.float64).tolist()):
+                full[g] = v
+            results[stat] = full
+        return results
+
+    def _bootstrap(self, values, counts, first, count, used, confidences, attr):
+        """
+        Returns dict[stat] = (mean, low, high) of every group for the ciNN statistics, and stores the intervals of
+        the domain and total rows in rolled[(attr, stat)][level][row]
+        """
+        qs = []
+        for stat in confidences:
+            alpha = 1.0 - float(_CONFIDENCE.match(stat).group(1)) / 100.0
+            qs += [alpha / 2.0, 1.0 - alpha / 2.0]
+        groups = np.flatnonzero(used)
+        levels = ['domain', 'total']
+        row_codes = [np.array(self.row_codes[level], dtype=np.int64)[groups] for level in levels]
+        row_counts = [len(self.rows[level]) for level in levels]
+
+        # blocks of at most MAX_CELLS / resamples (and at most resamples) groups having the same number of values
+        limit = max(1, min(MAX_CELLS // self.resamples, self.resamples))
+        blocks = []
+        for n in np.unique(count).tolist():
+            same_size = np.flatnonzero(count == n)
+            blocks += [same_size[i:i + limit] for i in range(0, len(same_size), limit)]
+        seeds = np.random.SeedSequence(self.seed).spawn(len(blocks))
+        params = []
+        for block, seed in zip(blocks, seeds):
+            n = count[block[0]]
+            params.append((values[first[block][:, None] + np.arange(n)], [codes[block] for codes in row_codes],
+                           self.resamples, qs, seed))
+
+        # the bootstrap means of the rows are summed block by block, so that only one block is held at once
+        group_quantiles = np.zeros((len(qs), len(groups)))
+        rolled_sums = [np.zeros((c, self.resamples)) for c in row_counts]
+        pool = multiprocessing.Pool(self.jobs) if self.jobs > 1 and len(params) > 1 else None
+        try:
+            block_results = map(_bootstrap_block, params) if pool is None else pool.imap(_bootstrap_block, params)
+            for block, (quantiles, rolled) in zip(blocks, block_results):
+                group_quantiles[:, block] = quantiles
+                for sums, (rows, block_sums) in zip(rolled_sums, rolled):
+                    sums[rows] += block_sums
+        finally:
+            if pool is not None:
+                pool.close()
+        means = np.add.reduceat(values, first) / count if len(first) > 0 else first
+        rolled_means = [np.zeros(row_count) for row_count in row_counts]
+        for codes, sums in zip(row_codes, rolled_means):
+            np.add.at(sums, codes, means)
+
+        results = {}
+        for i, stat in enumerate(confidences):
+            full = [None] * len(self.groups)
+            for j, g in enumerate(groups.tolist()):
+                full[g] = (float(means[j]), float(group_quantiles[2 * i][j]), float(group_quantiles[2 * i + 1][j]))
+            results[stat] = full
+            rolled = {}
+            for level, row_mean, sums in zip(levels, rolled_means, rolled_sums):
+                low, high = np.quantile(sums, qs[2 * i:2 * i + 2], axis=1)
+                rolled[level] = {row: (float(row_mean[code]), float(low[code]), float(high[code]))
+                                 for row, code in self.rows[level].items()}
+            self.rolled[(attr, stat)] = rolled
+        return results
+
+    def _roll_up(self, level, row_of):
+        """
+        Returns dict[(attr, stat)][row][algo] = sum of the statistic over the groups of the row (row_of(group))
+        """
+        table = {}
+        for key, result in self.values.items():
+            table[key] = {}
+            for (domain, problem, algo), v in zip(self.groups, result):
+                row = table[key].setdefault(row_of(domain, problem), {})
+                if key in self.rolled:
+                    row[algo] = self.rolled[key][level][(domain, algo) if level == 'domain' else algo]
+                    continue
+                if algo not in row:
+                    row[algo] = 0
+                if v is not None:
+                    row[algo] += v
+        return table
+
+    def per_problem(self):
+        table = {}
+        for key, result in self.values.items():
+            table[key] = {}
+            for (domain, problem, algo), v in zip(self.groups, result):
+                row = '{:<10}'.format(domain[:10]) + ':' + problem
+                table[key].setdefault(row, {})[algo] = v
+        return table
+
+    def per_domain(self, problem_list):
+        return self._roll_up('domain', lambda domain, problem: domain + ' (' + str(len(problem_list[domain])) + ')')
+
+    def total(self, problem_list):
+        row = 'total (' + str(sum(len(lst) for lst in problem_list.values())) + ')'
+        return self._roll_up('total', lambda domain, problem: row)
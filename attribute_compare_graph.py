@@ -1,10 +1,11 @@
 import os
-import matplotlib.pyplot as plt
 import argparse
 
-from matplotlib.legend_handler import HandlerLine2D
-from matplotlib.font_manager import FontProperties
-from common import read_json_file
+from common import read_json_file, add_loader_arguments, get_loader_options
+from render import GraphTemplate, RenderJob, add_render_arguments, get_render_processes, render_graphs, report_failures
+from suites import add_suite_arguments, get_suite_option
+
+COLORS = ['b', 'g', 'r', 'c', 'm', 'y', 'k']
 
 
 def get_graph_data_per_problem(grouped_data, attr_x, attr_y):
@@ -31,53 +32,140 @@ def create_dirs_if_necessary(graph_data, OUTDIR):
             os.makedirs(OUTDIR + '/' + domain)
 
 
-def create_graph_from_plot_data(graph_data, OUTDIR, attr_x, attr_y, xlog, ylog):
-    print('Creating graphs ...')
-
-    # plotting
+def render_graph(path, algos, attr_x, attr_y, xlog, ylog, color_idx):
+    """
+    Renders the scatter graph of a problem, algos is dict[algo] = {'x': [...], 'y': [...]}. The algos with data get
+    the colors following COLORS[color_idx].
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.font_manager import FontProperties
+    from matplotlib.legend_handler import HandlerLine2D
     fontP = FontProperties()
     fontP.set_size('small')
 
-    colors = ['b', 'g', 'r', 'c', 'm', 'y', 'k']
+    fig = plt.figure()
+    subplt = fig.add_subplot(111)
+    subplt.set_xlabel(attr_x)
+    subplt.set_ylabel(attr_y)
+    for algo, xy_data in algos.items():
+        if len(xy_data['x']) > 0:
+            if algo == 'base_unsat':
+                subplt.scatter(xy_data['x'], xy_data['y'], label=algo, linewidth=2, c=COLORS[color_idx])
+            else:
+                subplt.scatter(xy_data['x'], xy_data['y'], label=algo, c=COLORS[color_idx])
+            color_idx = (color_idx + 1) % len(COLORS)
+            subplt.grid(True, which='major', color='gray', linestyle='-')
+            subplt.minorticks_on()
+            subplt.grid(True, which='minor', color='gray')
+            subplt.margins(0.05)
+            if xlog:
+                subplt.set_xscale('log')
+            else:
+                subplt.set_xscale('linear')
+                subplt.get_xaxis().get_major_formatter().set_useOffset(False)
+                subplt.get_xaxis().get_major_formatter().set_scientific(False)
+                if len(str(xy_data['x'][0])) > 5:
+                    plt.setp(subplt.get_xticklabels(), rotation=30, horizontalalignment='right')
+            if ylog:
+                subplt.set_yscale('log')
+            else:
+                subplt.set_yscale('linear')
+                subplt.get_yaxis().get_major_formatter().set_useOffset(False)
+                subplt.get_yaxis().get_major_formatter().set_scientific(False)
+            subplt.margins(0.05)
+    plt.legend(handler_map={subplt: HandlerLine2D(numpoints=1)}, prop=fontP, loc='upper left')
+    plt.savefig(path)
+    plt.close()
+
+
+class ScatterGraphTemplate(GraphTemplate):
+    """
+    Batch version of render_graph, the points of the previous graph are replaced by the new data
+    """
+    def __init__(self, attr_x, attr_y, xlog, ylog):
+        from matplotlib.font_manager import FontProperties
+        super().__init__()
+        self.fontP = FontProperties()
+        self.fontP.set_size('small')
+        self.xlog = xlog
+        self.collections = []
+        subplt = self.subplt
+        subplt.set_xlabel(attr_x)
+        subplt.set_ylabel(attr_y)
+        subplt.grid(True, which='major', color='gray', linestyle='-')
+        subplt.minorticks_on()
+        subplt.grid(True, which='minor', color='gray')
+        subplt.margins(0.05)
+        if xlog:
+            subplt.set_xscale('log')
+        else:
+            subplt.set_xscale('linear')
+            subplt.get_xaxis().get_major_formatter().set_useOffset(False)
+            subplt.get_xaxis().get_major_formatter().set_scientific(False)
+        if ylog:
+            subplt.set_yscale('log')
+        else:
+            subplt.set_yscale('linear')
+            subplt.get_yaxis().get_major_formatter().set_useOffset(False)
+            subplt.get_yaxis().get_major_formatter().set_scientific(False)
+
+    def draw(self, path, algos, color_idx):
+        import matplotlib.pyplot as plt
+        import numpy as np
+        from matplotlib.legend_handler import HandlerLine2D
+        algos = [(algo, xy_data) for algo, xy_data in algos.items() if len(xy_data['x']) > 0]
+        while len(self.collections) < len(algos):
+            self.collections.append(self.subplt.scatter([], []))
+        while len(self.collections) > len(algos):
+            self.collections.pop().remove()
+        points = []
+        for collection, (algo, xy_data) in zip(self.collections, algos):
+            offsets = np.column_stack([xy_data['x'], xy_data['y']]).astype(np.float64)
+            collection.set_offsets(offsets)
+            collection.set_label(algo)
+            collection.set_color(COLORS[color_idx])
+            collection.set_linewidth(2 if algo == 'base_unsat' else plt.rcParams['lines.linewidth'])
+            color_idx = (color_idx + 1) % len(COLORS)
+            points.append(offsets)
+        # relim does not look at collections, the data limits are set from the points
+        self.subplt.ignore_existing_data_limits = True
+        if len(points) > 0:
+            self.subplt.update_datalim(np.concatenate(points))
+        self.subplt.autoscale_view()
+        if not self.xlog:
+            rotate = any(len(str(xy_data['x'][0])) > 5 for algo, xy_data in algos)
+            plt.setp(self.subplt.get_xticklabels(), rotation=30 if rotate else 0,
+                     horizontalalignment='right' if rotate else 'center')
+        self.subplt.legend(handler_map={self.subplt: HandlerLine2D(numpoints=1)}, prop=self.fontP, loc='upper left')
+        self.fig.savefig(path)
+
+
+def get_render_jobs(graph_data, OUTDIR, attr_x, attr_y, xlog, ylog, batch=False):
+    """
+    Yields the RenderJob of every problem of graph_data, in a fixed order. The colors keep cycling from one graph to
+    the next, every job starts from the color following the last one of the previous job.
+    """
+    template = (ScatterGraphTemplate, (attr_x, attr_y, xlog, ylog)) if batch else None
     color_idx = 0
+    for domain in sorted(graph_data.keys()):
+        for problem in sorted(graph_data[domain].keys()):
+            algos = graph_data[domain][problem]
+            args = (algos, attr_x, attr_y, xlog, ylog, color_idx) if template is None else (algos, color_idx)
+            yield RenderJob(OUTDIR + '/' + domain + '/' + problem + '.png', render_graph, args, domain + ' ' + problem,
+                            template)
+            color_idx = (color_idx + sum(1 for xy_data in algos.values() if len(xy_data['x']) > 0)) % len(COLORS)
 
-    for domain, problems in graph_data.items():
-        for problem, algos in problems.items():
-            print('Creating graph for ' + domain + ' ' + problem)
-            fig = plt.figure()
-            subplt = fig.add_subplot(111)
-            subplt.set_xlabel(attr_x)
-            subplt.set_ylabel(attr_y)
-            for algo, xy_data in algos.items():
-                if len(xy_data['x']) > 0:
-                    if algo == 'base_unsat':
-                        subplt.scatter(xy_data['x'], xy_data['y'], label=algo, linewidth=2, c=colors[color_idx])
-                    else:
-                        subplt.scatter(xy_data['x'], xy_data['y'], label=algo, c=colors[color_idx])
-                    color_idx = (color_idx + 1) % len(colors)
-                    subplt.grid(b=True, which='major', color='gray', linestyle='-')
-                    subplt.minorticks_on()
-                    subplt.grid(b=True, which='minor', color='gray')
-                    subplt.margins(0.05)
-                    if xlog:
-                        subplt.set_xscale('log')
-                    else:
-                        subplt.set_xscale('linear')
-                        subplt.get_xaxis().get_major_formatter().set_useOffset(False)
-                        subplt.get_xaxis().get_major_formatter().set_scientific(False)
-                        if len(str(xy_data['x'][0])) > 5:
-                            plt.setp(subplt.get_xticklabels(), rotation=30, horizontalalignment='right')
-                    if ylog:
-                        subplt.set_yscale('log')
-                    else:
-                        subplt.set_yscale('linear')
-                        subplt.get_yaxis().get_major_formatter().set_useOffset(False)
-                        subplt.get_yaxis().get_major_formatter().set_scientific(False)
-                    subplt.margins(0.05)
-            plt.legend(handler_map={subplt: HandlerLine2D(numpoints=1)}, prop=fontP, loc='upper left')
-            plt.savefig(OUTDIR + '/' + domain + '/' + problem + '.png')
-            plt.close()
-    return
+
+def create_graph_from_plot_data(graph_data, OUTDIR, attr_x, attr_y, xlog, ylog, processes=1, batch=False,
+                                output_mode='png', force=False):
+    """
+    Renders OUTDIR/domain/problem.png (or the pages of PDF files, see render.render_graphs) for every problem of
+    graph_data with processes worker processes, reusing one figure per process if batch. The graphs that did not
+    change since the last run are skipped unless force. Returns the failed graphs (see render.render_jobs).
+    """
+    print('Creating graphs ...')
+    return render_graphs(get_render_jobs(graph_data, OUTDIR, attr_x, attr_y, xlog, ylog, batch), OUTDIR, output_mode,
+                         processes, force)
 
 
 def check_attribute_exists(grouped_data, attr):
@@ -132,7 +220,7 @@ def print_plot_data(graph_data, algo_order):
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("json_file", help=".json file containing the lab data")
+    parser.add_argument("json_file", help=".json files (or glob patterns) containing the lab data", nargs='+')
     parser.add_argument("--outfolder", "-o", help="output folder", default="output")
     parser.add_argument("--attribute-x", "-ax", help="attribute to use in x axis", default="max_abstraction_states")
     parser.add_argument("--attribute-y", "-ay", help="attribute to use in y axis", default="computation_time")
@@ -149,20 +237,27 @@ def main():
     # type=str)
     # parser.set_defaults(log=False, unsolvable_only=False, latex=False)
     parser.set_defaults(log_x=False, log_y=False, unsolvable_only=False)
+    add_loader_arguments(parser)
+    add_suite_arguments(parser)
+    add_render_arguments(parser)
     args = parser.parse_args()
     # if args.order is not None:
     #   args.order = args.order.split(' ')
 
-    data, problems = read_json_file(args.json_file, args.filter, args.unsolvable_only)
+    data, problems = read_json_file(args.json_file, args.filter, args.unsolvable_only, get_suite_option(args),
+                                    attributes=[args.attribute_x, args.attribute_y], **get_loader_options(args))
     if not check_attribute_exists(data, args.attribute_x):
         print('Attribute', args.attribute_x, 'does not exist')
         return
     if not check_attribute_exists(data, args.attribute_y):
         print('Attribute', args.attribute_y, 'does not exist')
         return
-    create_dirs_if_necessary(data, args.outfolder)
+    if args.output_mode == 'png':
+        create_dirs_if_necessary(data, args.outfolder)
     data = get_graph_data_per_problem(data, args.attribute_x, args.attribute_y)
-    create_graph_from_plot_data(data, args.outfolder, args.attribute_x, args.attribute_y, args.log_x, args.log_y)
+    report_failures(create_graph_from_plot_data(data, args.outfolder, args.attribute_x, args.attribute_y, args.log_x,
+                                                args.log_y, get_render_processes(args), args.batch, args.output_mode,
+                                                args.force))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,86 @@
+"""
+
+param: runs, jobs, file
+
+benchmark of read_json_file on a synthetic lab properties file with the given number of runs,
+once per number of processes (chunked parallel decoding, see common.find_run_boundaries)
+
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from common import read_json_file
+
+
+def create_synthetic_file(json_file, run_count, seed=1):
+    random.seed(seed)
+    algos = ['base_unsat', 'rave', 'linear-random1', 'linear-random2', 'dfp-random1']
+    domains = ['bag-barman', 'bag-gripper', 'cave-diving', 'diagnosis', 'pegsol', 'tetris']
+    with open(json_file, 'w') as f:
+        f.write('{\n')
+        for i in range(run_count):
+            algo = algos[i % len(algos)]
+            domain = domains[(i // len(algos)) % len(domains)]
+            problem = 'prob%06d.pddl' % (i // (len(algos) * len(domains)))
+            run = {
+                'algorithm_nick': algo,
+                'computation_time': random.random() * 1800,
+                'id': [algo, domain, problem],
+                'id_string': algo + ':' + domain + ':' + problem,
+                'max_abstraction_states': random.randint(1, 10 ** 8),
+                'unsolvable': random.randint(0, 1),
+                'var_count': random.randint(1, 300),
+            }
+            key = json.dumps(algo + '-' + domain + '-' + problem)
+            run_str = json.dumps(run, indent=2, sort_keys=True).replace('\n', '\n  ')
+            f.write('  ' + key + ': ' + run_str + (',\n' if i < run_count - 1 else '\n'))
+        f.write('}\n')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', '-r', help='number of runs in the synthetic file', type=int, default=1000000)
+    parser.add_argument('--jobs', '-j', help='numbers of processes to benchmark', type=int, nargs='+')
+    parser.add_argument('--file', '-f', help='use this properties file instead of a synthetic one')
+    args = parser.parse_args()
+
+    if args.jobs is None:
+        args.jobs = []
+        jobs = 1
+        while jobs < multiprocessing.cpu_count():
+            args.jobs.append(jobs)
+            jobs *= 2
+        args.jobs.append(multiprocessing.cpu_count())
+
+    folder = None
+    json_file = args.file
+    if json_file is None:
+        folder = tempfile.mkdtemp()
+        json_file = folder + '/properties'
+        print('Creating synthetic file with', args.runs, 'runs ...')
+        create_synthetic_file(json_file, args.runs)
+    print('File size:', '{:.1f}'.format(os.path.getsize(json_file) / 2 ** 20), 'MiB')
+
+    try:
+        base_time = None
+        print('{:>5} {:>10} {:>8}'.format('jobs', 'time (s)', 'speedup'))
+        for jobs in args.jobs:
+            start = time.perf_counter()
+            read_json_file(json_file, False, False, attributes=['max_abstraction_states'], jobs=jobs)
+            elapsed = time.perf_counter() - start
+            if base_time is None:
+                base_time = elapsed
+            print('{:>5} {:>10.2f} {:>8.2f}'.format(jobs, elapsed, base_time / elapsed))
+    finally:
+        if folder is not None:
+            os.remove(json_file)
+            os.rmdir(folder)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+
+param: repeat, modules
+
+benchmark of the startup time of the scripts: the time of a fresh interpreter importing each script module, and the
+heavy libraries loaded by the import. The plotting libraries are imported by the functions drawing the graphs only,
+so that the text and LaTeX outputs start fast (see ALLOWED_LIBRARIES). Exits with an error if a module loads a library
+it is not allowed to.
+
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# libraries costing a noticeable part of the startup time
+HEAVY_LIBRARIES = ['matplotlib', 'PIL', 'numpy']
+# the heavy libraries every script module may load at import time
+ALLOWED_LIBRARIES = {
+    'common': [],
+    'add_join_attribute': [],
+    'compute_uct_jumps': [],
+    'visualize_uct': [],
+    'reward_spread_graph': [],
+    'cumulative_graph': [],
+    'attribute_compare_graph': [],
+    'histogram_per_algo': [],
+    'get_latex_table': [],
+    'cumulative_graph_per_algo': ['numpy'],
+    'get_compare_stat_table': ['numpy'],
+    'get_run_data': ['numpy'],
+    'stats_from_random_exp': ['numpy'],
+    'compare_matrix': ['numpy'],
+    'significance': ['numpy'],
+    'query_server': ['numpy'],
+}
+
+
+def import_in_subprocess(module):
+    """
+    Imports module in a fresh interpreter, returns (wall time of the interpreter, import time, heavy libraries loaded)
+    """
+    code = 'import json, sys, time\nstart = time.perf_counter()\nimport ' + module + '\n' + \
+        'print(json.dumps([time.perf_counter() - start, [l for l in ' + json.dumps(HEAVY_LIBRARIES) + \
+        ' if l in sys.modules]]))'
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                            stdout=subprocess.PIPE, check=True, universal_newlines=True).stdout
+    wall_time = time.perf_counter() - start
+    import_time, libraries = json.loads(output.splitlines()[-1])
+    return wall_time, import_time, libraries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', '-r', help='number of imports of every module, the median is reported', type=int,
+                        default=5)
+    parser.add_argument('--modules', '-m', help='modules to benchmark (default: all the scripts)', nargs='+')
+    args = parser.parse_args()
+
+    modules = sorted(ALLOWED_LIBRARIES) if args.modules is None else args.modules
+    max_len = max(len(module) for module in modules)
+    print('{} {:>9} {:>11}  {}'.format('module'.ljust(max_len), 'wall (ms)', 'import (ms)', 'libraries'))
+    errors = []
+    for module in modules:
+        results = [import_in_subprocess(module) for _ in range(args.repeat)]
+        libraries = results[-1][2]
+        print('{} {:>9.1f} {:>11.1f}  {}'.format(module.ljust(max_len),
+                                                  1000 * statistics.median(wall for wall, _, _ in results),
+                                                  1000 * statistics.median(imp for _, imp, _ in results),
+                                                  ' '.join(libraries)))
+        unexpected = [library for library in libraries if library not in ALLOWED_LIBRARIES.get(module, libraries)]
+        if len(unexpected) > 0:
+            errors.append(module + ' imports ' + ', '.join(unexpected))
+    for error in errors:
+        print('Error: ' + error)
+    if len(errors) > 0:
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,323 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+CACHE_DIR = os.environ.get('FD_TOOLS_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'fd-tools'))
+CACHE_VERSION = 2
+BLOCK_SIZE = 1 << 16
+
+
+class Column:
+    """
+    A single attribute of every run. values is a typed array (int64, float64 or object), ints mixed with floats
+    are stored as float64 as long as they are exact in float64.
+    present marks the runs having the attribute and null the runs where the attribute is None.
+    """
+    def __init__(self, values, present, null):
+        self.values = values
+        self.present = present
+        self.null = null
+
+    @staticmethod
+    def from_values(run_count, rows, vals):
+        present = np.zeros(run_count, dtype=bool)
+        present[rows] = True
+        null = np.zeros(run_count, dtype=bool)
+        valid_rows = []
+        valid_vals = []
+        for row, val in zip(rows, vals):
+            if val is None:
+                null[row] = True
+            else:
+                valid_rows.append(row)
+                valid_vals.append(val)
+
+        types = set(type(val) for val in valid_vals)
+        dtype = object
+        if types == {int}:
+            dtype = np.int64
+        elif types == {float}:
+            dtype = np.float64
+        elif types == {int, float} and all(-2 ** 53 <= val <= 2 ** 53 for val in valid_vals if type(val) is int):
+            # e.g. a time attribute written as 0 for some runs
+            dtype = np.float64
+        values = None
+        if dtype is not object:
+            try:
+                values = np.zeros(run_count, dtype=dtype)
+                values[valid_rows] = valid_vals
+            except OverflowError:
+                values = None
+        if values is None:
+            values = np.empty(run_count, dtype=object)
+            for row, val in zip(valid_rows, valid_vals):
+                values[row] = val
+        return Column(values, present, null)
+
+
+class SortedIndex:
+    """
+    Sorted index of a numeric Column: values[i] is the i-th smallest value of the column, held by run order[i].
+    others holds the runs without a number (attribute missing or None).
+    """
+    def __init__(self, values, order, others):
+        self.values = values
+        self.order = order
+        self.others = others
+
+    @staticmethod
+    def from_column(column):
+        valid = np.flatnonzero(column.present & ~column.null)
+        order = valid[np.argsort(column.values[valid], kind='stable')].astype(np.int32)
+        return SortedIndex(np.asarray(column.values[order]), order,
+                           np.flatnonzero(~column.present | column.null).astype(np.int32))
+
+    def select(self, op, number):
+        """
+        Returns the (unsorted) runs whose value satisfies value <op> number, op is one of =, <, <=, >, >=
+        """
+        if op == '=':
+            start, end = np.searchsorted(self.values, number, side='left'), \
+                np.searchsorted(self.values, number, side='right')
+        elif op in ['<', '<=']:
+            start, end = 0, np.searchsorted(self.values, number, side='left' if op == '<' else 'right')
+        else:
+            start, end = np.searchsorted(self.values, number, side='right' if op == '>' else 'left'), len(self.values)
+        return self.order[start:end]
+
+
+class NameIndex:
+    """
+    Hash index of the run ids: the runs with name code c are order[offsets[c]:offsets[c + 1]]
+    """
+    def __init__(self, order, offsets):
+        self.order = order
+        self.offsets = offsets
+
+    @staticmethod
+    def from_codes(codes, name_count):
+        order = np.argsort(codes, kind='stable').astype(np.int32)
+        offsets = np.searchsorted(codes[order], np.arange(name_count + 1))
+        return NameIndex(order, offsets)
+
+    def select(self, codes):
+        """
+        Returns the (unsorted) runs having one of the name codes
+        """
+        parts = [self.order[self.offsets[c]:self.offsets[c + 1]] for c in codes]
+        if len(parts) == 0:
+            return np.zeros(0, dtype=np.int32)
+        return np.concatenate(parts)
+
+
+class RunTable:
+    """
+    Columnar representation of a lab properties file.
+    The run ids are dictionary encoded: run i belongs to algos[algo_ids[i]], domains[domain_ids[i]] and
+    problems[problem_ids[i]]. Every other attribute is stored as a Column.
+    Tables written into the cache also carry a SortedIndex per numeric column and a NameIndex per id part,
+    loaded on first use by get_sorted_index and get_name_index.
+    """
+    ID_PARTS = ['algo', 'domain', 'problem']
+
+    def __init__(self, keys, algos, domains, problems, algo_ids, domain_ids, problem_ids, columns):
+        self.keys = keys
+        self.algos = algos
+        self.domains = domains
+        self.problems = problems
+        self.algo_ids = algo_ids
+        self.domain_ids = domain_ids
+        self.problem_ids = problem_ids
+        self.columns = columns
+        self.folder = None
+        self._column_files = {}
+        self._indexes = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    @staticmethod
+    def from_runs(runs):
+        keys = []
+        names = ({}, {}, {})
+        codes = ([], [], [])
+        raw_columns = {}
+        for row, (key, run) in enumerate(runs):
+            keys.append(key)
+            for i in range(3):
+                if run['id'][i] not in names[i]:
+                    names[i][run['id'][i]] = len(names[i])
+                codes[i].append(names[i][run['id'][i]])
+            for attr, val in run.items():
+                if attr == 'id':
+                    continue
+                if attr not in raw_columns:
+                    raw_columns[attr] = ([], [])
+                raw_columns[attr][0].append(row)
+                raw_columns[attr][1].append(val)
+
+        columns = {}
+        for attr in sorted(raw_columns.keys()):
+            rows, vals = raw_columns.pop(attr)
+            columns[attr] = Column.from_values(len(keys), rows, vals)
+        key_array = np.empty(len(keys), dtype=object)
+        key_array[:] = keys
+        return RunTable(key_array, list(names[0]), list(names[1]), list(names[2]),
+                        np.array(codes[0], dtype=np.int32), np.array(codes[1], dtype=np.int32),
+                        np.array(codes[2], dtype=np.int32), columns)
+
+    def runs(self, attributes=None):
+        """
+        Yields the (run_key, run) pairs in the same format as the lab properties file.
+        If attributes is not None, only these attributes (and id) are put into the runs.
+        """
+        for start in range(0, len(self), BLOCK_SIZE):
+            end = min(start + BLOCK_SIZE, len(self))
+            algo_ids = self.algo_ids[start:end].tolist()
+            domain_ids = self.domain_ids[start:end].tolist()
+            problem_ids = self.problem_ids[start:end].tolist()
+            block = []
+            for attr, col in self.columns.items():
+                if attributes is not None and attr not in attributes:
+                    continue
+                block.append((attr, col.values[start:end].tolist(), col.present[start:end].tolist(),
+                              col.null[start:end].tolist()))
+            for i in range(end - start):
+                run = {'id': [self.algos[algo_ids[i]], self.domains[domain_ids[i]], self.problems[problem_ids[i]]]}
+                for attr, values, present, null in block:
+                    if present[i]:
+                        run[attr] = None if null[i] else values[i]
+                yield self.keys[start + i], run
+
+    def save(self, folder, source):
+        """
+        Writes the table into folder as one .npy file per array, so that numeric columns can be memory mapped
+        """
+        tmp_folder = folder + '.tmp' + str(os.getpid())
+        os.makedirs(tmp_folder)
+        np.save(tmp_folder + '/keys.npy', self.keys, allow_pickle=True)
+        np.save(tmp_folder + '/algo_ids.npy', self.algo_ids)
+        np.save(tmp_folder + '/domain_ids.npy', self.domain_ids)
+        np.save(tmp_folder + '/problem_ids.npy', self.problem_ids)
+        for part, codes, names in zip(RunTable.ID_PARTS, [self.algo_ids, self.domain_ids, self.problem_ids],
+                                      [self.algos, self.domains, self.problems]):
+            index = NameIndex.from_codes(codes, len(names))
+            np.save(tmp_folder + '/' + part + '.order.npy', index.order)
+            np.save(tmp_folder + '/' + part + '.offsets.npy', index.offsets)
+        attrs = []
+        for i, (attr, col) in enumerate(self.columns.items()):
+            attrs.append(attr)
+            np.save(tmp_folder + '/' + str(i) + '.values.npy', col.values, allow_pickle=True)
+            np.save(tmp_folder + '/' + str(i) + '.present.npy', col.present)
+            np.save(tmp_folder + '/' + str(i) + '.null.npy', col.null)
+            if col.values.dtype != object:
+                index = SortedIndex.from_column(col)
+                np.save(tmp_folder + '/' + str(i) + '.sorted.npy', index.values)
+                np.save(tmp_folder + '/' + str(i) + '.order.npy', index.order)
+                np.save(tmp_folder + '/' + str(i) + '.others.npy', index.others)
+        meta = {
+            'version': CACHE_VERSION,
+            'source': source,
+            'algos': self.algos,
+            'domains': self.domains,
+            'problems': self.problems,
+            'attributes': attrs
+        }
+        # meta.json is written last, a folder without it is never considered as a valid cache
+        with open(tmp_folder + '/meta.json', 'w') as f:
+            json.dump(meta, f)
+        if os.path.exists(folder):
+            shutil.rmtree(folder)
+        os.rename(tmp_folder, folder)
+        self.folder = folder
+        self._column_files = {attr: i for i, attr in enumerate(attrs)}
+        self._indexes = {}
+
+    @staticmethod
+    def load(folder, attributes=None):
+        """
+        Reads a table written by save. If attributes is not None, only the columns of these attributes are loaded.
+        """
+        with open(folder + '/meta.json') as f:
+            meta = json.load(f)
+        columns = {}
+        column_files = {}
+        for i, attr in enumerate(meta['attributes']):
+            if attributes is not None and attr not in attributes:
+                continue
+            columns[attr] = Column(_load_array(folder + '/' + str(i) + '.values.npy'),
+                                   _load_array(folder + '/' + str(i) + '.present.npy'),
+                                   _load_array(folder + '/' + str(i) + '.null.npy'))
+            column_files[attr] = i
+        table = RunTable(_load_array(folder + '/keys.npy'), meta['algos'], meta['domains'], meta['problems'],
+                         _load_array(folder + '/algo_ids.npy'), _load_array(folder + '/domain_ids.npy'),
+                         _load_array(folder + '/problem_ids.npy'), columns)
+        table.folder = folder
+        table._column_files = column_files
+        return table
+
+    def get_sorted_index(self, attr):
+        """
+        Returns the SortedIndex of attr, None if the table is not cached or attr is not a numeric column
+        """
+        if self.folder is None or attr not in self._column_files:
+            return None
+        if attr not in self._indexes:
+            path = self.folder + '/' + str(self._column_files[attr])
+            if os.path.exists(path + '.sorted.npy'):
+                self._indexes[attr] = SortedIndex(_load_array(path + '.sorted.npy'), _load_array(path + '.order.npy'),
+                                                  _load_array(path + '.others.npy'))
+            else:
+                self._indexes[attr] = None
+        return self._indexes[attr]
+
+    def get_name_index(self, part):
+        """
+        Returns the NameIndex of id[part] (0 algo, 1 domain, 2 problem), None if the table is not cached
+        """
+        if self.folder is None:
+            return None
+        if part not in self._indexes:
+            path = self.folder + '/' + RunTable.ID_PARTS[part]
+            self._indexes[part] = NameIndex(_load_array(path + '.order.npy'), _load_array(path + '.offsets.npy'))
+        return self._indexes[part]
+
+
+def _load_array(path):
+    try:
+        return np.load(path, mmap_mode='r')
+    except ValueError:
+        # object arrays can not be memory mapped
+        return np.load(path, allow_pickle=True)
+
+
+def get_source_signature(json_file):
+    stat = os.stat(json_file)
+    return {'path': os.path.abspath(json_file), 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+
+
+def get_cache_folder(json_file):
+    return os.path.join(CACHE_DIR, hashlib.sha1(os.path.abspath(json_file).encode()).hexdigest())
+
+
+def load_run_table(json_file, read_func, attributes=None):
+    """
+    Returns the RunTable of json_file from the cache. If the cache does not exist or the file has changed since the
+    cache was written (different size or modification time), the table is rebuilt from read_func(json_file).
+    read_func has to return every attribute so that the cache can be shared, attributes only restricts the columns
+    loaded from an existing cache.
+    """
+    folder = get_cache_folder(json_file)
+    signature = get_source_signature(json_file)
+    if os.path.exists(folder + '/meta.json'):
+        with open(folder + '/meta.json') as f:
+            meta = json.load(f)
+        if meta['version'] == CACHE_VERSION and meta['source'] == signature:
+            return RunTable.load(folder, attributes)
+    print('Building cache for ' + json_file + ' ...')
+    table = RunTable.from_runs(read_func(json_file))
+    table.save(folder, signature)
+    return table
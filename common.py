@@ -1,161 +1,513 @@
+import bz2
 import glob
+import gzip
 import json
+import lzma
+import mmap
+import multiprocessing
 import os
 import re
 
-SUITE_TOO_LARGE = ['bag-barman']
-SUITE_TRIVIAL = ['bottleneck']
-SUITE_NONTRIVIAL_UNSOLVABLE = []
-SUITE_SOLVABLE = []
-SUITE_UNKNOWN = []
-# bag-gripper
-for i in range(1, 26):
-    SUITE_NONTRIVIAL_UNSOLVABLE.append('bag-gripper:prob' + ('%02d' % i) + '.pddl')
-for i in range(1, 6):
-    SUITE_SOLVABLE.append('bag-gripper:satprob' + ('%02d' % i) + '.pddl')
-# bag-transport
-for i in [2, 5, 11, 20, 21]:
-    SUITE_NONTRIVIAL_UNSOLVABLE.append('bag-transport:prob' + ('%02d' % i) + '.pddl')
-for i in range(1, 30):
-    SUITE_SOLVABLE.append('bag-transport:satprob' + ('%02d' % i) + '.pddl')
-# cave-diving
-for i in range(1, 26):
-    if i != 5:
-        SUITE_NONTRIVIAL_UNSOLVABLE.append('cave-diving:prob' + ('%02d' % i) + '.pddl')
-for i in range(1, 6):
-    SUITE_SOLVABLE.append('cave-diving:satprob' + ('%02d' % i) + '.pddl')
-# chessboard-pebbling
-for i in range(3, 26):
-    SUITE_NONTRIVIAL_UNSOLVABLE.append('chessboard-pebbling:prob' + ('%02d' % i) + '.pddl')
-# diagnosis
-for i in [4, 5, 7, 8, 9, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20]:
-    SUITE_NONTRIVIAL_UNSOLVABLE.append('diagnosis:prob' + ('%02d' % i) + '.pddl')
-for i in range(1, 124):
-    SUITE_SOLVABLE.append('diagnosis:satprob' + ('%02d' % i) + '.pddl')
-# document-transfer
-for i in [1, 2, 3, 5, 7, 8, 10, 11, 13, 14, 18, 19]:
-    SUITE_NONTRIVIAL_UNSOLVABLE.append('document-transfer:prob' + ('%02d' % i) + '.pddl')
-for i in [1, 2, 3, 4, 5, 10]:
-    SUITE_SOLVABLE.append('document-transfer:satprob' + ('%02d' % i) + '.pddl')
-for i in range(1, 10):
-    SUITE_UNKNOWN.append('document-transfer:unknownprob' + ('%02d' % i) + '.pddl')
-# over-nomystery
-for i in range(3, 25):
-    SUITE_NONTRIVIAL_UNSOLVABLE.append('over-nomystery:prob' + ('%02d' % i) + '.pddl')
-for i in range(1, 6):
-    SUITE_SOLVABLE.append('over-nomystery:satprob' + ('%02d' % i) + '.pddl')
-# over-rovers
-for i in [4, 6, 7, 8, 10, 11, 12, 13, 14, 15, 16, 17, 18, 19, 20]:
-    SUITE_NONTRIVIAL_UNSOLVABLE.append('over-rovers:prob' + ('%02d' % i) + '.pddl')
-for i in range(1, 7):
-    SUITE_SOLVABLE.append('over-rovers:satprob' + ('%02d' % i) + '.pddl')
-# over-tpp
-for i in range(1, 31):
-    if i != 2 and i != 3:
-        SUITE_NONTRIVIAL_UNSOLVABLE.append('over-tpp:prob' + ('%02d' % i) + '.pddl')
-for i in range(1, 5):
-    SUITE_SOLVABLE.append('over-tpp:satprob' + ('%02d' % i) + '.pddl')
-# pegsol
-for i in range(9, 31):
-    SUITE_NONTRIVIAL_UNSOLVABLE.append('pegsol:prob' + ('%02d' % i) + '.pddl')
-for i in range(1, 6):
-    SUITE_SOLVABLE.append('pegsol:satprob' + ('%02d' % i) + '.pddl')
-# pegsol-row5
-for i in range(4, 16):
-    SUITE_NONTRIVIAL_UNSOLVABLE.append('pegsol-row5:prob' + ('%02d' % i) + '.pddl')
-for i in range(1, 6):
-    SUITE_SOLVABLE.append('pegsol-row5:satprob' + ('%02d' % i) + '.pddl')
-# sliding-tiles
-for i in range(1, 21):
-    SUITE_NONTRIVIAL_UNSOLVABLE.append('sliding-tiles:prob' + ('%02d' % i) + '.pddl')
-for i in range(1, 6):
-    SUITE_SOLVABLE.append('sliding-tiles:satprob' + ('%02d' % i) + '.pddl')
-# tetris
-for i in range(6, 21):
-    SUITE_NONTRIVIAL_UNSOLVABLE.append('tetris:prob' + ('%02d' % i) + '.pddl')
-
-
-def read_json_file(json_file, filter_data, unsolvable_only, filter_suite=None):
+from suites import as_suite, get_suite
+
+# the suites formerly defined here, now read on first use from the suite registry
+_SUITE_NAMES = {
+    'SUITE_TOO_LARGE': 'too-large',
+    'SUITE_TRIVIAL': 'trivial',
+    'SUITE_NONTRIVIAL_UNSOLVABLE': 'nontrivial-unsolvable',
+    'SUITE_SOLVABLE': 'solvable',
+    'SUITE_UNKNOWN': 'unknown'
+}
+
+ALIASES_FILE = os.environ.get('FD_TOOLS_ALIASES', os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                'aliases.json'))
+_RUN_NUMBER = re.compile(r'(\d+)')
+# aliases of ALIASES_FILE (read on first use) and dict[id[0]] = parse_algo_id(id[0])
+_algo_aliases = None
+_algo_ids = {}
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def __getattr__(name):
     """
-    Returns a dictionary in the following format: dict[domain][problem][algo] = [list of experiment data]
-    the algo must have format "algo_name%d" where %d is an integer representing run_id for this algorithm
+    Keeps the SUITE_* lists importable: they are the entries of the registry suites (see suites.Suite.entries)
     """
-    print('Reading file ...')
-    with open(json_file) as data_file:
-        data = json.load(data_file)
+    if name in _SUITE_NAMES:
+        return get_suite(_SUITE_NAMES[name]).entries()
+    raise AttributeError('module ' + __name__ + ' has no attribute ' + name)
+
+
+def iter_json_runs(data_file, chunk_size=1 << 20):
+    """
+    Yields (key, value) pairs of the top level object of a json file one entry at a time.
+    Only the entry being decoded is kept in memory, so the whole document is never loaded at once.
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+    state = 'open'
+    key = None
+    while True:
+        pos = _WHITESPACE.match(buf, pos).end()
+        try:
+            if pos == len(buf):
+                raise EOFError
+            if state == 'open':
+                if buf[pos] != '{':
+                    raise ValueError('Expected a json object at the top level')
+                pos += 1
+                state = 'first'
+            elif state == 'first' or state == 'separator':
+                if buf[pos] == '}':
+                    return
+                if state == 'separator':
+                    if buf[pos] != ',':
+                        raise ValueError('Expected , or } at position ' + str(pos))
+                    pos += 1
+                state = 'key'
+            elif state == 'key':
+                key, pos = decoder.raw_decode(buf, pos)
+                state = 'colon'
+            elif state == 'colon':
+                if buf[pos] != ':':
+                    raise ValueError('Expected : at position ' + str(pos))
+                pos += 1
+                state = 'value'
+            else:
+                value, end = decoder.raw_decode(buf, pos)
+                if end == len(buf) and not eof:
+                    # a scalar might have been cut in the middle by the chunk boundary
+                    raise EOFError
+                pos = end
+                state = 'separator'
+                yield key, value
+        except (EOFError, json.JSONDecodeError) as e:
+            if eof:
+                if isinstance(e, EOFError):
+                    raise ValueError('Unexpected end of json file')
+                raise
+            chunk = data_file.read(chunk_size)
+            eof = len(chunk) == 0
+            buf = buf[pos:] + chunk
+            pos = 0
+
+
+def project_run(run, attributes):
+    """
+    Returns a copy of run containing only id and the given attributes
+    """
+    projected = {'id': run['id']}
+    for attr in attributes:
+        if attr in run:
+            projected[attr] = run[attr]
+    return projected
+
+
+def expand_json_files(json_files):
+    """
+    Returns the list of files given by json_files, which is a path, a glob pattern or a list of them
+    """
+    if isinstance(json_files, str):
+        json_files = [json_files]
+    files = []
+    for pattern in json_files:
+        if any(c in pattern for c in '*?['):
+            matches = sorted(glob.glob(pattern))
+            if len(matches) == 0:
+                raise FileNotFoundError('No file matches ' + pattern)
+            files += matches
+        else:
+            files.append(pattern)
+    return files
+
+
+COMPRESSION_MAGIC = [
+    (b'\x1f\x8b', gzip),
+    (b'BZh', bz2),
+    (b'\xfd7zXZ\x00', lzma),
+]
+
+
+def get_compression(json_file):
+    """
+    Returns the module (gzip, bz2 or lzma) able to decompress json_file, detected by its magic bytes,
+    or None if the file is not compressed
+    """
+    with open(json_file, 'rb') as f:
+        head = f.read(6)
+    for magic, module in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return module
+    return None
+
+
+def open_properties(json_file):
+    """
+    Opens json_file for reading as text, decompressing it on the fly if it is compressed with gzip, bzip2 or xz
+    """
+    compression = get_compression(json_file)
+    if compression is None:
+        return open(json_file)
+    return compression.open(json_file, 'rt')
+
+
+def read_file_runs(json_file, stream=False, cache=False, attributes=None, jobs=1):
+    """
+    Yields (run_key, run) pairs of a single lab properties file, see read_runs for the parameters
+    """
+    if attributes is not None:
+        attributes = set(attributes)
+    if cache:
+        # numpy is imported by the code paths using it only, see bench_startup.py
+        from columns import load_run_table
+        table = load_run_table(json_file, lambda f: read_file_runs(f, stream, jobs=jobs), attributes)
+        yield from table.runs(attributes)
+        return
+    compressed = get_compression(json_file) is not None
+    if jobs > 1 and not compressed:
+        with multiprocessing.Pool(jobs) as pool:
+            for runs in pool.imap(_decode_run_chunk, get_chunk_params(json_file, jobs, attributes)):
+                yield from runs
+        return
+    with open_properties(json_file) as data_file:
+        # a compressed file is always decompressed and parsed incrementally, it is never fully in memory
+        if stream or compressed:
+            for idx, val in iter_json_runs(data_file):
+                if attributes is not None:
+                    val = project_run(val, attributes)
+                yield idx, val
+        else:
+            for idx, val in json.load(data_file).items():
+                if attributes is not None:
+                    val = project_run(val, attributes)
+                yield idx, val
+
+
+def _read_file_run_list(params):
+    return list(read_file_runs(*params))
+
+
+def merge_runs(runs_per_file, on_duplicate='first'):
+    """
+    Yields the runs of several files, detecting the runs having the same id (i.e. the same id_string).
+    on_duplicate is the conflict policy:
+    'first' keeps the run of the first file in the given order and ignores the others,
+    'last' keeps the run of the last file (at the position of the first one),
+    'error' raises a ValueError.
+    """
+    seen = {}
+    duplicates = 0
+    for runs in runs_per_file:
+        for idx, val in runs:
+            run_id = ':'.join(val['id'])
+            if run_id in seen:
+                duplicates += 1
+                if on_duplicate == 'error':
+                    raise ValueError('Duplicate run ' + run_id)
+                if on_duplicate == 'last':
+                    seen[run_id] = (idx, val)
+                continue
+            if on_duplicate == 'first':
+                seen[run_id] = None
+                yield idx, val
+            else:
+                seen[run_id] = (idx, val)
+    if on_duplicate == 'last':
+        for run in seen.values():
+            yield run
+    if duplicates > 0:
+        print('Warning: ' + str(duplicates) + ' duplicate runs found, kept the ' + on_duplicate + ' ones')
+
+
+def find_run_boundaries(json_file, parts):
+    """
+    Returns the byte offsets [start, ..., end] splitting the runs of json_file into at most parts ranges,
+    each of them starting at a top level key.
+    Strings can not contain raw new lines in json, so in an indented file the top level keys are exactly the places
+    where a new line is followed by the indentation of the first key and a quote. Such a marker is searched
+    for near every split point with a byte scan of the memory mapped file. A file without new lines between the
+    runs, or whose top level keys are not indented (indent=0, the nested keys look the same), is returned as a
+    single range, as is a file where a split point does not look like the start of a run.
+    """
+    with open(json_file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return [0, 0]
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = mm.find(b'{') + 1
+            end = mm.rfind(b'}')
+            first_key = mm.find(b'"', start, end)
+            if first_key < 0:
+                return [start, max(start, end)]
+            line_start = mm.rfind(b'\n', start, first_key)
+            if line_start < 0 or line_start + 1 == first_key or mm[line_start + 1:first_key].strip(b' \t') != b'':
+                return [start, end]
+            marker = mm[line_start:first_key + 1]
+            boundaries = [first_key]
+            for i in range(1, parts):
+                pos = mm.find(marker, max(start + (end - start) * i // parts, boundaries[-1] + 1), end)
+                if pos < 0:
+                    break
+                boundaries.append(pos + len(marker) - 1)
+            if not all(_is_run_start(mm, pos, end) for pos in boundaries[1:]):
+                return [start, end]
+            boundaries.append(end)
+            return sorted(set(boundaries))
+
+
+def _is_run_start(mm, pos, end):
+    """
+    Returns True if the key at the byte offset pos is followed by an object and preceded by the end of an object and
+    a comma, as the key of a run following another run is
+    """
+    before = mm[max(0, pos - 256):pos].rstrip()
+    if not before.endswith(b',') or not before[:-1].rstrip().endswith(b'}'):
+        return False
+    text = mm[pos:min(end, pos + 4096)].decode('utf-8', errors='replace')
+    try:
+        key, key_end = json.JSONDecoder().raw_decode(text)
+    except ValueError:
+        return False
+    return isinstance(key, str) and re.match(r'\s*:\s*\{', text[key_end:]) is not None
+
+
+def decode_run_chunk(json_file, start, end, attributes=None):
+    """
+    Returns the list of (run_key, run) pairs found between the byte offsets start and end of json_file,
+    the range has to start at a top level key (see find_run_boundaries)
+    """
+    with open(json_file, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode('utf-8')
+    decoder = json.JSONDecoder()
+    runs = []
+    pos = _WHITESPACE.match(text, 0).end()
+    while pos < len(text):
+        key, pos = decoder.raw_decode(text, pos)
+        pos = _WHITESPACE.match(text, pos).end()
+        if text[pos] != ':':
+            raise ValueError('Expected : at byte ' + str(start + pos) + ' of ' + json_file)
+        value, pos = decoder.raw_decode(text, _WHITESPACE.match(text, pos + 1).end())
+        if attributes is not None:
+            value = project_run(value, attributes)
+        runs.append((key, value))
+        pos = _WHITESPACE.match(text, pos).end()
+        if pos < len(text) and text[pos] == ',':
+            pos = _WHITESPACE.match(text, pos + 1).end()
+    return runs
+
+
+def _decode_run_chunk(params):
+    return decode_run_chunk(*params)
+
+
+def _group_run_chunk(params):
+    json_file, start, end, attributes, unsolvable_only, filter_suite, run_numbers = params
+    return group_runs(decode_run_chunk(json_file, start, end, attributes), unsolvable_only, filter_suite,
+                      run_numbers)
+
+
+def get_chunk_params(json_file, jobs, attributes=None):
+    # more chunks than processes, so that a slow chunk does not leave the other processes idle
+    boundaries = find_run_boundaries(json_file, jobs * 4)
+    return [(json_file, boundaries[i], boundaries[i + 1], attributes) for i in range(len(boundaries) - 1)]
+
+
+def merge_grouped_data(grouped_data, partial_data):
+    """
+    Adds the runs of partial_data to grouped_data, both in the dict[domain][problem][algo] format of group_runs
+    """
+    for domain, problems in partial_data.items():
+        if domain not in grouped_data:
+            grouped_data[domain] = problems
+            continue
+        for problem, algos in problems.items():
+            if problem not in grouped_data[domain]:
+                grouped_data[domain][problem] = algos
+                continue
+            for algo, runs in algos.items():
+                if algo not in grouped_data[domain][problem]:
+                    grouped_data[domain][problem][algo] = runs
+                else:
+                    grouped_data[domain][problem][algo] += runs
+    return grouped_data
+
+
+def read_runs(json_files, stream=False, cache=False, attributes=None, jobs=1, on_duplicate='first'):
+    """
+    Yields (run_key, run) pairs of lab properties files.
+    json_files is a path, a glob pattern or a list of them (see expand_json_files), the runs of several files are
+    merged with merge_runs using the on_duplicate policy. With jobs > 1, the files are parsed in a process pool,
+    and a single file is split into ranges of runs decoded in parallel (see find_run_boundaries).
+    The files can be compressed with gzip, bzip2 or xz (see open_properties), they are then always decompressed
+    and parsed incrementally, without temporary files.
+    If stream is True, the file is parsed incrementally instead of being loaded with json.load.
+    If cache is True, the runs are read from the columnar cache of the file, which is (re)built when needed.
+    If attributes is not None, the runs only contain id and these attributes. The other attributes are dropped as
+    soon as their run has been decoded (or never loaded at all from the cache).
+    """
+    files = expand_json_files(json_files)
+    if len(files) == 1:
+        yield from read_file_runs(files[0], stream, cache, attributes, jobs)
+        return
+    params = [(f, stream, cache, attributes) for f in files]
+    if jobs > 1:
+        with multiprocessing.Pool(min(jobs, len(files))) as pool:
+            yield from merge_runs(pool.imap(_read_file_run_list, params), on_duplicate)
+    else:
+        yield from merge_runs([read_file_runs(*p) for p in params], on_duplicate)
+
+
+def read_run_table(json_files, stream=False, cache=False, attributes=None, jobs=1, on_duplicate='first'):
+    """
+    Returns the runs of lab properties files as a columns.RunTable, see read_runs for the parameters
+    """
+    from columns import RunTable, load_run_table
+    files = expand_json_files(json_files)
+    if cache and len(files) == 1:
+        return load_run_table(files[0], lambda f: read_file_runs(f, stream, jobs=jobs), attributes)
+    return RunTable.from_runs(read_runs(files, stream, cache, attributes, jobs, on_duplicate))
+
+
+def get_algo_aliases():
+    """
+    Returns dict[algo] = normalized algo name of the random experiments, read on first use from ALIASES_FILE
+    """
+    global _algo_aliases
+    if _algo_aliases is None:
+        with open(ALIASES_FILE) as f:
+            _algo_aliases = json.load(f)
+    return _algo_aliases
+
+
+def set_algo_aliases(aliases):
+    """
+    Replaces the aliases of ALIASES_FILE, the algo ids already parsed are forgotten
+    """
+    global _algo_aliases
+    _algo_aliases = dict(aliases)
+    _algo_ids.clear()
+
+
+def parse_algo_id(algo_id):
+    """
+    Returns (algo, run_str, run number) of id[0] of a run, see split_algo_id. The run number is an int, None as
+    run_str if id[0] does not contain one. The result is memoized per distinct id[0].
+    """
+    parts = _algo_ids.get(algo_id)
+    if parts is None:
+        match = _RUN_NUMBER.search(algo_id)
+        if not match:
+            parts = (algo_id, None, None)
+        else:
+            run_str = match.group(1)
+            algo = algo_id[0:len(algo_id) - len(run_str)]
+            parts = (get_algo_aliases().get(algo, algo), run_str, int(run_str))
+        _algo_ids[algo_id] = parts
+    return parts
+
+
+def split_algo_id(algo_id):
+    """
+    Splits id[0] of a run into the algorithm name and the run number of random experiments
+    (linear-random3 -> linear-random, 3), the run number is None if id[0] does not contain one.
+    The algorithm names of the random experiments are normalized with the aliases of get_algo_aliases
+    (perfect-linear-random3 -> linear-random, 3).
+    """
+    parts = parse_algo_id(algo_id)
+    return parts[0], parts[1]
 
-    print('Grouping data ...')
 
-    # grouping data
+def get_run_number(run):
+    """
+    Returns the run number (int) of a run of a random experiment, None for the other runs
+    """
+    return parse_algo_id(run['id'][0])[2]
+
+
+def parse_run_numbers(text):
+    """
+    Returns the set of run numbers of a comma separated list of numbers and ranges, e.g. 1-5,8.
+    Raises ValueError for a malformed list.
+    """
+    numbers = set()
+    for part in text.split(','):
+        bounds = part.strip().split('-')
+        if len(bounds) > 2 or not all(bound.strip().isdigit() for bound in bounds):
+            raise ValueError('Invalid run numbers ' + text + ', expected e.g. 1-5,8')
+        numbers.update(range(int(bounds[0]), int(bounds[-1]) + 1))
+    return numbers
+
+
+def group_runs(runs, unsolvable_only, filter_suite=None, run_numbers=None):
+    """
+    Groups (run_key, run) pairs into dict[domain][problem][algo] = [list of experiment data].
+    filter_suite is a suites.Suite, a suite expression or a list of suite entries, see suites.as_suite.
+    If run_numbers is not None, the runs of random experiments are only kept for these run numbers (seeds),
+    the runs without a run number are always kept.
+    """
+    if filter_suite is not None:
+        filter_suite = as_suite(filter_suite)
     grouped_data = {}
-    existing_problems = {}
-    pattern = re.compile(r'(\d+)')
-    for idx, val in data.items():
-        if val['id'][1] not in grouped_data:
-            existing_problems[val['id'][1]] = set()
-            if not unsolvable_only or val['unsolvable'] == 1:
-                grouped_data[val['id'][1]] = {}
-        if val['id'][1] in grouped_data and val['id'][2] not in grouped_data[val['id'][1]]:
-            existing_problems[val['id'][1]].add(val['id'][2])
-            if not unsolvable_only or val['unsolvable'] == 1:
-                grouped_data[val['id'][1]][val['id'][2]] = {}
+    for idx, val in runs:
         if unsolvable_only and val['unsolvable'] == 0:
             continue
-        match = pattern.search(val['id'][0])
-        if match:
-            run_str = match.group(1)
-            algo = val['id'][0][0:len(val['id'][0]) - len(run_str)]
-            if algo == 'perfect-random' or algo == 'perfect-general-random':
-                algo = 'general-random'
-            if algo == 'perfect-linear-random':
-                algo = 'linear-random'
-            if algo == 'linear-random-relevant' or algo == 'perfect-linear-relevant':
-                algo = 'linear-relevant-random'
-            if algo == 'perfect-dfp-random':
-                algo = 'dfp-random'
-            if algo not in grouped_data[val['id'][1]][val['id'][2]]:
-                grouped_data[val['id'][1]][val['id'][2]][algo] = []
-            grouped_data[val['id'][1]][val['id'][2]][algo].append(val)
+        domain = val['id'][1]
+        problem = val['id'][2]
+        if filter_suite is not None and not filter_suite.contains(domain, problem):
+            continue
+        algo, run_str, run_number = parse_algo_id(val['id'][0])
+        if run_numbers is not None and run_str is not None and run_number not in run_numbers:
+            continue
+        if domain not in grouped_data:
+            grouped_data[domain] = {}
+        if problem not in grouped_data[domain]:
+            grouped_data[domain][problem] = {}
+        if run_str is not None:
+            if algo not in grouped_data[domain][problem]:
+                grouped_data[domain][problem][algo] = []
+            grouped_data[domain][problem][algo].append(val)
         else:
-            grouped_data[val['id'][1]][val['id'][2]][val['id'][0]] = [val]
+            grouped_data[domain][problem][algo] = [val]
+    return grouped_data
+
+
+def read_json_file(json_files, filter_data, unsolvable_only, filter_suite=None, stream=False, cache=False,
+                   attributes=None, jobs=1, on_duplicate='first', run_numbers=None):
+    """
+    Returns a dictionary in the following format: dict[domain][problem][algo] = [list of experiment data]
+    the algo must have format "algo_name%d" where %d is an integer representing run_id for this algorithm
+    json_files is a path, a glob pattern or a list of them, the runs of all files are grouped together.
+    If stream is True, the runs are filtered and grouped as they are parsed, one run at a time.
+    If cache is True, the runs are read from the columnar cache of json_file (see columns.load_run_table).
+    If attributes is not None, the runs only keep these attributes besides id and unsolvable.
+    See group_runs for filter_suite and run_numbers, and read_runs for jobs and on_duplicate.
+    With jobs > 1 and a single file, every process groups its own range of runs and the partial results are merged.
+    """
+    print('Reading file ...')
+    if attributes is not None:
+        attributes = set(attributes) | {'unsolvable'}
+    files = expand_json_files(json_files)
+    if jobs > 1 and len(files) == 1 and not cache and get_compression(files[0]) is None:
+        grouped_data = {}
+        params = [p + (unsolvable_only, filter_suite, run_numbers)
+                  for p in get_chunk_params(files[0], jobs, attributes)]
+        with multiprocessing.Pool(jobs) as pool:
+            for partial_data in pool.imap(_group_run_chunk, params):
+                merge_grouped_data(grouped_data, partial_data)
+    else:
+        grouped_data = group_runs(read_runs(files, stream, cache, attributes, jobs, on_duplicate), unsolvable_only,
+                                  filter_suite, run_numbers)
 
     if filter_data:
         print('Filtering base unsat only data ...')
 
-        counter = {}
-        for domain, problems in grouped_data.items():
-            counter[domain] = {}
-            for problem, algos in problems.items():
-                if problem not in counter[domain]:
-                    counter[domain][problem] = 0
-                counter[domain][problem] += len(algos)
-        to_del = []
-        for domain, problems in grouped_data.items():
-            for problem, algos in problems.items():
-                if counter[domain][problem] <= 1:
-                    to_del.append((domain, problem))
-        for domain, problem in to_del:
-            del grouped_data[domain][problem]
-        to_del = []
-        for domain, problems in grouped_data.items():
-            if len(grouped_data[domain]) == 0:
-                to_del.append(domain)
-        for domain in to_del:
-            del grouped_data[domain]
+        from universe import AlgoProblemSets, at_least, filter_problems
+        # the problems at least two algorithms ran on
+        problem_sets = AlgoProblemSets.from_grouped_data(grouped_data)
+        keep = at_least(problem_sets.present().values(), 2)
+        filter_problems(grouped_data, None, problem_sets.universe, keep)
 
-    if filter_suite is not None:
-        domain_to_del = []
-        for domain, problems in grouped_data.items():
-            prob_to_del = []
-            for prob, algos in problems.items():
-                if domain + ':' + prob not in filter_suite:
-                    prob_to_del.append(prob)
-            for prob in prob_to_del:
-                del problems[prob]
-            if len(problems) == 0:
-                domain_to_del.append(domain)
-        for domain in domain_to_del:
-            del grouped_data[domain]
     existing_problems = {}
     for domain, problems in grouped_data.items():
         existing_problems[domain] = set()
@@ -164,6 +516,29 @@ def read_json_file(json_file, filter_data, unsolvable_only, filter_suite=None):
     return grouped_data, existing_problems
 
 
+def add_loader_arguments(parser):
+    """
+    Adds the command line options shared by every script that reads a lab properties file
+    """
+    parser.add_argument("--stream", help="parse the properties file incrementally, one run at a time",
+                        dest='stream', action='store_true')
+    parser.add_argument("--cache", help="read the runs from a columnar cache of the properties file, the cache is "
+                                        "created on the first use and rebuilt whenever the file changes",
+                        dest='cache', action='store_true')
+    parser.add_argument("--jobs", "-j", help="number of processes used to parse the properties files",
+                        type=int, default=1)
+    parser.add_argument("--on-duplicate", help="what to do with runs appearing in several properties files",
+                        choices=['first', 'last', 'error'], default='first', dest='on_duplicate')
+    parser.set_defaults(stream=False, cache=False)
+
+
+def get_loader_options(args):
+    """
+    Returns the keyword arguments for the loaders from the options added by add_loader_arguments
+    """
+    return {'stream': args.stream, 'cache': args.cache, 'jobs': args.jobs, 'on_duplicate': args.on_duplicate}
+
+
 def check_attribute_exists(grouped_data, attr):
     attrs = []
     for domain, problems in grouped_data.items():
@@ -0,0 +1,173 @@
+"""
+
+param: json_file(s), attribute, stat, format
+
+all-pairs comparison of the algorithms on an attribute: the win/loss/tie matrix and the geometric mean ratio matrix
+over the problems covered by both algorithms of every pair (the problems where both have a value of the attribute).
+Both matrices are computed from a problem x algo matrix of the attribute (see build_matrix), with one matrix product
+or one broadcast comparison for all the pairs at once.
+
+"""
+import argparse
+import csv
+import sys
+
+import numpy as np
+
+from aggregate import Aggregation, is_supported
+from common import read_json_file, add_loader_arguments, get_loader_options
+from suites import add_suite_arguments, get_suite_option
+
+# problems compared at once by get_win_matrices, bounds the (rows, algos, algos) comparison arrays
+CHUNK_SIZE = 1 << 10
+
+
+def build_matrix(grouped_data, attr, stat='mean'):
+    """
+    Returns (problems, algos, values): values[i][j] is the statistic stat of attr over the runs of algos[j] on
+    problems[i] = (domain, problem), nan if algos[j] has no value on problems[i]
+    """
+    aggregation = Aggregation(grouped_data, [attr], [stat])
+    problems = {}
+    algos = {}
+    for domain, problem, algo in aggregation.groups:
+        problems.setdefault((domain, problem), len(problems))
+        algos.setdefault(algo, len(algos))
+    values = np.full((len(problems), len(algos)), np.nan)
+    for (domain, problem, algo), v in zip(aggregation.groups, aggregation.values[(attr, stat)]):
+        if v is not None:
+            values[problems[(domain, problem)], algos[algo]] = v
+    return list(problems), list(algos), values
+
+
+def get_win_matrices(values, higher_better=False, tolerance=0.0):
+    """
+    Returns (wins, losses, ties, common): wins[a][b] is the number of problems where algo a is better than algo b,
+    ties[a][b] the number where they are within the relative tolerance, common[a][b] the number of problems both
+    algos cover
+    """
+    algo_count = values.shape[1]
+    wins = np.zeros((algo_count, algo_count), dtype=np.int64)
+    ties = np.zeros((algo_count, algo_count), dtype=np.int64)
+    covered = (~np.isnan(values)).astype(np.float64)
+    # float matrix products use BLAS, integer ones do not. The counts are exact in float64
+    common = np.rint(covered.T @ covered).astype(np.int64)
+    for start in range(0, len(values), CHUNK_SIZE):
+        a = values[start:start + CHUNK_SIZE, :, None]
+        b = values[start:start + CHUNK_SIZE, None, :]
+        # comparisons with nan are False, only the problems both algos cover are counted
+        with np.errstate(invalid='ignore'):
+            win = a > b if higher_better else a < b
+            if tolerance > 0:
+                tie = np.abs(a - b) <= tolerance * np.maximum(np.abs(a), np.abs(b))
+                win &= ~tie
+                ties += np.count_nonzero(tie, axis=0)
+        wins += np.count_nonzero(win, axis=0)
+    if tolerance == 0:
+        ties = common - wins - wins.T
+    return wins, wins.T.copy(), ties, common
+
+
+def get_ratio_matrix(values):
+    """
+    Returns ratio[a][b], the geometric mean of value(a) / value(b) over the problems both algos cover with a
+    positive value (nan if there is none):
+    exp((sum_p log a_p - log b_p) / n) where the sums over the common problems are two matrix products
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        logs = np.log(np.where(values > 0, values, np.nan))
+    covered = (~np.isnan(logs)).astype(np.float64)
+    logs = np.nan_to_num(logs)
+    common = covered.T @ covered
+    log_sums = logs.T @ covered - covered.T @ logs
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.exp(log_sums / common)
+
+
+def get_order(algos, order):
+    if order is None:
+        return sorted(algos)
+    for algo in order:
+        if algo not in algos:
+            print('Error: unknown algorithm ' + algo + ', the algorithms are: ' + ', '.join(sorted(algos)))
+            exit(1)
+    return order
+
+
+def format_ratio(val):
+    return '-' if np.isnan(val) else '{:.2f}'.format(val)
+
+
+def print_matrix(title, algo_order, cells, latex):
+    """
+    Prints the matrix cells[(row algo, column algo)] = string in the table style of stats_from_random_exp
+    """
+    print(title)
+    if latex:
+        print(' ' + ''.join(' & ' + algo for algo in algo_order) + ' \\\\')
+        for row in algo_order:
+            print(row + ''.join(' & ' + cells[(row, col)] for col in algo_order) + ' \\\\')
+        return
+    max_row_len = max(len(algo) for algo in algo_order)
+    max_char = max(max(len(cell) for cell in cells.values()), max(len(algo) for algo in algo_order))
+    print(' ' * max_row_len + ''.join(' ' + algo.rjust(max_char) for algo in algo_order))
+    for row in algo_order:
+        print(row.ljust(max_row_len) + ''.join(' ' + cells[(row, col)].rjust(max_char) for col in algo_order))
+
+
+def print_report(algos, wins, losses, ties, common, ratio, algo_order, output_format, out=sys.stdout):
+    index = {algo: i for i, algo in enumerate(algos)}
+    pairs = [(a, b, index[a], index[b]) for a in algo_order for b in algo_order]
+    if output_format == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(['algo', 'other', 'common', 'wins', 'losses', 'ties', 'gmean_ratio'])
+        for a, b, i, j in pairs:
+            if a != b:
+                writer.writerow([a, b, common[i, j], wins[i, j], losses[i, j], ties[i, j],
+                                 '' if np.isnan(ratio[i, j]) else ratio[i, j]])
+        return
+    latex = output_format == 'latex'
+    print_matrix('wins/losses/ties of the row algorithm', algo_order,
+                 {(a, b): '-' if a == b else '{}/{}/{}'.format(wins[i, j], losses[i, j], ties[i, j])
+                  for a, b, i, j in pairs}, latex)
+    print('')
+    print_matrix('geometric mean ratio row / column', algo_order,
+                 {(a, b): '-' if a == b else format_ratio(ratio[i, j]) for a, b, i, j in pairs}, latex)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("json_file", help=".json files (or glob patterns) containing the lab data", nargs='+')
+    parser.add_argument("--attribute", "-a", help="attribute to compare", default="max_abstraction_states")
+    parser.add_argument("--stat", "-s", help="statistic of the runs of an algorithm on a problem (random "
+                                             "experiments), e.g. mean median max", default='mean')
+    parser.add_argument("--higher-better", help="higher values of the attribute are better (default: lower)",
+                        dest='higher_better', action='store_true')
+    parser.add_argument("--tolerance", help="relative difference up to which two values are a tie", type=float,
+                        default=0.0)
+    parser.add_argument("--unsolvable-only", "-u", help="only count the unsolvable instances", dest='unsolvable_only',
+                        action='store_true')
+    parser.add_argument('--order', '-o', help='space separated string, the order of the algorithms', type=str)
+    parser.add_argument("--format", help="output format", choices=['text', 'latex', 'csv'], default='text',
+                        dest='output_format')
+    parser.set_defaults(higher_better=False, unsolvable_only=False)
+    add_loader_arguments(parser)
+    add_suite_arguments(parser)
+    args = parser.parse_args()
+
+    if not is_supported(args.stat) or args.stat.startswith('ci'):
+        print('Error: unsupported statistic ' + args.stat)
+        exit(1)
+    data, problems = read_json_file(args.json_file, False, args.unsolvable_only, get_suite_option(args),
+                                    attributes=[args.attribute], **get_loader_options(args))
+    problems, algos, values = build_matrix(data, args.attribute, args.stat)
+    if len(algos) == 0:
+        print('Error: no run found')
+        exit(1)
+    algo_order = get_order(algos, None if args.order is None else args.order.split(' '))
+    wins, losses, ties, common = get_win_matrices(values, args.higher_better, args.tolerance)
+    print_report(algos, wins, losses, ties, common, get_ratio_matrix(values), algo_order, args.output_format)
+
+
+if __name__ == '__main__':
+    main()
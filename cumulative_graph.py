@@ -1,15 +1,17 @@
 import json
 import re
 import os
-import matplotlib.pyplot as plt
 import argparse
 
-from matplotlib.legend_handler import HandlerLine2D
-from matplotlib.font_manager import FontProperties
-from common import read_json_file
+from common import read_json_file, add_loader_arguments, get_loader_options
+from render import GraphTemplate, RenderJob, add_render_arguments, get_render_processes, render_graphs, report_failures
+from suites import add_suite_arguments, get_suite_option
 
 
 def create_cumulative_graph(grouped_data, OUTDIR, ATTR):
+    import matplotlib.pyplot as plt
+    from matplotlib.font_manager import FontProperties
+    from matplotlib.legend_handler import HandlerLine2D
     print('Processing data ...')
 
     # processing data
@@ -64,9 +66,9 @@ def create_cumulative_graph(grouped_data, OUTDIR, ATTR):
                     subplt.plot(x, y, label=algo)
                 if len(str(x[0])) > 5:
                     plt.setp(subplt.get_xticklabels(), rotation=30, horizontalalignment='right')
-                subplt.grid(b=True, which='major', color='gray', linestyle='-')
+                subplt.grid(True, which='major', color='gray', linestyle='-')
                 subplt.minorticks_on()
-                subplt.grid(b=True, which='minor', color='gray')
+                subplt.grid(True, which='minor', color='gray')
                 subplt.get_xaxis().get_major_formatter().set_useOffset(False)
                 subplt.get_xaxis().get_major_formatter().set_scientific(False)
                 subplt.margins(0.05)
@@ -130,42 +132,106 @@ def create_dirs_if_necessary(graph_data, OUTDIR):
             os.makedirs(OUTDIR + '/' + domain)
 
 
-def create_cumulative_graph_from_plot_data(graph_data, OUTDIR, ATTR, xlog_scale):
-    print('Creating graphs ...')
-
-    # plotting
+def render_cumulative_graph(path, algos, ATTR, xlog_scale):
+    """
+    Renders the cumulative graph of a problem, algos is dict[algo] = {'x': [...], 'y': [...]}
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.font_manager import FontProperties
+    from matplotlib.legend_handler import HandlerLine2D
     fontP = FontProperties()
     fontP.set_size('small')
 
-    for domain, problems in graph_data.items():
-        for problem, algos in problems.items():
-            fig = plt.figure()
-            subplt = fig.add_subplot(111)
-            subplt.set_xlabel(ATTR)
-            subplt.set_ylabel('Cumulative count')
-            for algo, xy_data in algos.items():
-                if algo == 'base_unsat':
-                    subplt.plot(xy_data['x'], xy_data['y'], label=algo, linestyle='--', linewidth=2)
-                else:
-                    subplt.plot(xy_data['x'], xy_data['y'], label=algo)
-                subplt.grid(b=True, which='major', color='gray', linestyle='-')
-                subplt.minorticks_on()
-                subplt.grid(b=True, which='minor', color='gray')
-                subplt.margins(0.05)
-                if xlog_scale:
-                    subplt.set_xscale('log')
-                else:
-                    subplt.set_xscale('linear')
-                    subplt.get_xaxis().get_major_formatter().set_useOffset(False)
-                    subplt.get_xaxis().get_major_formatter().set_scientific(False)
-                    if len(str(xy_data['x'][0])) > 5:
-                        plt.setp(subplt.get_xticklabels(), rotation=30, horizontalalignment='right')
-                subplt.margins(0.05)
-            plt.legend(handler_map={subplt: HandlerLine2D(numpoints=1)}, prop=fontP, loc='upper left')
-            plt.savefig(OUTDIR + '/' + domain + '/' + problem + '.png')
-            plt.close()
-            print('Created graph for ' + domain + ' ' + problem)
-    return
+    fig = plt.figure()
+    subplt = fig.add_subplot(111)
+    subplt.set_xlabel(ATTR)
+    subplt.set_ylabel('Cumulative count')
+    for algo, xy_data in algos.items():
+        if algo == 'base_unsat':
+            subplt.plot(xy_data['x'], xy_data['y'], label=algo, linestyle='--', linewidth=2)
+        else:
+            subplt.plot(xy_data['x'], xy_data['y'], label=algo)
+        subplt.grid(True, which='major', color='gray', linestyle='-')
+        subplt.minorticks_on()
+        subplt.grid(True, which='minor', color='gray')
+        subplt.margins(0.05)
+        if xlog_scale:
+            subplt.set_xscale('log')
+        else:
+            subplt.set_xscale('linear')
+            subplt.get_xaxis().get_major_formatter().set_useOffset(False)
+            subplt.get_xaxis().get_major_formatter().set_scientific(False)
+            if len(str(xy_data['x'][0])) > 5:
+                plt.setp(subplt.get_xticklabels(), rotation=30, horizontalalignment='right')
+        subplt.margins(0.05)
+    plt.legend(handler_map={subplt: HandlerLine2D(numpoints=1)}, prop=fontP, loc='upper left')
+    plt.savefig(path)
+    plt.close()
+
+
+class CumulativeGraphTemplate(GraphTemplate):
+    """
+    Batch version of render_cumulative_graph, the lines of the previous graph are updated with the new data
+    """
+    def __init__(self, ATTR, xlog_scale):
+        from matplotlib.font_manager import FontProperties
+        super().__init__()
+        self.fontP = FontProperties()
+        self.fontP.set_size('small')
+        self.xlog_scale = xlog_scale
+        self.lines = []
+        subplt = self.subplt
+        subplt.set_xlabel(ATTR)
+        subplt.set_ylabel('Cumulative count')
+        subplt.grid(True, which='major', color='gray', linestyle='-')
+        subplt.minorticks_on()
+        subplt.grid(True, which='minor', color='gray')
+        subplt.margins(0.05)
+        if xlog_scale:
+            subplt.set_xscale('log')
+        else:
+            subplt.set_xscale('linear')
+            subplt.get_xaxis().get_major_formatter().set_useOffset(False)
+            subplt.get_xaxis().get_major_formatter().set_scientific(False)
+
+    def draw(self, path, algos):
+        import matplotlib.pyplot as plt
+        from matplotlib.legend_handler import HandlerLine2D
+        lines = self.update_lines(self.lines, len(algos))
+        for i, (line, (algo, xy_data)) in enumerate(zip(lines, algos.items())):
+            line.set_data(xy_data['x'], xy_data['y'])
+            line.set_label(algo)
+            # the colors of a new figure
+            line.set_color('C' + str(i % 10))
+            if algo == 'base_unsat':
+                line.set_linestyle('--')
+                line.set_linewidth(2)
+            else:
+                line.set_linestyle('-')
+                line.set_linewidth(plt.rcParams['lines.linewidth'])
+        self.rescale()
+        if not self.xlog_scale:
+            rotate = any(len(str(xy_data['x'][0])) > 5 for xy_data in algos.values())
+            plt.setp(self.subplt.get_xticklabels(), rotation=30 if rotate else 0,
+                     horizontalalignment='right' if rotate else 'center')
+        self.subplt.legend(handler_map={self.subplt: HandlerLine2D(numpoints=1)}, prop=self.fontP, loc='upper left')
+        self.fig.savefig(path)
+
+
+def create_cumulative_graph_from_plot_data(graph_data, OUTDIR, ATTR, xlog_scale, processes=1, batch=False,
+                                           output_mode='png', force=False):
+    """
+    Renders OUTDIR/domain/problem.png (or the pages of PDF files, see render.render_graphs) for every problem of
+    graph_data with processes worker processes, reusing one figure per process if batch. The graphs that did not
+    change since the last run are skipped unless force. Returns the failed graphs (see render.render_jobs).
+    """
+    print('Creating graphs ...')
+    template = (CumulativeGraphTemplate, (ATTR, xlog_scale)) if batch else None
+    jobs = (RenderJob(OUTDIR + '/' + domain + '/' + problem + '.png', render_cumulative_graph,
+                      (graph_data[domain][problem], ATTR, xlog_scale) if template is None
+                      else (graph_data[domain][problem],), domain + ' ' + problem, template)
+            for domain in sorted(graph_data.keys()) for problem in sorted(graph_data[domain].keys()))
+    return render_graphs(jobs, OUTDIR, output_mode, processes, force)
 
 
 def check_attribute_exists(grouped_data, attr):
@@ -219,7 +285,7 @@ def print_plot_data(graph_data, algo_order):
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("json_file", help=".json file containing the lab data")
+    parser.add_argument("json_file", help=".json files (or glob patterns) containing the lab data", nargs='+')
     parser.add_argument("--outfolder", "-o", help="output folder", default="output")
     parser.add_argument("--attribute", "-a", help="attribute to use", default="max_abstraction_states")
     parser.add_argument("--unsolvable-only", "-u", help="only count the unsolvable instances", dest='unsolvable_only',
@@ -233,16 +299,23 @@ def main():
                         help='space separated string, the order of the algorithm column shown in the table',
                         type=str)
     parser.set_defaults(log=False, unsolvable_only=False, latex=False)
+    add_loader_arguments(parser)
+    add_suite_arguments(parser)
+    add_render_arguments(parser)
     args = parser.parse_args()
     if args.order is not None:
         args.order = args.order.split(' ')
 
-    data, problems = read_json_file(args.json_file, args.filter, args.unsolvable_only)
+    data, problems = read_json_file(args.json_file, args.filter, args.unsolvable_only, get_suite_option(args),
+                                    attributes=[args.attribute], **get_loader_options(args))
     if check_attribute_exists(data, args.attribute):
         data, max_y = get_cumulative_data_per_problem(data, args.attribute)
         data = get_plot_data_from_cumu(data, max_y)
-        create_dirs_if_necessary(data, args.outfolder)
-        create_cumulative_graph_from_plot_data(data, args.outfolder, args.attribute, args.log)
+        if args.output_mode == 'png':
+            create_dirs_if_necessary(data, args.outfolder)
+        report_failures(create_cumulative_graph_from_plot_data(data, args.outfolder, args.attribute, args.log,
+                                                               get_render_processes(args), args.batch,
+                                                               args.output_mode, args.force))
         if args.latex:
             print_plot_data(data, args.order)
 
@@ -1,15 +1,18 @@
+import bisect
 import json
 import re
 import os
-import matplotlib.pyplot as plt
 import argparse
 
-from matplotlib.legend_handler import HandlerLine2D
-from matplotlib.font_manager import FontProperties
-from common import read_json_file
+from common import read_json_file, add_loader_arguments, get_loader_options
+from sketch import KLLSketch, read_sketches
+from suites import add_suite_arguments, get_suite_option
 
 
 def create_cumulative_graph(grouped_data, OUTDIR, ATTR):
+    import matplotlib.pyplot as plt
+    from matplotlib.font_manager import FontProperties
+    from matplotlib.legend_handler import HandlerLine2D
     print('Processing data ...')
 
     # processing data
@@ -62,9 +65,9 @@ def create_cumulative_graph(grouped_data, OUTDIR, ATTR):
                     subplt.plot(x, y, label=algo)
                 if len(str(x[0])) > 5:
                     plt.setp(subplt.get_xticklabels(), rotation=30, horizontalalignment='right')
-                subplt.grid(b=True, which='major', color='gray', linestyle='-')
+                subplt.grid(True, which='major', color='gray', linestyle='-')
                 subplt.minorticks_on()
-                subplt.grid(b=True, which='minor', color='gray')
+                subplt.grid(True, which='minor', color='gray')
                 subplt.get_xaxis().get_major_formatter().set_useOffset(False)
                 subplt.get_xaxis().get_major_formatter().set_scientific(False)
                 subplt.margins(0.05)
@@ -109,6 +112,50 @@ def get_cumulative_data_per_algo(grouped_data, ATTR):
     return cumu_data, max_y
 
 
+def get_cumulative_data_from_sketches(sketches):
+    """
+    Same as get_cumulative_data_per_algo, from dict[algo] = sketch.KLLSketch of the attribute
+    """
+    max_y = 0
+    cumu_data = {}
+    for algo, sketch in sketches.items():
+        if sketch.count > 0:
+            x, y = sketch.cumulative()
+            cumu_data[algo] = {'x': x, 'y': y}
+            max_y = max(sketch.count + 1, max_y)
+    return cumu_data, max_y
+
+
+def get_sketches_per_algo(grouped_data, ATTR, error):
+    sketches = {}
+    for domain, problems in grouped_data.items():
+        for problem, algos in problems.items():
+            for algo, val_list in algos.items():
+                if algo not in sketches:
+                    sketches[algo] = KLLSketch.from_error(error)
+                sketches[algo].update_many([val[ATTR] for val in val_list if val.get(ATTR) is not None])
+    return sketches
+
+
+def print_percentiles(cumu_data, percentiles, algo_order):
+    """
+    Prints the percentiles of every algo, read from its cumulative data
+    """
+    if algo_order is None:
+        algo_order = sorted(cumu_data.keys())
+    print('{:<25}'.format('algo') + ''.join(('p' + '{:g}'.format(p)).rjust(15) for p in percentiles))
+    for algo in algo_order:
+        if algo not in cumu_data:
+            continue
+        x = cumu_data[algo]['x']
+        y = cumu_data[algo]['y']
+        s = '{:<25}'.format(algo[:25])
+        for p in percentiles:
+            pos = min(bisect.bisect_left(y, p / 100.0 * y[-1]), len(x) - 1)
+            s += ('{:.2f}'.format(x[pos]) if isinstance(x[pos], float) else str(x[pos])).rjust(15)
+        print(s)
+
+
 def get_plot_data_from_cumu(cumu_data, max_y):
     graph_data = {}
     for algo, xy_data in cumu_data.items():
@@ -127,6 +174,9 @@ def create_dirs_if_necessary(graph_data, OUTDIR):
 
 
 def create_cumulative_graph_from_plot_data(graph_data, OUTDIR, ATTR, xlog_scale):
+    import matplotlib.pyplot as plt
+    from matplotlib.font_manager import FontProperties
+    from matplotlib.legend_handler import HandlerLine2D
     print('Creating graphs ...')
 
     # plotting
@@ -142,9 +192,9 @@ def create_cumulative_graph_from_plot_data(graph_data, OUTDIR, ATTR, xlog_scale)
             subplt.plot(xy_data['x'], xy_data['y'], label=algo, linestyle='--', linewidth=2)
         else:
             subplt.plot(xy_data['x'], xy_data['y'], label=algo)
-        subplt.grid(b=True, which='major', color='gray', linestyle='-')
+        subplt.grid(True, which='major', color='gray', linestyle='-')
         subplt.minorticks_on()
-        subplt.grid(b=True, which='minor', color='gray')
+        subplt.grid(True, which='minor', color='gray')
         subplt.margins(0.05)
         if xlog_scale:
             subplt.set_xscale('log')
@@ -207,7 +257,7 @@ def print_plot_data(graph_data, algo_order):
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("json_file", help=".json file containing the lab data")
+    parser.add_argument("json_file", help=".json files (or glob patterns) containing the lab data", nargs='+')
     parser.add_argument("--outfolder", "-o", help="output folder", default="output")
     parser.add_argument("--attribute", "-a", help="attribute to use", default="max_abstraction_states")
     parser.add_argument("--unsolvable-only", "-u", help="only count the unsolvable instances", dest='unsolvable_only',
@@ -220,18 +270,43 @@ def main():
     parser.add_argument('--order', '-ord',
                         help='space separated string, the order of the algorithm column shown in the table',
                         type=str)
+    parser.add_argument("--sketch-error", help="approximate the distributions with quantile sketches of this rank "
+                                               "error (e.g. 0.001), in bounded memory. without --filter and "
+                                               "--suite, the runs are not grouped and can be streamed", type=float,
+                        dest='sketch_error')
+    parser.add_argument("--percentiles", "-pc", help="print these percentiles of every algo, e.g. 50 90 99",
+                        type=float, nargs='+')
     parser.set_defaults(log=False, unsolvable_only=False, latex=False)
+    add_loader_arguments(parser)
+    add_suite_arguments(parser)
     args = parser.parse_args()
     if args.order is not None:
         args.order = args.order.split(' ')
 
-    data, problems = read_json_file(args.json_file, args.filter, args.unsolvable_only)
-    if check_attribute_exists(data, args.attribute):
-        data, max_y = get_cumulative_data_per_algo(data, args.attribute)
-        data = get_plot_data_from_cumu(data, max_y)
-        create_cumulative_graph_from_plot_data(data, args.outfolder, args.attribute, args.log)
-        if args.latex:
-            print_plot_data(data, args.order)
+    suite = get_suite_option(args)
+    if args.sketch_error is not None and not args.filter and suite is None:
+        sketches = read_sketches(args.json_file, args.attribute, args.unsolvable_only, args.sketch_error,
+                                 **get_loader_options(args))
+        if len(sketches) == 0:
+            print('Attribute ' + args.attribute + ' doesn\'t exists.')
+            return
+        cumu_data, max_y = get_cumulative_data_from_sketches(sketches)
+    else:
+        data, problems = read_json_file(args.json_file, args.filter, args.unsolvable_only, suite,
+                                        attributes=[args.attribute], **get_loader_options(args))
+        if not check_attribute_exists(data, args.attribute):
+            return
+        if args.sketch_error is not None:
+            cumu_data, max_y = get_cumulative_data_from_sketches(
+                get_sketches_per_algo(data, args.attribute, args.sketch_error))
+        else:
+            cumu_data, max_y = get_cumulative_data_per_algo(data, args.attribute)
+    if args.percentiles is not None:
+        print_percentiles(cumu_data, args.percentiles, args.order)
+    data = get_plot_data_from_cumu(cumu_data, max_y)
+    create_cumulative_graph_from_plot_data(data, args.outfolder, args.attribute, args.log)
+    if args.latex:
+        print_plot_data(data, args.order)
 
 
 if __name__ == '__main__':
@@ -1,7 +1,9 @@
-import json
-
 from enum import Enum
 
+import numpy as np
+
+from common import read_run_table
+
 
 class DataType(Enum):
     ALGO = 'algo'
@@ -10,92 +12,207 @@ class DataType(Enum):
     ATTRIBUTE = 'attr'
 
 
-class Data:
-    def __init__(self, data={}, grouping_rule=[], algo_counter={}, domain_counter={}, problem_counter={},
-                 attr_counter={}):
-        self._data = data
-        self._counters = {
-            DataType.ALGO: algo_counter,
-            DataType.DOMAIN: domain_counter,
-            DataType.ATTRIBUTE: attr_counter,
-            DataType.PROBLEM: problem_counter
+class SparseIndex:
+    """
+    Coordinate format index of every value of a columns.RunTable, built once per table.
+    Every (algo, domain, problem, attribute) coordinate is encoded as one linear int64 key. keys is sorted and
+    rows[i] is the run holding the value of keys[i], so a value is found with a binary search and the entries
+    sharing a leading coordinate (in the order of AXES) form a contiguous slice.
+    """
+    AXES = [DataType.ALGO, DataType.DOMAIN, DataType.PROBLEM, DataType.ATTRIBUTE]
+
+    def __init__(self, table):
+        self.table = table
+        problem_count = max(len(table.problems), 1)
+        pairs = table.domain_ids.astype(np.int64) * problem_count + table.problem_ids
+        unique_pairs, problem_codes = np.unique(pairs, return_inverse=True)
+        problem_names = [table.domains[pair // problem_count] + '-' + table.problems[pair % problem_count]
+                         for pair in unique_pairs.tolist()]
+        self.names = {
+            DataType.ALGO: list(table.algos),
+            DataType.DOMAIN: list(table.domains),
+            DataType.PROBLEM: problem_names,
+            DataType.ATTRIBUTE: ['id'] + list(table.columns.keys())
         }
+        self.codes = {}
+        for data_type, names in self.names.items():
+            self.codes[data_type] = {name: code for code, name in enumerate(names)}
+
+        self.strides = {}
+        stride = 1
+        for data_type in reversed(SparseIndex.AXES):
+            self.strides[data_type] = stride
+            stride *= max(len(self.names[data_type]), 1)
+
+        run_keys = (table.algo_ids.astype(np.int64) * self.strides[DataType.ALGO] +
+                    table.domain_ids.astype(np.int64) * self.strides[DataType.DOMAIN] +
+                    problem_codes.astype(np.int64) * self.strides[DataType.PROBLEM])
+        keys = []
+        rows = []
+        for attr_code, attr in enumerate(self.names[DataType.ATTRIBUTE]):
+            if attr == 'id':
+                attr_rows = np.arange(len(table), dtype=np.int32)
+            else:
+                attr_rows = np.flatnonzero(table.columns[attr].present).astype(np.int32)
+            keys.append(run_keys[attr_rows] + attr_code)
+            rows.append(attr_rows)
+        keys = np.concatenate(keys) if len(keys) > 0 else np.zeros(0, dtype=np.int64)
+        rows = np.concatenate(rows) if len(rows) > 0 else np.zeros(0, dtype=np.int32)
+        # stable, so that the last of several runs with the same coordinate stays last
+        order = np.argsort(keys, kind='stable')
+        self.keys = keys[order]
+        self.rows = rows[order]
+
+    def coordinates(self, data_type, keys):
+        return (keys // self.strides[data_type]) % max(len(self.names[data_type]), 1)
+
+    def get_value(self, attr, row):
+        table = self.table
+        if attr == 'id':
+            return [table.algos[table.algo_ids[row]], table.domains[table.domain_ids[row]],
+                    table.problems[table.problem_ids[row]]]
+        column = table.columns[attr]
+        if column.null[row]:
+            return None
+        return column.values[row:row + 1].tolist()[0]
+
+    def lookup(self, fixed):
+        """
+        Returns the value at the coordinate fixed (dict[data_type] = code for all four axes)
+        """
+        key = 0
+        for data_type, code in fixed.items():
+            key += code * self.strides[data_type]
+        # the last of several runs with the same coordinate wins
+        pos = np.searchsorted(self.keys, key, side='right') - 1
+        if pos < 0 or self.keys[pos] != key:
+            raise KeyError(key)
+        return self.get_value(self.names[DataType.ATTRIBUTE][fixed[DataType.ATTRIBUTE]], self.rows[pos])
+
+    def match(self, fixed):
+        """
+        Returns the keys of the entries matching the partial coordinate fixed (dict[data_type] = code)
+        """
+        # the fixed leading axes select a contiguous slice of the sorted keys
+        low = 0
+        span = self.strides[DataType.ALGO] * max(len(self.names[DataType.ALGO]), 1)
+        prefix = 0
+        for data_type in SparseIndex.AXES:
+            if data_type not in fixed:
+                break
+            span = self.strides[data_type]
+            low += fixed[data_type] * span
+            prefix += 1
+        start, end = np.searchsorted(self.keys, [low, low + span])
+        keys = self.keys[start:end]
+        for data_type in SparseIndex.AXES[prefix:]:
+            if data_type in fixed:
+                keys = keys[self.coordinates(data_type, keys) == fixed[data_type]]
+        return keys
+
+
+class Data:
+    """
+    Run data backed by the typed columns of a columns.RunTable and a SparseIndex over them.
+    A grouped Data is a lazy view: it only stores the grouping rule and the coordinates fixed by indexing so far,
+    so regrouping or indexing never copies or rebuilds anything. Indexing a view with all four axes fixed
+    returns the value itself. A coordinate without any entry under the coordinates fixed so far raises a KeyError,
+    on every axis.
+    """
+    def __init__(self, table, grouping_rule=[], index=None, fixed={}):
+        self._table = table
         self._grouping_rule = grouping_rule
+        self._index = index
+        self._fixed = fixed
+        self._run_index = None
+
+    def _get_index(self):
+        if self._index is None:
+            self._index = SparseIndex(self._table)
+        return self._index
+
+    def _get_run_index(self):
+        if self._run_index is None:
+            self._run_index = {k: row for row, k in enumerate(self._table.keys.tolist())}
+        return self._run_index
+
+    def _get_run(self, key):
+        row = self._get_run_index()[key]
+        index = self._get_index()
+        run = {'id': index.get_value('id', row)}
+        for attr, column in self._table.columns.items():
+            if column.present[row]:
+                run[attr] = index.get_value(attr, row)
+        return run
 
     def __getitem__(self, item):
-        return self._data[item]
+        if len(self._grouping_rule) == 0:
+            return self._get_run(item)
+        index = self._get_index()
+        data_type = self._grouping_rule[len(self._fixed)]
+        if item not in index.codes[data_type]:
+            raise KeyError(item)
+        fixed = dict(self._fixed)
+        fixed[data_type] = index.codes[data_type][item]
+        if len(fixed) == len(self._grouping_rule):
+            try:
+                return index.lookup(fixed)
+            except KeyError:
+                raise KeyError(item)
+        # a partial coordinate without any entry is missing, as a key of the nested dicts was
+        if len(index.match(fixed)) == 0:
+            raise KeyError(item)
+        return Data(self._table, self._grouping_rule, index, fixed)
 
-    def group_data(self, grouping_rule=[]):
+    def keys(self):
+        if len(self._grouping_rule) == 0:
+            return self._table.keys.tolist()
+        index = self._get_index()
+        data_type = self._grouping_rule[len(self._fixed)]
+        used = np.unique(index.coordinates(data_type, index.match(self._fixed)))
+        return [index.names[data_type][code] for code in used.tolist()]
 
-        def initialize_group_id(grouping, parent_data, algo_, dom_, prob_, attr_):
-            if grouping == DataType.ALGO:
-                if algo_ not in parent_data:
-                    parent_data[algo_] = {}
-                return algo_
-            if grouping == DataType.DOMAIN:
-                if dom_ not in parent_data:
-                    parent_data[dom_] = {}
-                return dom_
-            if grouping == DataType.PROBLEM :
-                if prob_ not in parent_data:
-                    parent_data[prob_] = {}
-                return prob_
-            if grouping == DataType.ATTRIBUTE :
-                if attr_ not in parent_data:
-                    parent_data[attr_] = {}
-                return attr_
-
-        if len(self._grouping_rule) > 0:
-            print("Error: data has been grouped before")
+    def items(self):
+        for key in self.keys():
+            yield key, self[key]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __contains__(self, item):
+        if len(self._grouping_rule) == 0:
+            return item in self._get_run_index()
+        index = self._get_index()
+        data_type = self._grouping_rule[len(self._fixed)]
+        if item not in index.codes[data_type]:
+            return False
+        fixed = dict(self._fixed)
+        fixed[data_type] = index.codes[data_type][item]
+        return len(index.match(fixed)) > 0
+
+    def group_data(self, grouping_rule=[]):
+        """
+        Returns a view of the data grouped by grouping_rule. Regrouping only permutes the axes of the view,
+        the index is shared by every grouping of the same data.
+        """
+        if len(self._fixed) > 0:
+            print("Error: a part of grouped data can not be grouped again")
             exit(1)
 
         if len(grouping_rule) == 0:
             grouping_rule = [DataType.ALGO, DataType.DOMAIN, DataType.PROBLEM, DataType.ATTRIBUTE]
-        if len(grouping_rule) != 4:
-            print("Error: length of grouping rule has to be 4")
+        if len(grouping_rule) != 4 or len(set(grouping_rule)) != 4:
+            print("Error: grouping rule has to be a permutation of the 4 data types")
             exit(1)
 
-        data = self._data
-        grouped_data = {}
-        algorithm_counter = {}
-        domain_counter = {}
-        problem_counter = {}
-        attr_counter = {}
-        for idx, run in data.items():
-            algo = run['id'][0]
-            dom = run['id'][1]
-            prob = run['id'][1] + '-' + run['id'][2]
-            if algo not in algorithm_counter:
-                algorithm_counter[algo] = 0
-            if dom not in domain_counter:
-                domain_counter[dom] = 0
-            if prob not in problem_counter:
-                problem_counter[prob] = 0
-            algorithm_counter[algo] += 1
-            domain_counter[dom] += 1
-            problem_counter[prob] += 1
-            for attr, val in run.items():
-                lvl = [''] * len(grouping_rule)
-                for i in range(len(grouping_rule)):
-                    parent = grouped_data
-                    for j in range(i):
-                        parent = parent[lvl[j]]
-                    lvl[i] = initialize_group_id(grouping_rule[i], parent, algo, dom, prob, attr)
-                parent = grouped_data
-                for i in range(len(grouping_rule) - 1):
-                    parent = parent[lvl[i]]
-                parent[lvl[len(grouping_rule) - 1]] = val
-                if attr not in attr_counter:
-                    attr_counter[attr] = 0
-                attr_counter[attr] += 1
-
-        return Data(grouped_data, grouping_rule, algorithm_counter, domain_counter, problem_counter, attr_counter)
+        return Data(self._table, grouping_rule, self._get_index())
 
     def has(self, data_type, value):
-        return value in self._counters[data_type]
+        return value in self._get_index().codes[data_type]
 
     @staticmethod
-    def from_file(json_file):
-        with open(json_file) as data_file:
-            data = json.load(data_file)
-        return Data(data)
+    def from_file(json_files, stream=False, cache=False, attributes=None, jobs=1, on_duplicate='first'):
+        return Data(read_run_table(json_files, stream, cache, attributes, jobs, on_duplicate))
@@ -1,17 +1,19 @@
-import json
 import os
 import argparse
 
+from common import read_runs, add_loader_arguments, get_loader_options
+from universe import AlgoProblemSets, filter_problems
 
-def read_json_simple(json_file, unsolvable_only, exclude=[]):
+
+def read_json_simple(json_file, unsolvable_only, exclude=[], stream=False, cache=False, attributes=None,
+                     jobs=1, on_duplicate='first'):
     # print('Reading file ...')
-    with open(json_file) as data_file:
-        data = json.load(data_file)
     # print('Grouping data ...')
     excluded = 0
     grouped_data = {}
     existing_problems = {}
-    for idx, val in data.items():
+    problem_sets = AlgoProblemSets()
+    for idx, val in read_runs(json_file, stream, cache, attributes, jobs, on_duplicate):
         if unsolvable_only and val['unsolvable'] == 0:
             continue
         if val['id'][1] not in grouped_data:
@@ -22,6 +24,7 @@ def read_json_simple(json_file, unsolvable_only, exclude=[]):
             grouped_data[val['id'][1]][val['id'][2]] = {}
         if val['id'][0] not in exclude:
             grouped_data[val['id'][1]][val['id'][2]][val['id'][0]] = val
+            problem_sets.add(val['id'][0], val['id'][1], val['id'][2])
         else:
             excluded += 1
 
@@ -29,44 +32,7 @@ def read_json_simple(json_file, unsolvable_only, exclude=[]):
         print('Warning: no data excluded for exclude=', str(exclude))
 
     # print('Filtering intersection only data ...')
-
-    counter = {}
-    max_counter = 0
-    for domain, problems in grouped_data.items():
-        counter[domain] = {}
-        for problem, algos in problems.items():
-            counter[domain][problem] = len(algos)
-            max_counter = max(len(algos), max_counter)
-    to_del = []
-    for domain, problems in grouped_data.items():
-        for problem, algos in problems.items():
-            if counter[domain][problem] < max_counter:
-                to_del.append((domain, problem))
-    for domain, problem in to_del:
-        del grouped_data[domain][problem]
-    to_del = []
-    for domain, problems in grouped_data.items():
-        if len(grouped_data[domain]) == 0:
-            to_del.append(domain)
-    for domain in to_del:
-        del grouped_data[domain]
-
-    # filtering unused instances
-
-    domain_to_del = []
-    for domain, problems in grouped_data.items():
-        prob_to_del = []
-        for problem, algos in problems.items():
-            if len(algos) == 0:
-                prob_to_del.append(problem)
-        for p in prob_to_del:
-            del problems[p]
-            existing_problems[domain].remove(p)
-        if len(problems) == 0:
-            domain_to_del.append(domain)
-    for d in domain_to_del:
-        del grouped_data[d]
-        del existing_problems[d]
+    filter_problems(grouped_data, existing_problems, problem_sets.universe, problem_sets.most_present())
 
     return grouped_data, existing_problems
 
@@ -148,16 +114,18 @@ def check_algorithm_exists(grouped_data, alg):
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("json_file", help=".json file containing the lab data")
+    parser.add_argument("json_file", help=".json files (or glob patterns) containing the lab data", nargs='+')
     parser.add_argument("--attribute", "-a", help="attribute to use", default="max_abstraction_states")
     parser.add_argument("--unsolvable-only", "-u", help="only count the unsolvable instances", dest='unsolvable_only',
                         action='store_true')
     parser.add_argument("--max", '-m', help="maximum default value if it is fail", default='0')
     parser.add_argument("--algos", help="histogram range (int)", nargs='+')
     parser.set_defaults(unsolvable_only=False)
+    add_loader_arguments(parser)
     args = parser.parse_args()
 
-    data, problems = read_json_simple(args.json_file, args.unsolvable_only)
+    data, problems = read_json_simple(args.json_file, args.unsolvable_only, attributes=[args.attribute, 'unsolvable'],
+                                      **get_loader_options(args))
     if check_attribute_exists(data, args.attribute):
         for alg in args.algos:
             if not check_algorithm_exists(data, alg):
@@ -8,18 +8,18 @@ the id is split by separator
 
 """
 import argparse
-import json
 
+from common import read_runs, add_loader_arguments, get_loader_options
 
-def read_json_simple(json_file, exclude=[]):
+
+def read_json_simple(json_file, exclude=[], stream=False, cache=False, attributes=None,
+                     jobs=1, on_duplicate='first'):
     print('Reading file ...')
-    with open(json_file) as data_file:
-        data = json.load(data_file)
     print('Grouping data ...')
     excluded = 0
     grouped_data = {}
     existing_problems = {}
-    for idx, val in data.items():
+    for idx, val in read_runs(json_file, stream, cache, attributes, jobs, on_duplicate):
         if val['id'][1] not in grouped_data:
             existing_problems[val['id'][1]] = set()
             grouped_data[val['id'][1]] = {}
@@ -126,13 +126,14 @@ def print_data(all_data, order, separator, index):
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("input_file", help="file or folder containing the log data")
+    parser.add_argument("input_file", help="files (or glob patterns) containing the lab data", nargs='+')
     parser.add_argument("--col_split", help="substring algorithm name splitter", default='-')
     parser.add_argument("--col_split_id", help="index of split algorithm name used for id", default=0, type=int)
     parser.add_argument("--col_split_cast", help="cast for the column id", default='str')
     parser.add_argument("--attr", help="attribute to show", default='unsolvable')
     parser.add_argument("--col_order", help="the order of (algorithm) columns (comma separated)")
     parser.add_argument('--exclude', '-e', help='excluded algorithms (comma separated)')
+    add_loader_arguments(parser)
     args = parser.parse_args()
 
     if args.exclude is None:
@@ -150,7 +151,8 @@ def main():
         print('Unknown type for casting column id')
         exit(1)
 
-    data, problems = read_json_simple(args.input_file, exclude=args.exclude)
+    data, problems = read_json_simple(args.input_file, exclude=args.exclude, attributes=[args.attr],
+                                      **get_loader_options(args))
     algo_order = algo_order_by_sub_name(data, args.col_split, args.col_split_id, known_types[args.col_split_cast],
                                         args.col_order)
     table_data = get_table_detail_per_domain(data, args.attr, problems)
@@ -1,113 +1,98 @@
 import argparse
-import json
 
+from common import read_run_table, add_loader_arguments, get_loader_options
+from query import NamePredicate, build_plan, parse
+from query_server import send_query
 
-def read_json_file(json_file, attr, unsolvable_only, domain, problem, algo, query):
+
+def query_table(table, attr, unsolvable_only, domain, problem, algo, query):
     """
-    Returns a dictionary in the following format: dict[domain][problem][algo] = [list of experiment data]
-    the algo must have format "algo_name%d" where %d is an integer representing run_id for this algorithm
+    Returns dict[run_key] = value of attr for the runs of the columns.RunTable table passing the filters and
+    the parsed query (or None). The filters and the query are evaluated as a single query.And plan.
     """
-    print('Reading file ...')
-    with open(json_file) as data_file:
-        data = json.load(data_file)
-
-    print('Querying ...')
+    plan = build_plan(query, unsolvable_only, domain, problem, algo)
+    rows = plan.select(table)
+    if len(rows) == 0:
+        if unsolvable_only and len(build_plan(None, True).select(table)) == 0:
+            print('No unsolvable data found')
+        for child in plan.children:
+            if isinstance(child, NamePredicate) and not child.matches_any(table):
+                print(child, 'not found')
+
+    if attr not in table.columns:
+        print('Attribute', attr, 'not found')
+        return {}
+    column = table.columns[attr]
+    rows = rows[column.present[rows]]
+    keys = table.keys[rows].tolist()
+    values = column.values[rows].tolist()
+    nulls = column.null[rows].tolist()
     q_data = {}
-
-    passed_count = [0, 0, 0, 0]
-    for idx, val in data.items():
-        if unsolvable_only and not val['unsolvable']:
-            continue
-        passed_count[0] += 1
-        if algo is not None and not val['id'][0].startswith(algo):
-            continue
-        passed_count[1] += 1
-        if domain is not None and not val['id'][1] == domain:
-            continue
-        passed_count[2] += 1
-        if problem is not None and not val['id'][2] == problem:
-            continue
-        passed_count[3] += 1
-        passed = True
-        for qattr, comparator, qval in query:
-            if qattr in val:
-                if not comparator(val[qattr], qval):
-                    passed = False
-                    break
-        if passed:
-            q_data[idx] = val[attr]
-    if passed_count[0] == 0:
-        print('No unsolvable data found')
-    elif passed_count[1] == 0:
-        print('algo', algo, 'not found')
-    elif passed_count[2] == 0:
-        print('domain', domain, 'not found')
-    elif passed_count[3] == 0:
-        print('problem', problem, 'not found')
-
+    for i in range(len(rows)):
+        q_data[keys[i]] = None if nulls[i] else values[i]
     return q_data
 
 
-def equal(a, b):
-    if isinstance(a, int) or isinstance(a, float):
-        return a == float(b)
-    return str(a) == str(b)
-
-
-def lte(a, b):
-    if isinstance(a, int) or isinstance(a, float):
-        return a <= float(b)
-    return str(a) <= str(b)
-
-
-def gte(a, b):
-    if isinstance(a, int) or isinstance(a, float):
-        return a >= float(b)
-    return str(a) >= str(b)
+def read_json_file(json_file, attr, unsolvable_only, domain, problem, algo, query, stream=False, cache=False,
+                   jobs=1, on_duplicate='first'):
+    """
+    Returns dict[run_key] = value of attr for the runs passing the filters and the parsed query (or None)
+    """
+    print('Reading file ...')
+    attributes = {attr, 'unsolvable'}
+    if query is not None:
+        attributes |= query.attributes()
+    table = read_run_table(json_file, stream, cache, attributes, jobs, on_duplicate)
+    print('Querying ...')
+    return query_table(table, attr, unsolvable_only, domain, problem, algo, query)
 
 
 def parse_query(query_string):
-    single = query_string.split('&')
-    query = []
-    for q in single:
-        if '<=' in q:
-            qs = q.split('<=')
-        elif '>=' in q:
-            qs = q.split('>=')
-        elif '=' in q:
-            qs = q.split('=')
-        attr = qs[0]
-        val = qs[1]
-        try:
-            val = int(val)
-        except ValueError:
-            pass
-        if '<=' in q:
-            query.append((attr, lte, val))
-        elif '>=' in q:
-            query.append((attr, gte, val))
-        elif '=' in q:
-            query.append((attr, equal, val))
-    return query
+    """
+    Compiles query_string into a query plan, see the grammar in query.py
+    """
+    if query_string is None:
+        return None
+    try:
+        return parse(query_string)
+    except ValueError as e:
+        print('Error:', e)
+        exit(1)
 
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("json_file", help=".json file containing the lab data")
+    parser.add_argument("json_file", help=".json files (or glob patterns) containing the lab data", nargs='+')
     parser.add_argument('--domain', '-d', help='domain name')
     parser.add_argument('--problem', '-p', help='problem name')
     parser.add_argument('--algo-start', '-al', help='algorithm name starts with')
-    parser.add_argument("--query", "-q", help="the query")
+    parser.add_argument("--query", "-q", help="the query, e.g. 'a>=10&(b<5|c!=x)&d in (1,2)&e~^lin&exists(f)', "
+                                              "see query.py for the grammar")
     parser.add_argument("--attribute", "-at", help="attribute to show")
     parser.add_argument("--unsolvable-only", "-u", help="only count the unsolvable instances", dest='unsolvable_only',
                         action='store_true')
-    parser.set_defaults(unsolvable_only=False)
+    parser.add_argument("--no-server", help="do not send the query to a running query_server.py",
+                        dest='no_server', action='store_true')
+    parser.set_defaults(unsolvable_only=False, no_server=False)
 
+    add_loader_arguments(parser)
     args = parser.parse_args()
     query = parse_query(args.query)
 
+    if not args.no_server:
+        response = send_query(args.json_file, args.attribute, args.unsolvable_only, args.domain, args.problem,
+                              args.algo_start, args.query, **get_loader_options(args))
+        if response is not None:
+            print(response['output'], end='')
+            if 'error' in response:
+                print('Error:', response['error'])
+                exit(1)
+            for idx, val in response['data']:
+                print(idx, val)
+            return
+
     data = read_json_file(args.json_file, args.attribute, args.unsolvable_only, args.domain, args.problem,
-                          args.algo_start, query)
+                          args.algo_start, query, **get_loader_options(args))
     for idx, val in data.items():
         print(idx, val)
 
@@ -1,17 +1,17 @@
-import json
 import os
 import argparse
 
+from common import read_runs, add_loader_arguments, get_loader_options
 
-def read_json_simple(json_file, unsolvable_only, exclude=[]):
+
+def read_json_simple(json_file, unsolvable_only, exclude=[], stream=False, cache=False, attributes=None,
+                     jobs=1, on_duplicate='first'):
     print('Reading file ...')
-    with open(json_file) as data_file:
-        data = json.load(data_file)
     print('Grouping data ...')
     excluded = 0
     grouped_data = {}
     existing_problems = {}
-    for idx, val in data.items():
+    for idx, val in read_runs(json_file, stream, cache, attributes, jobs, on_duplicate):
         if unsolvable_only and val['unsolvable'] == 0:
             continue
         if val['id'][1] not in grouped_data:
@@ -104,17 +104,19 @@ def check_attribute_exists(grouped_data, attr):
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("json_file", help=".json file containing the lab data")
+    parser.add_argument("json_file", help=".json files (or glob patterns) containing the lab data", nargs='+')
     parser.add_argument("--attribute", "-a", help="attribute to use", default="max_abstraction_states")
     parser.add_argument("--unsolvable-only", "-u", help="only count the unsolvable instances", dest='unsolvable_only',
                         action='store_true')
     parser.add_argument("--range", help="histogram range (int)", nargs='+')
     parser.set_defaults(unsolvable_only=False)
+    add_loader_arguments(parser)
     args = parser.parse_args()
 
     rangelist = [int(i) for i in args.range]
 
-    data, problems = read_json_simple(args.json_file, args.unsolvable_only)
+    data, problems = read_json_simple(args.json_file, args.unsolvable_only, attributes=[args.attribute, 'unsolvable'],
+                                      **get_loader_options(args))
     if check_attribute_exists(data, args.attribute):
         create_histogram_per_algo(data, rangelist, args.attribute)
 
@@ -0,0 +1,492 @@
+"""
+
+query language of get_run_data:
+
+    expr   := term ('|' term)*
+    term   := factor ('&' factor)*
+    factor := '(' expr ')' | 'exists' '(' attr ')' | attr op value | attr 'in' '(' value (',' value)* ')'
+    op     := '=' | '!=' | '<' | '<=' | '>' | '>=' | '~'
+
+values are compared as numbers when they are numeric, as strings otherwise. '~' matches a regular expression.
+values containing spaces or any of ()&|,=<>!~ have to be quoted with ' or ".
+runs without the attribute of a comparison pass it, use exists(attr) to require the attribute.
+
+"""
+import re
+import weakref
+
+import numpy as np
+
+SAMPLE_SIZE = 1024
+# an index is only used when it leaves at most this fraction of the runs, otherwise scanning is cheaper
+INDEX_SELECTIVITY = 0.25
+
+
+class ColumnView:
+    """
+    Comparable view of a columns.Column: numbers holds every numeric value as float64 (is_number marks them),
+    text holds str(value) of every present value. Both are built once per column and reused by every query.
+    """
+    def __init__(self, column):
+        self.present = np.asarray(column.present)
+        self.null = np.asarray(column.null)
+        self._values = column.values
+        if column.values.dtype != object:
+            self.is_number = self.present & ~self.null
+            self.numbers = np.asarray(column.values, dtype=np.float64)
+        else:
+            self.is_number = np.fromiter((isinstance(v, (int, float)) for v in column.values), dtype=bool,
+                                         count=len(column.values)) & self.present & ~self.null
+            self.numbers = np.zeros(len(column.values), dtype=np.float64)
+            self.numbers[self.is_number] = column.values[self.is_number].astype(np.float64)
+        self._text = None
+
+    def get_text(self):
+        if self._text is None:
+            if self._values.dtype != object:
+                text = np.asarray(self._values).astype(str)
+                text[self.null] = 'None'
+            else:
+                text = np.array([str(v) for v in self._values.tolist()])
+            self._text = text
+        return self._text
+
+
+_views = weakref.WeakKeyDictionary()
+
+
+def _get_table_cache(table):
+    if table not in _views:
+        _views[table] = {}
+    return _views[table]
+
+
+def get_column_view(table, attr):
+    """
+    Returns the (cached) ColumnView of attribute attr of the columns.RunTable table
+    """
+    cache = _get_table_cache(table)
+    if attr not in cache:
+        cache[attr] = ColumnView(table.columns[attr])
+    return cache[attr]
+
+
+def get_sample_rows(table):
+    """
+    Returns evenly spaced rows of table, used to estimate the selectivity of the predicates
+    """
+    cache = _get_table_cache(table)
+    if ('sample',) not in cache:
+        step = max(1, len(table) // SAMPLE_SIZE)
+        cache[('sample',)] = np.arange(0, len(table), step)
+    return cache[('sample',)]
+
+
+class Node:
+    """
+    A node of a query plan. evaluate(table, rows) returns the boolean mask of rows (indices of runs of a
+    columns.RunTable) satisfying the node, cost is the relative cost of evaluating the node per run.
+    """
+    cost = 1
+
+    def attributes(self):
+        return set()
+
+    def estimate(self, table):
+        """
+        Returns the estimated fraction of the runs of table satisfying the node, from a sample of the runs
+        """
+        sample = get_sample_rows(table)
+        if len(sample) == 0:
+            return 1.0
+        return np.count_nonzero(self.evaluate(table, sample)) / len(sample)
+
+    def candidates(self, table):
+        """
+        Returns the (unsorted) runs satisfying the node resolved from the indexes of table, None if the node
+        can not be resolved from an index
+        """
+        return None
+
+    def select(self, table):
+        """
+        Returns the sorted runs of table satisfying the node
+        """
+        rows = self.candidates(table)
+        if rows is not None:
+            return np.sort(rows)
+        rows = np.arange(len(table))
+        return rows[self.evaluate(table, rows)]
+
+
+class Predicate(Node):
+    """
+    A comparison attr <op> value compiled for vectorized evaluation. Numeric values are compared as numbers,
+    every other value as a string, and runs without the attribute always pass.
+    """
+    OPERATORS = {
+        '=': np.equal,
+        '!=': np.not_equal,
+        '<': np.less,
+        '<=': np.less_equal,
+        '>': np.greater,
+        '>=': np.greater_equal,
+    }
+
+    def __init__(self, attr, op, value):
+        self.attr = attr
+        self.op = op
+        self.value = value
+        if op == 'in':
+            self.strings = [str(v) for v in value]
+            self.numbers = [float(v) for v in value if _is_number(v)]
+            self.cost = 3
+        elif op == '~':
+            self.regex = re.compile(str(value))
+            self.cost = 20
+        else:
+            self.string = str(value)
+            self.number = float(value) if _is_number(value) else None
+            self.cost = 1 if self.number is not None else 3
+
+    def attributes(self):
+        return {self.attr}
+
+    def _compare_numbers(self, numbers):
+        if self.op == 'in':
+            return np.isin(numbers, self.numbers)
+        return Predicate.OPERATORS[self.op](numbers, self.number)
+
+    def _compare_text(self, text):
+        if self.op == 'in':
+            return np.isin(text, self.strings)
+        if self.op == '~':
+            return np.fromiter((self.regex.search(t) is not None for t in text), dtype=bool, count=len(text))
+        return Predicate.OPERATORS[self.op](text, self.string)
+
+    def evaluate(self, table, rows):
+        if self.attr not in table.columns:
+            return np.ones(len(rows), dtype=bool)
+        view = get_column_view(table, self.attr)
+        present = view.present[rows]
+        mask = ~present
+        if self.op != '~' and (self.op == 'in' or self.number is not None):
+            is_number = view.is_number[rows]
+            mask |= is_number & self._compare_numbers(view.numbers[rows])
+            others = present & ~is_number
+        else:
+            others = present
+        if others.any():
+            mask[others] = self._compare_text(view.get_text()[rows[others]])
+        return mask
+
+    def candidates(self, table):
+        if self.attr not in table.columns or self.op in ['!=', '~']:
+            return None
+        index = table.get_sorted_index(self.attr)
+        if index is None:
+            return None
+        if self.op == 'in':
+            rows = [index.select('=', number) for number in self.numbers]
+        else:
+            if self.number is None:
+                return None
+            rows = [index.select(self.op, self.number)]
+        # the runs without a number pass when the attribute is missing, the ones with None compare as 'None'
+        others = index.others
+        if len(others) > 0:
+            present = np.asarray(table.columns[self.attr].present[others])
+            rows.append(others[~present])
+            if present.any() and self._compare_text(np.array(['None']))[0]:
+                rows.append(others[present])
+        return np.concatenate(rows)
+
+    def __repr__(self):
+        if self.op == 'in':
+            return self.attr + ' in (' + ', '.join(self.strings) + ')'
+        return self.attr + self.op + str(self.value)
+
+
+class Exists(Node):
+    """
+    Satisfied by the runs having attr with a value other than None
+    """
+    def __init__(self, attr):
+        self.attr = attr
+
+    def attributes(self):
+        return {self.attr}
+
+    def evaluate(self, table, rows):
+        if self.attr not in table.columns:
+            return np.zeros(len(rows), dtype=bool)
+        view = get_column_view(table, self.attr)
+        return view.present[rows] & ~view.null[rows]
+
+    def candidates(self, table):
+        if self.attr not in table.columns:
+            return None
+        index = table.get_sorted_index(self.attr)
+        return None if index is None else index.order
+
+    def __repr__(self):
+        return 'exists(' + self.attr + ')'
+
+
+class NamePredicate(Node):
+    """
+    Satisfied by the runs whose algorithm, domain or problem name (id[index]) is accepted by accept(name),
+    or is equal to name if name is given
+    """
+    AXES = ['algos', 'domains', 'problems']
+    CODES = ['algo_ids', 'domain_ids', 'problem_ids']
+
+    def __init__(self, index, description, accept=None, name=None):
+        self.index = index
+        self.description = description
+        self.accept = accept
+        self.name = name
+
+    def accepted_codes(self, table):
+        names = getattr(table, NamePredicate.AXES[self.index])
+        if self.name is None:
+            return [code for code, name in enumerate(names) if self.accept(name)]
+        cache = _get_table_cache(table)
+        if ('names', self.index) not in cache:
+            cache[('names', self.index)] = {name: code for code, name in enumerate(names)}
+        code = cache[('names', self.index)].get(self.name)
+        return [] if code is None else [code]
+
+    def matches_any(self, table):
+        return len(self.accepted_codes(table)) > 0
+
+    def evaluate(self, table, rows):
+        return np.isin(getattr(table, NamePredicate.CODES[self.index])[rows], self.accepted_codes(table))
+
+    def candidates(self, table):
+        index = table.get_name_index(self.index)
+        if index is None:
+            return None
+        return index.select(self.accepted_codes(table))
+
+    def __repr__(self):
+        return self.description
+
+
+class And(Node):
+    """
+    Conjunction, the children are evaluated from the cheapest and most selective one, each of them only on the
+    runs that passed the previous ones
+    """
+    def __init__(self, children):
+        self.children = []
+        for child in children:
+            if isinstance(child, And):
+                self.children += child.children
+            else:
+                self.children.append(child)
+        self.cost = sum(child.cost for child in self.children)
+
+    def attributes(self):
+        return set().union(*[child.attributes() for child in self.children])
+
+    def order(self, table):
+        if len(self.children) < 2:
+            return self.children
+
+        def rank(child):
+            return child.cost / max(1.0 - child.estimate(table), 1e-6)
+        return sorted(self.children, key=rank)
+
+    def evaluate(self, table, rows):
+        remaining = np.arange(len(rows))
+        for child in self.order(table):
+            remaining = remaining[child.evaluate(table, rows[remaining])]
+            if len(remaining) == 0:
+                break
+        mask = np.zeros(len(rows), dtype=bool)
+        mask[remaining] = True
+        return mask
+
+    def select(self, table):
+        """
+        Starts from the smallest set of runs resolved from an index, if it leaves few enough runs, and evaluates the
+        other children only on these runs
+        """
+        rows = None
+        best = None
+        for child in self.children:
+            child_rows = child.candidates(table)
+            if child_rows is not None and (rows is None or len(child_rows) < len(rows)):
+                rows = child_rows
+                best = child
+        if rows is None or len(rows) > INDEX_SELECTIVITY * len(table):
+            return super().select(table)
+        rows = np.unique(rows)
+        others = [child for child in self.children if child is not best]
+        if len(others) > 0 and len(rows) > 0:
+            rows = rows[And(others).evaluate(table, rows)]
+        return rows
+
+    def __repr__(self):
+        return '(' + ' & '.join(repr(child) for child in self.children) + ')'
+
+
+class Or(Node):
+    """
+    Disjunction, the children are evaluated from the cheapest and least selective one, each of them only on the
+    runs that did not pass the previous ones
+    """
+    def __init__(self, children):
+        self.children = []
+        for child in children:
+            if isinstance(child, Or):
+                self.children += child.children
+            else:
+                self.children.append(child)
+        self.cost = sum(child.cost for child in self.children)
+
+    def attributes(self):
+        return set().union(*[child.attributes() for child in self.children])
+
+    def order(self, table):
+        if len(self.children) < 2:
+            return self.children
+
+        def rank(child):
+            return child.cost / max(child.estimate(table), 1e-6)
+        return sorted(self.children, key=rank)
+
+    def evaluate(self, table, rows):
+        mask = np.zeros(len(rows), dtype=bool)
+        undecided = np.arange(len(rows))
+        for child in self.order(table):
+            passed = child.evaluate(table, rows[undecided])
+            mask[undecided[passed]] = True
+            undecided = undecided[~passed]
+            if len(undecided) == 0:
+                break
+        return mask
+
+    def __repr__(self):
+        return '(' + ' | '.join(repr(child) for child in self.children) + ')'
+
+
+def _is_number(value):
+    try:
+        float(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+_TOKEN = re.compile(r'\s*(?:(?P<string>"(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')|(?P<op><=|>=|!=|=|<|>|~)|'
+                    r'(?P<punct>[()&|,])|(?P<word>[^\s()&|,=<>!~"\']+))')
+
+
+def tokenize(query_string):
+    """
+    Returns the list of (kind, text) tokens of query_string, kind is one of string, op, punct and word
+    """
+    tokens = []
+    pos = 0
+    query_string = query_string.rstrip()
+    while pos < len(query_string):
+        match = _TOKEN.match(query_string, pos)
+        if match is None or match.end() == pos:
+            raise ValueError('Unexpected character at position ' + str(pos) + ' of the query: ' +
+                             query_string[pos:])
+        kind = match.lastgroup
+        text = match.group(kind)
+        if kind == 'string':
+            text = re.sub(r'\\(.)', r'\1', text[1:-1])
+        tokens.append((kind, text))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return None, None
+
+    def next(self, kind=None, text=None):
+        token_kind, token_text = self.peek()
+        if token_kind is None or (kind is not None and token_kind not in kind) or \
+                (text is not None and token_text != text):
+            expected = text if text is not None else ' or '.join(kind)
+            raise ValueError('Expected ' + expected + ' but found ' + str(token_text) + ' in the query')
+        self.pos += 1
+        return token_text
+
+    def expr(self):
+        children = [self.term()]
+        while self.peek() == ('punct', '|'):
+            self.pos += 1
+            children.append(self.term())
+        return children[0] if len(children) == 1 else Or(children)
+
+    def term(self):
+        children = [self.factor()]
+        while self.peek() == ('punct', '&'):
+            self.pos += 1
+            children.append(self.factor())
+        return children[0] if len(children) == 1 else And(children)
+
+    def factor(self):
+        if self.peek() == ('punct', '('):
+            self.pos += 1
+            node = self.expr()
+            self.next(['punct'], ')')
+            return node
+        attr = self.next(['word', 'string'])
+        if attr == 'exists' and self.peek() == ('punct', '('):
+            self.pos += 1
+            node = Exists(self.next(['word', 'string']))
+            self.next(['punct'], ')')
+            return node
+        if self.peek() == ('word', 'in'):
+            self.pos += 1
+            self.next(['punct'], '(')
+            values = [self.next(['word', 'string'])]
+            while self.peek() == ('punct', ','):
+                self.pos += 1
+                values.append(self.next(['word', 'string']))
+            self.next(['punct'], ')')
+            return Predicate(attr, 'in', values)
+        op = self.next(['op'])
+        return Predicate(attr, op, self.next(['word', 'string']))
+
+
+def parse(query_string):
+    """
+    Compiles query_string (see the grammar at the top of this module) into a query plan Node
+    """
+    parser = _Parser(tokenize(query_string))
+    node = parser.expr()
+    if parser.pos != len(parser.tokens):
+        raise ValueError('Unexpected ' + parser.tokens[parser.pos][1] + ' in the query')
+    return node
+
+
+def build_plan(query, unsolvable_only=False, domain=None, problem=None, algo=None):
+    """
+    Returns one And node combining the parsed query (or None) with the run filters of get_run_data
+    """
+    children = []
+    if query is not None:
+        children.append(query)
+    if unsolvable_only:
+        children += [Exists('unsolvable'), Predicate('unsolvable', '!=', 0)]
+    if algo is not None:
+        children.append(NamePredicate(0, 'algo ' + algo, accept=lambda name: name.startswith(algo)))
+    if domain is not None:
+        children.append(NamePredicate(1, 'domain ' + domain, name=domain))
+    if problem is not None:
+        children.append(NamePredicate(2, 'problem ' + problem, name=problem))
+    return And(children)
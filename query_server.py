@@ -0,0 +1,164 @@
+"""
+
+param: json_file(s) to preload, socket, stop
+
+long running server answering the queries of get_run_data over a unix socket. The properties files are loaded once,
+kept in memory as columns.RunTable and reloaded whenever they change (different size or modification time).
+get_run_data sends its queries to the server when one is running (see --no-server), with its loader options: a table
+is kept per list of properties files and loader options, the files given on start are loaded with the options of the
+server.
+
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import threading
+
+import columns
+from common import expand_json_files, read_run_table, add_loader_arguments, get_loader_options
+
+SOCKET_PATH = os.environ.get('FD_TOOLS_SOCKET', os.path.join(columns.CACHE_DIR, 'query.sock'))
+
+
+class QueryServer(socketserver.UnixStreamServer):
+    """
+    Keeps one RunTable per (list of properties files, loader options) and answers the requests of send_request
+    """
+    def __init__(self, socket_path):
+        super().__init__(socket_path, QueryHandler)
+        self.tables = {}
+
+    def get_table(self, json_files, loader_options):
+        """
+        Returns the RunTable of json_files, loader_options are the keyword arguments of common.read_run_table
+        """
+        key = (tuple(json_files), tuple(sorted(loader_options.items())))
+        signatures = [columns.get_source_signature(json_file) for json_file in json_files]
+        if key in self.tables and self.tables[key][0] == signatures:
+            return self.tables[key][1]
+        print('Loading', ', '.join(json_files), '...')
+        table = read_run_table(json_files, **loader_options)
+        self.tables[key] = (signatures, table)
+        return table
+
+    def answer(self, request):
+        # imported here, get_run_data imports this module for send_request
+        from get_run_data import query_table
+        from query import parse
+
+        if request.get('command') == 'ping':
+            return {'output': ''}
+        if request.get('command') == 'stop':
+            threading.Thread(target=self.shutdown).start()
+            return {'output': 'Query server stopped\n'}
+        output = io.StringIO()
+        try:
+            query = None if request['query'] is None else parse(request['query'])
+            with contextlib.redirect_stdout(output):
+                table = self.get_table(request['json_files'], request['loader_options'])
+                data = query_table(table, request['attribute'], request['unsolvable_only'], request['domain'],
+                                   request['problem'], request['algo'], query)
+        except (ValueError, OSError) as e:
+            return {'output': output.getvalue(), 'error': str(e)}
+        except Exception as e:
+            # e.g. a KeyError of a malformed request, the server keeps running
+            return {'output': output.getvalue(), 'error': type(e).__name__ + ': ' + str(e)}
+        return {'output': output.getvalue(), 'data': list(data.items())}
+
+
+class QueryHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline().decode())
+        except ValueError as e:
+            response = {'output': '', 'error': 'malformed request: ' + str(e)}
+        else:
+            response = self.server.answer(request)
+        self.wfile.write((json.dumps(response) + '\n').encode())
+
+
+def send_request(request, socket_path=SOCKET_PATH):
+    """
+    Returns the response of the server to request, None if no server is running. A response that is empty or not
+    json (the server died while answering) is returned as an error response.
+    """
+    if not os.path.exists(socket_path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+        sock.sendall((json.dumps(request) + '\n').encode())
+        with sock.makefile('rb') as f:
+            line = f.readline().decode()
+        if line.strip() == '':
+            return {'output': '', 'error': 'empty response from the query server'}
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            return {'output': '', 'error': 'malformed response from the query server: ' + str(e)}
+    except (ConnectionRefusedError, FileNotFoundError):
+        return None
+    finally:
+        sock.close()
+
+
+def send_query(json_files, attr, unsolvable_only, domain, problem, algo, query_string, stream=False, cache=False,
+               jobs=1, on_duplicate='first', socket_path=SOCKET_PATH):
+    """
+    Returns the response of the server to a get_run_data query, None if no server is running.
+    The tables of the server keep every attribute, the loader options are the ones of common.read_run_table.
+    """
+    return send_request({
+        'json_files': [os.path.abspath(json_file) for json_file in expand_json_files(json_files)],
+        'attribute': attr,
+        'unsolvable_only': unsolvable_only,
+        'domain': domain,
+        'problem': problem,
+        'algo': algo,
+        'query': query_string,
+        'loader_options': {'stream': stream, 'cache': cache, 'jobs': jobs, 'on_duplicate': on_duplicate}
+    }, socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("json_file", help=".json files (or glob patterns) to load on start", nargs='*')
+    parser.add_argument("--socket", help="path of the unix socket", default=SOCKET_PATH)
+    parser.add_argument("--stop", help="stop the running server", action='store_true')
+    add_loader_arguments(parser)
+    args = parser.parse_args()
+
+    if args.stop:
+        response = send_request({'command': 'stop'}, args.socket)
+        if response is None:
+            print('No query server running')
+        else:
+            print(response['output'], end='')
+        return
+    if send_request({'command': 'ping'}, args.socket) is not None:
+        print('Error: a query server is already running on', args.socket)
+        exit(1)
+    if os.path.exists(args.socket):
+        os.remove(args.socket)
+    os.makedirs(os.path.dirname(os.path.abspath(args.socket)), exist_ok=True)
+
+    server = QueryServer(args.socket)
+    if len(args.json_file) > 0:
+        server.get_table([os.path.abspath(json_file) for json_file in expand_json_files(args.json_file)],
+                         get_loader_options(args))
+    print('Query server listening on', args.socket)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(args.socket)
+
+
+if __name__ == '__main__':
+    main()
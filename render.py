@@ -0,0 +1,404 @@
+"""
+
+rendering of many graphs (one per problem) by a pool of worker processes using the Agg backend. Graphs are described
+by RenderJob objects consumed from an iterable as the pool has room for them, so that only a bounded number of them
+is held in memory at once. The output names are fixed by the jobs, and an error rendering a graph is reported
+without stopping the other graphs.
+In batch mode, the graphs are drawn on a GraphTemplate: the figure, axes, grid, ticks and formatters are built once
+per process, and every graph only updates the data of the artists and the limits before being saved.
+Instead of one PNG file per graph, the graphs can be written as the pages of PDF files (see render_graphs): a single
+PDF file for all the graphs, or one per folder of the PNG files (one per domain), each one followed by index pages
+listing the page of every graph.
+The hash of the data and options of every graph (of every PDF file) is stored in a manifest in the output folder, and
+the graphs whose hash did not change since the last run are not rendered again.
+
+"""
+import collections
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import time
+import traceback
+
+# graphs submitted to the pool and not yet collected, per worker process
+IN_FLIGHT_PER_PROCESS = 4
+# a worker process is replaced after this many graphs, which bounds the memory leaked by matplotlib
+TASKS_PER_PROCESS = 200
+# seconds to wait for the result of a graph from the start of its rendering in a worker process: a worker process
+# killed while rendering (out of memory, crash in a native library) never returns its result, the graph is then
+# reported as failed
+RENDER_TIMEOUT = 600
+# seconds between two checks for the start of a graph waiting for a worker process
+START_POLL_INTERVAL = 0.1
+# lines of the index pages of a PDF file
+INDEX_LINES_PER_PAGE = 50
+# output modes of render_graphs
+OUTPUT_MODES = ['png', 'pdf', 'domain-pdf']
+# manifest of an output folder, {path relative to the output folder: hash of the graph}
+MANIFEST_FILE = '.graphs.json'
+# templates of this process, by (GraphTemplate subclass, options)
+_templates = {}
+# queue of the (task index, start time) of the tasks started by this worker process, see _run_ordered
+_started = None
+
+
+class RenderJob:
+    """
+    A graph to render: render_func(path, *args) draws it and saves it to path. render_func has to be a module level
+    function, so that the job can be sent to a worker process.
+    If template is not None, it is a (GraphTemplate subclass, options) pair and the graph is drawn by the draw method
+    of the template of this process instead: draw(path, *args).
+    """
+    def __init__(self, path, render_func, args, name=None, template=None):
+        self.path = path
+        self.render_func = render_func
+        self.args = args
+        self.name = path if name is None else name
+        self.template = template
+
+
+class PdfDocument:
+    """
+    Graphs saved as the pages of the PDF file path, in the order of the jobs (whose paths are ignored)
+    """
+    def __init__(self, path, jobs):
+        self.path = path
+        self.jobs = jobs
+
+
+class GraphManifest:
+    """
+    Hashes of the graphs created in the output folder OUTDIR by the previous runs. All the graphs are rendered if
+    force, the manifest is still updated.
+    """
+    def __init__(self, OUTDIR, force=False):
+        self.OUTDIR = OUTDIR
+        self.path = os.path.join(OUTDIR, MANIFEST_FILE)
+        self.hashes = {}
+        self.skipped = 0
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.hashes = json.load(f)
+        self.force = force
+
+    def select(self, path, graph_hash):
+        """
+        Returns True if the graph path has to be rendered: it does not exist or its hash changed. The new hash is
+        recorded, it has to be discarded if rendering the graph fails.
+        """
+        key = os.path.relpath(path, self.OUTDIR)
+        if not self.force and self.hashes.get(key) == graph_hash and os.path.exists(path):
+            self.skipped += 1
+            return False
+        self.hashes[key] = graph_hash
+        return True
+
+    def discard(self, path):
+        self.hashes.pop(os.path.relpath(path, self.OUTDIR), None)
+
+    def write(self):
+        tmp_path = self.path + '.tmp' + str(os.getpid())
+        with open(tmp_path, 'w') as f:
+            json.dump(self.hashes, f, sort_keys=True, indent=0)
+        os.replace(tmp_path, self.path)
+
+
+def get_job_hash(job):
+    """
+    Returns the hash of the graph of job: the name of its render function (or template class and options) and its
+    arguments, the dicts of the arguments are hashed in their order, which is the order of the lines of the graph
+    """
+    if job.template is None:
+        source = [job.render_func.__module__, job.render_func.__qualname__]
+    else:
+        source = [job.template[0].__module__, job.template[0].__qualname__, job.template[1]]
+    source.append(job.args)
+    return hashlib.sha1(json.dumps(source, default=repr).encode()).hexdigest()
+
+
+def get_document_hash(document):
+    """
+    Returns the hash of a PdfDocument, the pages are the graphs of its jobs and the index lists their names
+    """
+    document_hash = hashlib.sha1()
+    for job in document.jobs:
+        document_hash.update(json.dumps([job.name, get_job_hash(job)]).encode())
+    return document_hash.hexdigest()
+
+
+class GraphTemplate:
+    """
+    Figure reused by every graph of a batch. Subclasses build the figure and its axes in __init__(*options), and
+    draw(path, *args) updates the artists with the data of a graph and saves it to path.
+    """
+    def __init__(self):
+        import matplotlib.pyplot as plt
+        self.fig = plt.figure()
+        self.subplt = self.fig.add_subplot(111)
+
+    def draw(self, path, *args):
+        raise NotImplementedError
+
+    def update_lines(self, lines, count, **style):
+        """
+        Returns the first count lines of the list lines, adding lines with style and removing the lines not needed
+        """
+        while len(lines) < count:
+            lines.append(self.subplt.plot([], [], **style)[0])
+        while len(lines) > count:
+            lines.pop().remove()
+        return lines
+
+    def rescale(self):
+        self.subplt.relim()
+        self.subplt.autoscale_view()
+
+    def close(self):
+        import matplotlib.pyplot as plt
+        plt.close(self.fig)
+
+
+def get_template(template_class, options):
+    key = (template_class, options)
+    if key not in _templates:
+        _templates[key] = template_class(*options)
+    return _templates[key]
+
+
+def close_templates():
+    for template in _templates.values():
+        template.close()
+    _templates.clear()
+
+
+def _init_worker(started=None):
+    global _started
+    _started = started
+    import matplotlib.pyplot as plt
+    plt.switch_backend('Agg')
+
+
+def _run_started(params):
+    """
+    Reports the start of the task to _run_ordered, then returns func(item)
+    """
+    func, index, item = params
+    _started.put((index, time.monotonic()))
+    return func(item)
+
+
+def run_job(job):
+    """
+    Renders job, returns None on success and the traceback of the error otherwise. The figures are closed in any case,
+    except the template figures. A template whose graph failed is dropped, its state is unknown.
+    """
+    import matplotlib.pyplot as plt
+    try:
+        if job.template is None:
+            job.render_func(job.path, *job.args)
+        else:
+            get_template(*job.template).draw(job.path, *job.args)
+        return None
+    except Exception:
+        if job.template is not None and job.template in _templates:
+            _templates.pop(job.template).close()
+        return traceback.format_exc()
+    finally:
+        if job.template is None:
+            plt.close('all')
+
+
+def run_document(document):
+    """
+    Renders the jobs of document as the pages of its PDF file, then the index pages. Returns the list of the
+    (job, traceback) of every job, the traceback is None if the page was created.
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_pdf import PdfPages
+    results = []
+    with PdfPages(document.path) as pdf:
+        # the render functions save to a path without extension, the format has to be given by rcParams
+        with plt.rc_context({'savefig.format': 'pdf'}):
+            for job in document.jobs:
+                results.append((job, run_job(RenderJob(pdf, job.render_func, job.args, job.name, job.template))))
+        write_index(pdf, document.path, results)
+    return results
+
+
+def write_index(pdf, title, results):
+    """
+    Appends to pdf the pages listing the page number of every graph of results, the graphs start at page 1
+    """
+    import matplotlib.pyplot as plt
+    lines = []
+    page = 0
+    for job, error in results:
+        if error is None:
+            page += 1
+            lines.append(str(page).rjust(6) + '  ' + job.name)
+        else:
+            lines.append('failed  ' + job.name)
+    for start in range(0, max(len(lines), 1), INDEX_LINES_PER_PAGE):
+        fig = plt.figure(figsize=(8.27, 11.69))
+        fig.text(0.05, 0.97, 'Index of ' + title, fontsize='large', verticalalignment='top')
+        fig.text(0.05, 0.93, '\n'.join(lines[start:start + INDEX_LINES_PER_PAGE]), family='monospace',
+                 fontsize='small', verticalalignment='top', linespacing=1.4)
+        pdf.savefig(fig)
+        plt.close(fig)
+
+
+def _run_ordered(func, items, processes, lost, get_timeout=lambda item: RENDER_TIMEOUT):
+    """
+    Yields (item, func(item)) for the items of an iterable in their order, func being run by processes worker
+    processes. At most IN_FLIGHT_PER_PROCESS items per process are submitted and not yet collected.
+    An item whose result does not come within get_timeout(item) seconds of the start of func(item) in a worker process
+    yields (item, lost(item, error message)), the pool replaces a dead worker process and the other items go on. The
+    time an item waits for a worker process does not count.
+    matplotlib is only imported (and the processes started) if there is an item, the graphs skipped by the manifest
+    cost no plotting library import.
+    """
+    items = iter(items)
+    for first in items:
+        items = itertools.chain([first], items)
+        break
+    else:
+        return
+    if processes <= 1:
+        _init_worker()
+        try:
+            for item in items:
+                yield item, func(item)
+        finally:
+            close_templates()
+        return
+
+    # the workers report the start time of every task, the items are collected in their order
+    started = multiprocessing.SimpleQueue()
+    start_times = {}
+
+    def get(index, item, result):
+        timeout = get_timeout(item)
+        while not result.ready():
+            while not started.empty():
+                task, start_time = started.get()
+                if task >= index:
+                    start_times[task] = start_time
+            if index not in start_times:
+                result.wait(START_POLL_INTERVAL)
+            elif time.monotonic() - start_times[index] < timeout:
+                result.wait(max(0, start_times[index] + timeout - time.monotonic()))
+            else:
+                del start_times[index]
+                return lost(item, 'no result after ' + str(timeout) + ' s, the worker process was killed or is stuck\n')
+        start_times.pop(index, None)
+        return result.get()
+
+    with multiprocessing.Pool(processes, _init_worker, (started,), maxtasksperchild=TASKS_PER_PROCESS) as pool:
+        pending = collections.deque()
+        for index, item in enumerate(items):
+            if len(pending) >= processes * IN_FLIGHT_PER_PROCESS:
+                done = pending.popleft()
+                yield done[1], get(*done)
+            pending.append((index, item, pool.apply_async(_run_started, ((func, index, item),))))
+        while len(pending) > 0:
+            done = pending.popleft()
+            yield done[1], get(*done)
+
+
+def _collect(job, error, failed):
+    if error is None:
+        print('Created graph for ' + job.name)
+    else:
+        print('Error: graph for ' + job.name + ' failed')
+        print(error, end='')
+        failed.append((job, error))
+
+
+def render_jobs(jobs, processes=1):
+    """
+    Renders the jobs of an iterable with processes worker processes, the results are reported in the order of the
+    jobs. Returns the list of the (job, traceback) of the graphs that failed.
+    """
+    failed = []
+    for job, error in _run_ordered(run_job, jobs, processes, lambda job, error: error):
+        _collect(job, error, failed)
+    return failed
+
+
+def render_documents(documents, processes=1):
+    """
+    Renders the PdfDocuments of an iterable, one per worker process at a time. Returns the failed graphs as
+    render_jobs does.
+    """
+    failed = []
+    for document, results in _run_ordered(run_document, documents, processes,
+                                          lambda document, error: [(job, error) for job in document.jobs],
+                                          lambda document: RENDER_TIMEOUT * max(len(document.jobs), 1)):
+        for job, error in results:
+            _collect(job, error, failed)
+        print('Created ' + document.path)
+    return failed
+
+
+def render_graphs(jobs, OUTDIR, output_mode='png', processes=1, force=False):
+    """
+    Renders the jobs of an iterable in the output mode:
+    png: a PNG file per job at its path
+    pdf: the pages of OUTDIR/graphs.pdf, written by a single process
+    domain-pdf: the pages of one PDF file per folder of the job paths, folder.pdf (OUTDIR/domain.pdf), the jobs of a
+    folder have to be consecutive
+    The files whose hash is in the manifest of OUTDIR are skipped unless force (see GraphManifest). Returns the failed
+    graphs as render_jobs does.
+    """
+    if not os.path.exists(OUTDIR):
+        os.makedirs(OUTDIR)
+    manifest = GraphManifest(OUTDIR, force)
+    if output_mode == 'png':
+        failed = render_jobs((job for job in jobs if manifest.select(job.path, get_job_hash(job))), processes)
+        for job, error in failed:
+            manifest.discard(job.path)
+    else:
+        if output_mode == 'pdf':
+            processes = 1
+
+        def get_document_path(job):
+            return OUTDIR + '/graphs.pdf' if output_mode == 'pdf' else os.path.dirname(job.path) + '.pdf'
+
+        documents = (PdfDocument(path, list(document_jobs))
+                     for path, document_jobs in itertools.groupby(jobs, get_document_path))
+        failed = render_documents((document for document in documents
+                                   if manifest.select(document.path, get_document_hash(document))), processes)
+        # a file with a failed page is rendered again by the next run
+        for job, error in failed:
+            manifest.discard(get_document_path(job))
+    manifest.write()
+    if manifest.skipped > 0:
+        print('Skipped ' + str(manifest.skipped) + ' unchanged file(s)')
+    return failed
+
+
+def add_render_arguments(parser):
+    """
+    Adds the command line options of the scripts rendering one graph per problem
+    """
+    parser.add_argument("--render-jobs", help="number of processes rendering the graphs (default: --jobs)", type=int,
+                        dest='render_jobs')
+    parser.add_argument("--batch", help="build the figure once per process and only update the data of every graph",
+                        dest='batch', action='store_true')
+    parser.add_argument("--output", help="png: one file per problem (default), pdf: all the graphs in one PDF file, "
+                                         "domain-pdf: one PDF file per domain", choices=OUTPUT_MODES, default='png',
+                        dest='output_mode')
+    parser.add_argument("--force", help="render all the graphs, even the ones whose data did not change since the "
+                                        "last run", dest='force', action='store_true')
+    parser.set_defaults(batch=False, force=False)
+
+
+def get_render_processes(args):
+    return args.jobs if args.render_jobs is None else args.render_jobs
+
+
+def report_failures(failed):
+    if len(failed) > 0:
+        print(str(len(failed)) + ' graph(s) failed: ' + ', '.join(job.name for job, error in failed))
@@ -2,13 +2,10 @@
 
 import argparse
 import math
-import matplotlib.pyplot as plt
-import numpy as np
 import os
 import re
 
 from common import get_file_list
-from PIL import Image, ImageDraw
 
 
 class Node:
@@ -170,6 +167,7 @@ def print_node(node, prefix=''):
 
 
 def visualize_reward_distribution(node, min_reward, max_reward, bin_count, max_y, no_sim, output_folder='./'):
+    import matplotlib.pyplot as plt
     print('visualizing ...')
     node_at_depth = []
     queue = [(node, 0)]
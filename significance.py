@@ -0,0 +1,300 @@
+"""
+
+param: json_file(s), attribute, test, correction
+
+nonparametric significance tests of the differences between the algorithms: for every domain (and all the problems
+together) and every pair of algorithms, the Wilcoxon signed-rank test on the problems both algorithms cover, or the
+Mann-Whitney U test on the values of both algorithms, with a multiple-comparison correction over all the tests.
+The tests of a domain are computed for all the pairs at once, ranking the columns of a (problems x pairs) matrix,
+and the domains are spread over a process pool.
+
+p-values are two-sided. They are exact for the Wilcoxon test up to 50 differences and for the Mann-Whitney test when
+one of the two algorithms has at most 8 values, when there is no tie, and use the normal approximation with tie
+correction otherwise (with continuity correction for the Mann-Whitney test), as scipy.stats does by default.
+
+"""
+import argparse
+import csv
+import itertools
+import math
+import multiprocessing
+import sys
+
+import numpy as np
+
+from aggregate import is_supported
+from common import read_json_file, add_loader_arguments, get_loader_options
+from compare_matrix import build_matrix
+from suites import add_suite_arguments, get_suite_option
+
+TESTS = ['wilcoxon', 'mannwhitney']
+CORRECTIONS = ['holm', 'bonferroni', 'bh', 'none']
+# largest sample sizes with exact p-values, see the module docstring
+EXACT_WILCOXON = 50
+EXACT_MANN_WHITNEY = 8
+ALL_DOMAINS = '(all)'
+# distributions of the exact tests, by sample sizes
+_counts = {}
+
+
+def rank_columns(x):
+    """
+    Returns (ranks, tie_terms): ranks[i][j] is the rank (from 1, ties get their average rank) of x[i][j] among the
+    values of column j, nan where x is nan. tie_terms[j] is the sum of t^3 - t over the groups of t tied values of
+    column j.
+    """
+    rows, cols = x.shape
+    # one row per column of x, so that the sorts are along contiguous memory. nan values are sorted last
+    columns = np.ascontiguousarray(x.T)
+    order = np.argsort(columns, axis=1, kind='stable')
+    ordered = np.take_along_axis(columns, order, axis=1)
+    valid = ~np.isnan(ordered)
+    new_group = np.ones((cols, rows), dtype=bool)
+    # nan != nan, every nan is a group of its own
+    new_group[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    flat = new_group.ravel()
+    starts = np.flatnonzero(flat)
+    sizes = np.diff(np.append(starts, flat.size)).astype(np.float64)
+    # the values at positions pos .. pos + size - 1 get the ranks pos + 1 .. pos + size
+    average = starts % rows + (sizes + 1) / 2.0
+    ordered_ranks = average[np.cumsum(flat) - 1].reshape(cols, rows)
+    ordered_ranks[~valid] = np.nan
+    ranks = np.empty((cols, rows))
+    np.put_along_axis(ranks, order, ordered_ranks, axis=1)
+    group_valid = valid.ravel()[starts]
+    tie_terms = np.bincount(starts // rows, weights=np.where(group_valid, sizes ** 3 - sizes, 0.0), minlength=cols)
+    return ranks.T, tie_terms
+
+
+def _normal_p_value(z):
+    return min(1.0, math.erfc(abs(z) / math.sqrt(2.0)))
+
+
+def _exact_p_value(cumulative, statistic):
+    """
+    Returns the two-sided p-value of statistic given cumulative[s], the number of equally likely outcomes with a
+    statistic <= s
+    """
+    total = cumulative[-1]
+    low = cumulative[int(statistic)]
+    high = total - (cumulative[int(math.ceil(statistic)) - 1] if statistic >= 1 else 0)
+    return min(1.0, 2.0 * min(low, high) / total)
+
+
+def _wilcoxon_counts(n):
+    """
+    Returns the cumulative counts of the subsets of {1, ..., n} by sum, the distribution of the rank sum of
+    the positive differences
+    """
+    if ('wilcoxon', n) not in _counts:
+        counts = [1] + [0] * (n * (n + 1) // 2)
+        for rank in range(1, n + 1):
+            for s in range(len(counts) - 1, rank - 1, -1):
+                counts[s] += counts[s - rank]
+        _counts[('wilcoxon', n)] = list(itertools.accumulate(counts))
+    return _counts[('wilcoxon', n)]
+
+
+def _mann_whitney_counts(m, n):
+    """
+    Returns the cumulative counts of the orderings of m and n values by U statistic. The counts are the
+    coefficients of the gaussian binomial coefficient (m + n choose m).
+    """
+    if ('mannwhitney', m, n) not in _counts:
+        counts = [1] + [0] * (m * n)
+        # product over i of (1 - q^(n + i)) / (1 - q^i), the divisions are exact
+        for i in range(1, m + 1):
+            for u in range(len(counts) - 1, n + i - 1, -1):
+                counts[u] -= counts[u - n - i]
+            for u in range(i, len(counts)):
+                counts[u] += counts[u - i]
+        _counts[('mannwhitney', m, n)] = list(itertools.accumulate(counts))
+    return _counts[('mannwhitney', m, n)]
+
+
+def wilcoxon(a, b):
+    """
+    Wilcoxon signed-rank tests of the columns of a and b (nan where a value is missing): returns (n, statistic,
+    p_values, direction) per column, n is the number of nonzero differences, statistic the smaller of the rank sums of
+    the positive and negative differences and direction the sign of a - b (+1 if a tends to be larger)
+    """
+    with np.errstate(invalid='ignore'):
+        differences = a - b
+    # zero differences are dropped
+    differences[differences == 0] = np.nan
+    ranks, tie_terms = rank_columns(np.abs(differences))
+    n = np.count_nonzero(~np.isnan(differences), axis=0)
+    positive = np.where(differences > 0, ranks, 0.0).sum(axis=0)
+    negative = n * (n + 1) / 2.0 - positive
+    mean = n * (n + 1) / 4.0
+    variance = n * (n + 1) * (2 * n + 1) / 24.0 - tie_terms / 48.0
+    p_values = []
+    for j in range(len(n)):
+        if n[j] == 0:
+            p_values.append(np.nan)
+        elif n[j] <= EXACT_WILCOXON and tie_terms[j] == 0:
+            p_values.append(_exact_p_value(_wilcoxon_counts(int(n[j])), positive[j]))
+        elif variance[j] <= 0:
+            p_values.append(1.0)
+        else:
+            p_values.append(_normal_p_value((positive[j] - mean[j]) / math.sqrt(variance[j])))
+    return n, np.minimum(positive, negative), np.array(p_values), np.sign(positive - negative)
+
+
+def mann_whitney(a, b):
+    """
+    Mann-Whitney U tests of the columns of a against the columns of b (nan where a value is missing): returns
+    (n, statistic, p_values, direction) per column, n is the number of values of both samples, statistic the U
+    statistic of a and direction +1 if a tends to be larger
+    """
+    ranks, tie_terms = rank_columns(np.vstack([a, b]))
+    n1 = np.count_nonzero(~np.isnan(a), axis=0)
+    n2 = np.count_nonzero(~np.isnan(b), axis=0)
+    n = n1 + n2
+    u = np.nansum(ranks[:len(a)], axis=0) - n1 * (n1 + 1) / 2.0
+    mean = n1 * n2 / 2.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = n1 * n2 / 12.0 * ((n + 1) - tie_terms / (n * (n - 1)))
+    p_values = []
+    for j in range(len(n)):
+        if n1[j] == 0 or n2[j] == 0:
+            p_values.append(np.nan)
+        elif min(n1[j], n2[j]) <= EXACT_MANN_WHITNEY and tie_terms[j] == 0:
+            # the distribution is symmetric in the sample sizes, and cheaper to compute with the smaller one first
+            p_values.append(_exact_p_value(_mann_whitney_counts(int(min(n1[j], n2[j])), int(max(n1[j], n2[j]))),
+                                           u[j]))
+        elif variance[j] <= 0:
+            p_values.append(1.0)
+        else:
+            # continuity correction
+            z = max(0.0, abs(u[j] - mean[j]) - 0.5) / math.sqrt(variance[j])
+            p_values.append(_normal_p_value(z))
+    return n, u, np.array(p_values), np.sign(u - mean)
+
+
+def correct_p_values(p_values, method):
+    """
+    Returns the p-values adjusted for multiple comparisons: holm (step-down), bonferroni, bh (Benjamini-Hochberg
+    false discovery rate) or none. nan p-values (tests without data) are not counted.
+    """
+    p_values = np.asarray(p_values, dtype=np.float64)
+    adjusted = p_values.copy()
+    tested = np.flatnonzero(~np.isnan(p_values))
+    m = len(tested)
+    if method == 'none' or m == 0:
+        return adjusted
+    order = tested[np.argsort(p_values[tested], kind='stable')]
+    ordered = p_values[order]
+    if method == 'bonferroni':
+        ordered = ordered * m
+    elif method == 'holm':
+        ordered = np.maximum.accumulate(ordered * (m - np.arange(m)))
+    elif method == 'bh':
+        ordered = np.minimum.accumulate((ordered * m / np.arange(1, m + 1))[::-1])[::-1]
+    else:
+        raise ValueError('Unknown correction ' + method)
+    adjusted[order] = np.minimum(ordered, 1.0)
+    return adjusted
+
+
+def compare_domain(params):
+    """
+    Returns the rows (domain, algo, other, n, statistic, p-value, direction) of the tests of every pair of algorithms
+    on values, the (problems x algos) matrix of a domain
+    """
+    domain, algos, values, test = params
+    pairs = [(i, j) for i in range(len(algos)) for j in range(i + 1, len(algos))]
+    if len(pairs) == 0:
+        return []
+    first = np.array([i for i, j in pairs], dtype=np.int64)
+    second = np.array([j for i, j in pairs], dtype=np.int64)
+    test_func = wilcoxon if test == 'wilcoxon' else mann_whitney
+    n, statistic, p_values, direction = test_func(values[:, first], values[:, second])
+    return [(domain, algos[i], algos[j], int(n[k]), float(statistic[k]), float(p_values[k]), int(direction[k]))
+            for k, (i, j) in enumerate(pairs)]
+
+
+def run_tests(problems, algos, values, test, correction, jobs=1, all_domains=True):
+    """
+    Returns the rows of compare_domain for every domain of problems (and ALL_DOMAINS for all the problems if
+    all_domains), with the adjusted p-value appended to every row
+    """
+    domains = {}
+    for row, (domain, problem) in enumerate(problems):
+        domains.setdefault(domain, []).append(row)
+    params = [(domain, algos, values[rows], test) for domain, rows in sorted(domains.items())]
+    if all_domains:
+        params.append((ALL_DOMAINS, algos, values, test))
+    results = []
+    if jobs > 1 and len(params) > 1:
+        with multiprocessing.Pool(jobs) as pool:
+            for rows in pool.imap(compare_domain, params):
+                results += rows
+    else:
+        for param in params:
+            results += compare_domain(param)
+    adjusted = correct_p_values([row[5] for row in results], correction)
+    return [row + (float(p),) for row, p in zip(results, adjusted)]
+
+
+def format_p_value(p):
+    return '-' if math.isnan(p) else '{:.4g}'.format(p)
+
+
+def print_results(results, alpha, higher_better, output_format, out=sys.stdout):
+    header = ['domain', 'algo', 'other', 'n', 'statistic', 'p', 'p_adjusted', 'better']
+    lines = []
+    for domain, algo, other, n, statistic, p, direction, p_adjusted in results:
+        better = ''
+        if not math.isnan(p_adjusted) and p_adjusted <= alpha and direction != 0:
+            better = algo if (direction > 0) == higher_better else other
+        lines.append([domain, algo, other, str(n), '{:g}'.format(statistic), format_p_value(p),
+                      format_p_value(p_adjusted), better])
+    if output_format == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(header)
+        writer.writerows(lines)
+        return
+    widths = [max(len(line[i]) for line in lines + [header]) for i in range(len(header))]
+    for line in [header] + lines:
+        print(' '.join(val.ljust(width) if i < 3 else val.rjust(width)
+                       for i, (val, width) in enumerate(zip(line, widths))), file=out)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("json_file", help=".json files (or glob patterns) containing the lab data", nargs='+')
+    parser.add_argument("--attribute", "-a", help="attribute to compare", default="max_abstraction_states")
+    parser.add_argument("--stat", "-s", help="statistic of the runs of an algorithm on a problem (random "
+                                             "experiments), e.g. mean median max", default='mean')
+    parser.add_argument("--test", "-t", help="wilcoxon: paired signed-rank test on the problems both algorithms "
+                                             "cover, mannwhitney: unpaired rank-sum test", choices=TESTS,
+                        default='wilcoxon')
+    parser.add_argument("--correction", "-c", help="multiple-comparison correction over all the tests",
+                        choices=CORRECTIONS, default='holm')
+    parser.add_argument("--alpha", help="significance level of the better column", type=float, default=0.05)
+    parser.add_argument("--higher-better", help="higher values of the attribute are better (default: lower)",
+                        dest='higher_better', action='store_true')
+    parser.add_argument("--unsolvable-only", "-u", help="only count the unsolvable instances", dest='unsolvable_only',
+                        action='store_true')
+    parser.add_argument("--format", help="output format", choices=['text', 'csv'], default='text',
+                        dest='output_format')
+    parser.set_defaults(higher_better=False, unsolvable_only=False)
+    add_loader_arguments(parser)
+    add_suite_arguments(parser)
+    args = parser.parse_args()
+
+    if not is_supported(args.stat) or args.stat.startswith('ci'):
+        print('Error: unsupported statistic ' + args.stat)
+        exit(1)
+    data, problems = read_json_file(args.json_file, False, args.unsolvable_only, get_suite_option(args),
+                                    attributes=[args.attribute], **get_loader_options(args))
+    problems, algos, values = build_matrix(data, args.attribute, args.stat)
+    order = sorted(range(len(algos)), key=lambda i: algos[i])
+    results = run_tests(problems, [algos[i] for i in order], values[:, order], args.test, args.correction,
+                        args.jobs)
+    print_results(results, args.alpha, args.higher_better, args.output_format)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""
+
+mergeable approximate quantiles (KLL sketch) of run attributes, so that percentiles and cumulative distributions of
+arbitrarily many runs can be computed in bounded memory, while streaming or per range of runs in parallel
+
+"""
+import math
+import multiprocessing
+import random
+
+import numpy as np
+
+from common import (expand_json_files, get_compression, read_runs, get_chunk_params, decode_run_chunk,
+                    split_algo_id)
+
+# values buffered per algorithm before being added to its sketch
+BUFFER_SIZE = 1 << 14
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch (Karnin, Lang and Liberty, 2016). levels[h] holds items of weight 2^h, a full level is
+    sorted and every other item is promoted to the next level. With k items in the top level, the rank error
+    is about 1.65 / k with high probability, and the sketch holds O(k) items whatever the number of values.
+    """
+    C = 2.0 / 3.0
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.levels = [np.zeros(0, dtype=np.float64)]
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._random = random.Random(seed)
+
+    @staticmethod
+    def from_error(error):
+        """
+        Returns an empty sketch whose rank error is about error (as a fraction of the number of values)
+        """
+        return KLLSketch(max(8, int(math.ceil(1.65 / error))))
+
+    def capacity(self, h):
+        return max(2, int(math.ceil(self.k * KLLSketch.C ** (len(self.levels) - h - 1))))
+
+    def size(self):
+        return sum(len(level) for level in self.levels)
+
+    def max_size(self):
+        return sum(self.capacity(h) for h in range(len(self.levels)))
+
+    def update(self, value):
+        self.update_many([value])
+
+    def update_many(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        """
+        Adds the values summarized by other to this sketch
+        """
+        if other.count == 0:
+            return
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.zeros(0, dtype=np.float64))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def _compress(self):
+        while self.size() > self.max_size():
+            for h in range(len(self.levels)):
+                if len(self.levels[h]) >= self.capacity(h):
+                    if h + 1 == len(self.levels):
+                        self.levels.append(np.zeros(0, dtype=np.float64))
+                    level = np.sort(self.levels[h])
+                    # an odd item stays in the level, the others are halved into the next one
+                    kept = level[len(level) - len(level) % 2:]
+                    promoted = level[self._random.randint(0, 1):len(level) - len(level) % 2:2]
+                    self.levels[h] = kept
+                    self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                    break
+
+    def _weighted_items(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 1 << h, dtype=np.int64) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs):
+        """
+        Returns the approximate q-quantiles (0 <= q <= 1) of the values, the exact min and max for q = 0 and q = 1
+        """
+        if self.count == 0:
+            return [None] * len(qs)
+        items, cumulative = self._weighted_items()
+        result = []
+        for q in qs:
+            if q <= 0:
+                result.append(self.min)
+            elif q >= 1:
+                result.append(self.max)
+            else:
+                pos = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+                result.append(float(items[min(pos, len(items) - 1)]))
+        return result
+
+    def quantile(self, q):
+        return self.quantiles([q])[0]
+
+    def cumulative(self):
+        """
+        Returns (x, y): the distinct summarized values and the approximate number of values <= each of them
+        """
+        if self.count == 0:
+            return [], []
+        items, cumulative = self._weighted_items()
+        last = np.append(items[1:] != items[:-1], True)
+        return items[last].tolist(), cumulative[last].tolist()
+
+
+def sketch_runs(runs, attr, unsolvable_only, error):
+    """
+    Returns dict[algo] = KLLSketch of attr for the (run_key, run) pairs, which are consumed one at a time.
+    algo is the algorithm name without the run number (see common.split_algo_id).
+    """
+    sketches = {}
+    buffers = {}
+    for key, run in runs:
+        if unsolvable_only and run.get('unsolvable', 0) == 0:
+            continue
+        if attr not in run or run[attr] is None:
+            continue
+        algo = split_algo_id(run['id'][0])[0]
+        if algo not in buffers:
+            buffers[algo] = []
+            sketches[algo] = KLLSketch.from_error(error)
+        buffers[algo].append(run[attr])
+        if len(buffers[algo]) >= BUFFER_SIZE:
+            sketches[algo].update_many(buffers[algo])
+            buffers[algo] = []
+    for algo, values in buffers.items():
+        sketches[algo].update_many(values)
+    return sketches
+
+
+def _sketch_run_chunk(params):
+    json_file, start, end, attributes, attr, unsolvable_only, error = params
+    return sketch_runs(decode_run_chunk(json_file, start, end, attributes), attr, unsolvable_only, error)
+
+
+def read_sketches(json_files, attr, unsolvable_only, error, stream=False, cache=False, jobs=1, on_duplicate='first'):
+    """
+    Returns dict[algo] = KLLSketch of attr over the runs of the properties files (see common.read_runs for the
+    loader options). With jobs > 1 and a single file, every process sketches its own range of runs and the
+    sketches are merged.
+    """
+    print('Reading file ...')
+    attributes = [attr, 'unsolvable']
+    files = expand_json_files(json_files)
+    if jobs > 1 and len(files) == 1 and not cache and get_compression(files[0]) is None:
+        sketches = {}
+        params = [p + (attr, unsolvable_only, error) for p in get_chunk_params(files[0], jobs, attributes)]
+        with multiprocessing.Pool(jobs) as pool:
+            for partial_sketches in pool.imap(_sketch_run_chunk, params):
+                for algo, sketch in partial_sketches.items():
+                    if algo in sketches:
+                        sketches[algo].merge(sketch)
+                    else:
+                        sketches[algo] = sketch
+        return sketches
+    return sketch_runs(read_runs(files, stream, cache, attributes, jobs, on_duplicate), attr, unsolvable_only, error)
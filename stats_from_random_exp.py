@@ -1,82 +1,34 @@
 import argparse
 
-from common import read_json_file, SUITE_NONTRIVIAL_UNSOLVABLE
-
-
-def get_max_data(grouped_data, attr):
-    max_data = {}
-    for domain, problems in grouped_data.items():
-        max_data[domain] = {}
-        for problem, algos in problems.items():
-            max_data[domain][problem] = {}
-            for algo, val_list in algos.items():
-                temp = 0
-                for val in val_list:
-                    temp = max(temp, val[attr])
-                max_data[domain][problem][algo] = temp
-    return max_data
-
-
-def get_avg_data(grouped_data, attr):
-    avg_data = {}
-    for domain, problems in grouped_data.items():
-        avg_data[domain] = {}
-        for problem, algos in problems.items():
-            avg_data[domain][problem] = {}
-            for algo, val_list in algos.items():
-                temp = 0
-                for val in val_list:
-                    temp += val[attr]
-                avg_data[domain][problem][algo] = temp * 1.0 / len(val_list)
-    return avg_data
-
-
-def get_table_detail_per_problem(all_data):
-    detail_data = {}
-    for stat, max_data in all_data.items():
-        detail_data[stat] = {}
-        for domain, problems in max_data.items():
-            row_stem = '{:<10}'.format(domain[:10]) + ':'
-            for problem, algos in problems.items():
-                row = row_stem + problem
-                detail_data[stat][row] = {}
-                for algo, val in algos.items():
-                    detail_data[stat][row][algo] = max_data[domain][problem][algo]
-    return detail_data
-
-
-def get_table_detail_per_domain(all_data, problem_list):
-    # grouping data per domain
-    detail_data = {}
-    for stat, max_data in all_data.items():
-        detail_data[stat] = {}
-        for domain, problems in max_data.items():
-            row = domain + ' (' + str(len(problem_list[domain])) + ')'
-            detail_data[stat][row] = {}
-            for problem, algos in problems.items():
-                for algo, val in algos.items():
-                    if algo not in detail_data[stat][row]:
-                        detail_data[stat][row][algo] = 0
-                    detail_data[stat][row][algo] += val
-    return detail_data
-
-
-def get_table_total_per_algo(all_data, problem_list):
-    detail_data = {}
-    total = 0
-    for problem, lst in problem_list.items():
-        total += len(lst)
-    row = 'total (' + str(total) + ')'
-    for stat, data in all_data.items():
-        detail_data[stat] = {}
-        detail_data[stat][row] = {}
-        for domain, problems in data.items():
-            for problem, algos in problems.items():
-                for algo, val_list in algos.items():
-                    if algo not in detail_data[stat][row]:
-                        detail_data[stat][row][algo] = 0
-                    detail_data[stat][row][algo] += data[domain][problem][algo]
-    return detail_data
+from aggregate import Aggregation, STATISTICS, is_supported
+from common import read_json_file, add_loader_arguments, get_loader_options, parse_run_numbers
+from suites import add_suite_arguments, get_suite_option
+
+
+def format_value(val):
+    if val is None:
+        return '-'
+    if isinstance(val, tuple):
+        # mean with its confidence interval
+        return '{:.2f} [{:.2f}, {:.2f}]'.format(*val)
+    if isinstance(val, float):
+        return '{:.2f}'.format(val)
+    return str(val)
+
+
+def get_labels(attributes, stats):
+    """
+    Returns dict[(attr, stat)] = column label, the attribute is only part of the label when there are several
+    """
+    labels = {}
+    for attr in attributes:
+        for stat in stats:
+            labels[(attr, stat)] = stat if len(attributes) == 1 else stat + '(' + attr + ')'
+    return labels
+
+
+def relabel(table, labels):
+    return {labels[key]: rows for key, rows in table.items()}
 
 
 def print_data(all_data, stats_order, order, latex):
@@ -84,20 +36,13 @@ def print_data(all_data, stats_order, order, latex):
         algo_order = []
     else:
         algo_order = order
-    max_char = 0
+    if len(algo_order) == 0:
+        algo_order = sorted(set(algo for rows in all_data.values() for algos in rows.values() for algo in algos))
+    max_char = max(len(stat) for stat in stats_order)
     for stat, rows in all_data.items():
         for row_name, algos in rows.items():
-            if len(algo_order) == 0:
-                for algo in algos:
-                    algo_order.append(algo)
-                algo_order = sorted(algo_order)
-            else:
-                break
             for algo, val in algos.items():
-                if isinstance(val, float):
-                    max_char = max(max_char, len('{:.2f}'.format(val)))
-                else:
-                    max_char = max(max_char, len(str(val)))
+                max_char = max(max_char, len(format_value(val)))
 
     row_order = sorted(list(list(all_data.values())[0].keys()))
     if latex:
@@ -113,19 +58,14 @@ def print_data(all_data, stats_order, order, latex):
         for row in row_order:
             s = row
             for algo in algo_order:
-                for stats in stats_order:
-                    if isinstance(all_data[stats][row][algo], float):
-                        s += ' & ' + '{:.2f}'.format(all_data[stats][row][algo])
-                    else:
-                        s += ' & ' + str(all_data[stats][row][algo])
+                for stat in stats_order:
+                    s += ' & ' + format_value(all_data[stat][row].get(algo))
             print(s + ' \\\\')
     else:
-        old_max_char = max_char
-        max_char = max(max_char, 15)
-        col_len = max_char * len(all_data) + len(all_data) - 1
-        while col_len >= 15 and max_char >= old_max_char:
-            max_char -= 1
-            col_len = max_char * len(all_data) + len(all_data) - 1
+        # the stat columns of an algo are widened until the algo name fits over them
+        max_algo_len = max((len(algo) for algo in algo_order), default=0)
+        max_char = max(max_char, -(-(max_algo_len - len(stats_order) + 1) // len(stats_order)))
+        col_len = max_char * len(stats_order) + len(stats_order) - 1
 
         max_row_len = 0
         for row in row_order:
@@ -133,7 +73,7 @@ def print_data(all_data, stats_order, order, latex):
         s = ('{:<' + str(max_row_len) + '}').format(' ')
         t = ('{:<' + str(max_row_len) + '}').format(' ')
         for algo in algo_order:
-            s += ' ' + algo[:col_len].rjust(col_len)
+            s += ' ' + algo.rjust(col_len)
             for stat in stats_order:
                 t += ' ' + stat[:max_char].rjust(max_char)
         print(s)
@@ -143,23 +83,24 @@ def print_data(all_data, stats_order, order, latex):
             s = ('{:<' + str(max_row_len) + '}').format(row)
             for algo in algo_order:
                 for stat in stats_order:
-                    if isinstance(all_data[stat][row][algo], float):
-                        s += ' ' + ('{:.2f}'.format(all_data[stat][row][algo])).rjust(max_char)
-                    else:
-                        s += ' ' + str(all_data[stat][row][algo]).rjust(max_char)
+                    s += ' ' + format_value(all_data[stat][row].get(algo)).rjust(max_char)
             print(s)
 
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("json_file", help=".json file containing the lab data")
+    parser.add_argument("json_file", help=".json files (or glob patterns) containing the lab data", nargs='+')
     parser.add_argument('--order', '-o',
                         help='space separated string, the order of the algorithm column shown in the table',
                         type=str)
-    parser.add_argument('--attribute', '-a',
-                        help='the attribute to be computed and shown')
-    parser.add_argument('--stats', '-s',
-                        help='the statistics to be shown. use & for multiple stats like max&avg', required=True)
+    parser.add_argument('--attribute', '-a', help='the attributes to be computed and shown', nargs='+',
+                        required=True)
+    parser.add_argument('--stats', '-s', help='the statistics to be shown, e.g. max mean median std gmean p90 ci95 '
+                                              '(max&avg is also accepted)', nargs='+', required=True)
+    parser.add_argument('--resamples', help='number of bootstrap resamples of the ciNN statistics, e.g. ci95',
+                        type=int, default=10000)
+    parser.add_argument('--seed', help='random seed of the bootstrap', type=int)
+    parser.add_argument('--runs', help='only use these run numbers of the random experiments, e.g. 1-5,8')
     parser.add_argument("--domain-detail", "-d", help="print the detailed per domain data", dest='domain',
                         action='store_true')
     parser.add_argument("--problem-detail", "-p", help="print the detailed per problem data", dest='problem',
@@ -169,36 +110,39 @@ def main():
     parser.add_argument("--latex", "-l", help="use latex output format", dest='latex',
                         action='store_true')
     parser.set_defaults(domain=False, problem=False, filter=False, latex=False)
+    add_loader_arguments(parser)
+    add_suite_arguments(parser, 'nontrivial-unsolvable')
     args = parser.parse_args()
 
-    supported = {
-        'max': get_max_data,
-        'avg': get_avg_data
-    }
-    stats = args.stats.split('&')
+    stats = [stat for arg in args.stats for stat in arg.split('&')]
     for s in stats:
-        if s not in supported:
+        if not is_supported(s):
             print(s + ' is not supported.')
             print('the supported stats are as follows:')
-            print(list(supported.keys()))
+            print(STATISTICS + ['p0 ... p100', 'ci0 ... ci100 (e.g. ci95)'])
             return
 
     if args.order is not None:
         args.order = args.order.split(' ')
-
-    raw_data, problems = read_json_file(args.json_file, args.filter, False, SUITE_NONTRIVIAL_UNSOLVABLE)
-    data = {}
-    for s, f in supported.items():
-        if s in stats:
-            data[s] = f(raw_data, args.attribute)
+    run_numbers = None
+    if args.runs is not None:
+        try:
+            run_numbers = parse_run_numbers(args.runs)
+        except ValueError as e:
+            print('Error: ' + str(e))
+            exit(1)
+
+    raw_data, problems = read_json_file(args.json_file, args.filter, False, get_suite_option(args),
+                                       attributes=args.attribute, run_numbers=run_numbers,
+                                       **get_loader_options(args))
+    aggregation = Aggregation(raw_data, args.attribute, stats, args.resamples, args.seed, args.jobs)
+    labels = get_labels(args.attribute, stats)
+    columns = [labels[(attr, stat)] for attr in args.attribute for stat in stats]
     if args.domain:
-        domain_table = get_table_detail_per_domain(data, problems)
-        print_data(domain_table, stats, args.order, args.latex)
+        print_data(relabel(aggregation.per_domain(problems), labels), columns, args.order, args.latex)
     if args.problem:
-        problem_table = get_table_detail_per_problem(data)
-        print_data(problem_table, stats, args.order, args.latex)
-    total_table = get_table_total_per_algo(data, problems)
-    print_data(total_table, stats, args.order, args.latex)
+        print_data(relabel(aggregation.per_problem(), labels), columns, args.order, args.latex)
+    print_data(relabel(aggregation.total(problems), labels), columns, args.order, args.latex)
 
 
 if __name__ == '__main__':
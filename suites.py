@@ -0,0 +1,229 @@
+"""
+
+suite registry: the benchmark suites are read on first use from the <name>.txt files of the suites folder (and of
+the folders of FD_TOOLS_SUITES, separated by os.pathsep) and combined with suite expressions such as
+nontrivial-unsolvable-minus-too-large (operators or, and, minus, evaluated from left to right).
+The suites of a reference properties file (unsolvable, solvable, unknown) are derived from the unsolvable and
+coverage attributes of its runs and cached.
+
+"""
+import hashlib
+import json
+import os
+import re
+
+SUITE_FOLDERS = [os.path.join(os.path.dirname(os.path.abspath(__file__)), 'suites')] + \
+    [folder for folder in os.environ.get('FD_TOOLS_SUITES', '').split(os.pathsep) if folder != '']
+_OPERATOR = re.compile(r'[-\s]+(or|and|minus)[-\s]+')
+_OPERATIONS = {
+    'or': lambda a, b: a or b,
+    'and': lambda a, b: a and b,
+    'minus': lambda a, b: a and not b
+}
+# suites already read or registered, by name
+_suites = {}
+
+
+class Suite:
+    """
+    Immutable set of problems. A problem (domain, problem) belongs to the suite if it is one of problems,
+    or if its domain is one of domains and it is not one of excluded.
+    """
+    def __init__(self, problems=(), domains=(), excluded=()):
+        self.domains = frozenset(domains)
+        self.problems = frozenset(pair for pair in problems if pair[0] not in self.domains)
+        self.excluded = frozenset(pair for pair in excluded if pair[0] in self.domains)
+
+    @staticmethod
+    def from_entries(entries):
+        """
+        Returns the suite of 'domain', 'domain:problem' and '-domain:problem' (excluded problem) strings
+        """
+        problems = []
+        domains = []
+        excluded = []
+        for entry in entries:
+            if entry.startswith('-'):
+                excluded.append(tuple(entry[1:].split(':', 1)))
+            elif ':' in entry:
+                problems.append(tuple(entry.split(':', 1)))
+            else:
+                domains.append(entry)
+        return Suite(problems, domains, excluded)
+
+    @staticmethod
+    def read(path):
+        with open(path) as f:
+            lines = [line.strip() for line in f]
+        return Suite.from_entries(line for line in lines if line != '' and not line.startswith('#'))
+
+    def entries(self):
+        """
+        Returns the sorted strings of the suite, in the format of from_entries
+        """
+        return sorted(self.domains) + sorted(domain + ':' + problem for domain, problem in self.problems) + \
+            sorted('-' + domain + ':' + problem for domain, problem in self.excluded)
+
+    def contains(self, domain, problem):
+        if domain in self.domains:
+            return (domain, problem) not in self.excluded
+        return (domain, problem) in self.problems
+
+    def __contains__(self, pair):
+        return self.contains(*pair)
+
+    def __eq__(self, other):
+        return isinstance(other, Suite) and (self.problems, self.domains, self.excluded) == \
+            (other.problems, other.domains, other.excluded)
+
+    def __hash__(self):
+        return hash((self.problems, self.domains, self.excluded))
+
+    def combine(self, other, operation):
+        """
+        Returns the suite of the problems p for which operation(p in self, p in other) is True.
+        Only the domains and listed problems of both suites have to be looked at: every other problem belongs to the
+        result exactly if its domain does.
+        """
+        domains = [domain for domain in self.domains | other.domains
+                   if operation(domain in self.domains, domain in other.domains)]
+        domain_set = set(domains)
+        problems = []
+        excluded = []
+        for pair in self.problems | self.excluded | other.problems | other.excluded:
+            if operation(pair in self, pair in other):
+                problems.append(pair)
+            elif pair[0] in domain_set:
+                excluded.append(pair)
+        return Suite(problems, domains, excluded)
+
+    def __or__(self, other):
+        return self.combine(other, _OPERATIONS['or'])
+
+    def __and__(self, other):
+        return self.combine(other, _OPERATIONS['and'])
+
+    def __sub__(self, other):
+        return self.combine(other, _OPERATIONS['minus'])
+
+
+def get_suite_names():
+    names = set(_suites.keys())
+    for folder in SUITE_FOLDERS:
+        if os.path.isdir(folder):
+            names.update(f[:-len('.txt')] for f in os.listdir(folder) if f.endswith('.txt'))
+    return sorted(names)
+
+
+def register_suite(name, suite):
+    _suites[name] = suite
+
+
+def get_suite(name):
+    """
+    Returns the suite called name, read from its file on first use. Raises ValueError for an unknown suite.
+    """
+    if name not in _suites:
+        # the last folder wins, so that FD_TOOLS_SUITES can redefine the shipped suites
+        for folder in reversed(SUITE_FOLDERS):
+            path = os.path.join(folder, name + '.txt')
+            if os.path.exists(path):
+                _suites[name] = Suite.read(path)
+                break
+        else:
+            raise ValueError('Unknown suite ' + name + ', the available suites are: ' + ', '.join(get_suite_names()))
+    return _suites[name]
+
+
+def parse_suite(expression):
+    """
+    Returns the suite of an expression: suite names joined by or, and, minus (with - or spaces around them),
+    evaluated from left to right. Raises ValueError for an unknown suite.
+    """
+    parts = _OPERATOR.split(expression.strip())
+    suite = get_suite(parts[0])
+    for operator, name in zip(parts[1::2], parts[2::2]):
+        suite = suite.combine(get_suite(name), _OPERATIONS[operator])
+    return suite
+
+
+def as_suite(suite):
+    """
+    Returns suite as a Suite, suite being a Suite, a suite expression or a list of entries (see Suite.from_entries)
+    """
+    if isinstance(suite, Suite):
+        return suite
+    if isinstance(suite, str):
+        return parse_suite(suite)
+    return Suite.from_entries(suite)
+
+
+def classify_runs(runs):
+    """
+    Returns the unsolvable, solvable and unknown suites of (run_key, run) pairs: a problem is unsolvable if a run
+    proved it unsolvable, solvable if a run solved it and unknown otherwise
+    """
+    status = {}
+    for key, run in runs:
+        pair = (run['id'][1], run['id'][2])
+        if run.get('unsolvable'):
+            status[pair] = 'unsolvable'
+        elif run.get('coverage') and status.get(pair) != 'unsolvable':
+            status[pair] = 'solvable'
+        else:
+            status.setdefault(pair, 'unknown')
+    return {name: Suite(pair for pair, s in status.items() if s == name)
+            for name in ['unsolvable', 'solvable', 'unknown']}
+
+
+def derive_suites(json_file):
+    """
+    Returns the suites of classify_runs for the runs of json_file, cached until the file changes
+    """
+    # imported here, common imports this module and columns imports numpy
+    import columns
+    from common import read_runs
+
+    path = os.path.join(columns.CACHE_DIR, 'suites', hashlib.sha1(os.path.abspath(json_file).encode()).hexdigest())
+    signature = columns.get_source_signature(json_file)
+    if os.path.exists(path + '.json'):
+        with open(path + '.json') as f:
+            cached = json.load(f)
+        if cached['source'] == signature:
+            return {name: Suite.from_entries(entries) for name, entries in cached['suites'].items()}
+    print('Classifying the problems of ' + json_file + ' ...')
+    suites = classify_runs(read_runs([json_file], stream=True, attributes={'unsolvable', 'coverage'}))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp' + str(os.getpid())
+    with open(tmp_path, 'w') as f:
+        json.dump({'source': signature, 'suites': {name: suite.entries() for name, suite in suites.items()}}, f)
+    os.replace(tmp_path, path + '.json')
+    return suites
+
+
+def add_suite_arguments(parser, default=None):
+    """
+    Adds the options selecting the suite of problems to read
+    """
+    parser.add_argument("--suite", help="only read the problems of this suite expression, e.g. "
+                                        "nontrivial-unsolvable-minus-too-large (see suites.py)", default=default)
+    parser.add_argument("--suite-reference", help="properties file whose problems define the suites "
+                                                  "reference-unsolvable, reference-solvable and reference-unknown",
+                        dest='suite_reference')
+
+
+def get_suite_option(args):
+    """
+    Returns the Suite selected by the options added by add_suite_arguments (None for every problem), exits on an
+    unknown suite
+    """
+    if args.suite_reference is not None:
+        for name, suite in derive_suites(args.suite_reference).items():
+            register_suite('reference-' + name, suite)
+    if args.suite is None:
+        return None
+    try:
+        return parse_suite(args.suite)
+    except ValueError as e:
+        print('Error: ' + str(e))
+        exit(1)
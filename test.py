@@ -1,6 +1,16 @@
 import unittest
 
+from test.aggregate import TestAggregation
+from test.common import TestCommon
+from test.compare_matrix import TestCompareMatrix
 from test.data import TestDataClass
+from test.query import TestQuery
+from test.render import TestRender
+from test.significance import TestSignificance
+from test.sketch import TestSketch
+from test.startup import TestStartup
+from test.suites import TestSuites
+from test.universe import TestUniverse
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,83 @@
+from aggregate import Aggregation
+from stats_from_random_exp import print_data
+import contextlib
+import io
+import numpy as np
+import random
+import unittest
+
+
+class TestAggregation(unittest.TestCase):
+    def setUp(self):
+        random.seed(3)
+        self.grouped_data = {}
+        for domain in ['d1', 'd2']:
+            self.grouped_data[domain] = {}
+            for problem in ['p1', 'p2', 'p3']:
+                self.grouped_data[domain][problem] = {}
+                for algo in ['a', 'b']:
+                    self.grouped_data[domain][problem][algo] = [
+                        {'x': random.randint(1, 100), 'y': random.random() * 10} for _ in range(random.randint(1, 6))]
+        # a group without the attribute y
+        for val in self.grouped_data['d2']['p3']['b']:
+            del val['y']
+
+    def test_statistics(self):
+        stats = ['min', 'max', 'sum', 'count', 'mean', 'median', 'std', 'gmean', 'p25', 'p90']
+        functions = [np.min, np.max, np.sum, len, np.mean, np.median, np.std,
+                     lambda v: np.exp(np.mean(np.log(v))), lambda v: np.percentile(v, 25),
+                     lambda v: np.percentile(v, 90)]
+        aggregation = Aggregation(self.grouped_data, ['x', 'y'], stats)
+        for g, (domain, problem, algo) in enumerate(aggregation.groups):
+            for attr in ['x', 'y']:
+                values = [val[attr] for val in self.grouped_data[domain][problem][algo] if attr in val]
+                for stat, f in zip(stats, functions):
+                    result = aggregation.values[(attr, stat)][g]
+                    if len(values) == 0:
+                        self.assertEqual(result, 0 if stat == 'count' else None)
+                    else:
+                        self.assertAlmostEqual(result, f(values))
+        self.assertIsInstance(aggregation.values[('x', 'max')][0], int)
+
+    def test_roll_up(self):
+        aggregation = Aggregation(self.grouped_data, ['x', 'y'], ['max'])
+        problems = {domain: set(problems) for domain, problems in self.grouped_data.items()}
+        total = aggregation.total(problems)[('x', 'max')]['total (6)']
+        per_domain = aggregation.per_domain(problems)[('y', 'max')]
+        for algo in ['a', 'b']:
+            self.assertEqual(total[algo], sum(max(val['x'] for val in problems[algo])
+                                              for domain in self.grouped_data.values() for problems in domain.values()))
+            self.assertAlmostEqual(per_domain['d2 (3)'][algo],
+                                   sum(max([val['y'] for val in problems[algo] if 'y' in val], default=0)
+                                       for problems in self.grouped_data['d2'].values()))
+
+    def test_bootstrap(self):
+        aggregation = Aggregation(self.grouped_data, ['x'], ['ci90', 'mean'], resamples=2000, seed=5)
+        self.assertEqual(aggregation.values[('x', 'ci90')],
+                         Aggregation(self.grouped_data, ['x'], ['ci90'], resamples=2000, seed=5).values[('x', 'ci90')])
+        rng = np.random.default_rng(1)
+        for g, (domain, problem, algo) in enumerate(aggregation.groups):
+            mean, low, high = aggregation.values[('x', 'ci90')][g]
+            self.assertAlmostEqual(mean, aggregation.values[('x', 'mean')][g])
+            self.assertTrue(low <= mean <= high)
+            values = np.array([val['x'] for val in self.grouped_data[domain][problem][algo]])
+            if len(values) > 1:
+                means = values[rng.integers(0, len(values), (20000, len(values)))].mean(axis=1)
+                expected_low, expected_high = np.quantile(means, [0.05, 0.95])
+                self.assertLess(abs(low - expected_low), 0.1 * (expected_high - expected_low) + 1e-9)
+                self.assertLess(abs(high - expected_high), 0.1 * (expected_high - expected_low) + 1e-9)
+        problems = {domain: set(problems) for domain, problems in self.grouped_data.items()}
+        total_mean, total_low, total_high = aggregation.total(problems)[('x', 'ci90')]['total (6)']['a']
+        self.assertAlmostEqual(total_mean, aggregation.total(problems)[('x', 'mean')]['total (6)']['a'])
+        self.assertTrue(total_low < total_mean < total_high)
+
+    def test_print_data(self):
+        # the algo names are not cut when they are wider than the stat columns
+        all_data = {'max': {'total': {'base_unsat_long_name': 12, 'rave': 3}}}
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            print_data(all_data, ['max'], None, False)
+        header, stats, row = output.getvalue().splitlines()
+        self.assertEqual(header.split(), ['base_unsat_long_name', 'rave'])
+        self.assertEqual(len(header), len(stats))
+        self.assertEqual(len(header), len(row))
@@ -0,0 +1,190 @@
+from common import read_runs, read_json_file, iter_json_runs, expand_json_files, find_run_boundaries, group_runs, \
+    split_algo_id, get_run_number, parse_run_numbers, get_algo_aliases, set_algo_aliases
+import bz2
+import columns
+import gzip
+import io
+import json
+import lzma
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class TestCommon(unittest.TestCase):
+    def setUp(self):
+        test_dir = os.path.dirname(os.path.realpath(__file__)) + '/../test_data'
+        self.json_file = test_dir + '/simple_report_data.json'
+        with open(self.json_file) as data_file:
+            self.raw_data = json.load(data_file)
+
+    def test_stream_runs(self):
+        self.assertEqual(dict(read_runs(self.json_file, stream=True)), self.raw_data)
+        # tiny chunks force entries to be split across chunk boundaries
+        with open(self.json_file) as data_file:
+            self.assertEqual(dict(iter_json_runs(data_file, chunk_size=7)), self.raw_data)
+        compact = json.dumps({'a': 1, 'b': [1, {'c': '}'}], 'c': 12345})
+        self.assertEqual(dict(iter_json_runs(io.StringIO(compact), chunk_size=3)), json.loads(compact))
+        with self.assertRaises(ValueError):
+            list(iter_json_runs(io.StringIO('{"a": 1, "b": '), chunk_size=3))
+
+    def test_stream_grouping(self):
+        for unsolvable_only in [False, True]:
+            for filter_data in [False, True]:
+                expected = read_json_file(self.json_file, filter_data, unsolvable_only)
+                streamed = read_json_file(self.json_file, filter_data, unsolvable_only, stream=True)
+                self.assertEqual(streamed, expected)
+        grouped_data, problems = read_json_file(self.json_file, False, True, ['bag-gripper:prob01.pddl'], stream=True)
+        self.assertEqual(problems, {'bag-gripper': {'prob01.pddl'}})
+        self.assertEqual(sorted(grouped_data['bag-gripper']['prob01.pddl'].keys()), ['base_unsat', 'rave'])
+
+    def test_projection(self):
+        expected = {}
+        for idx, val in self.raw_data.items():
+            expected[idx] = {'id': val['id'], 'var_count': val['var_count']}
+            if 'dummy_attr' in val:
+                expected[idx]['dummy_attr'] = val['dummy_attr']
+        for stream in [False, True]:
+            runs = dict(read_runs(self.json_file, stream=stream, attributes=['var_count', 'dummy_attr']))
+            self.assertEqual(runs, expected)
+
+        # nested objects having an id are attribute values, they are kept as they are
+        folder = tempfile.mkdtemp()
+        try:
+            json_file = folder + '/properties'
+            raw_data = {'run': {'id': ['base', 'd', 'p'], 'nested': {'id': 5, 'other': 6}, 'var_count': 1}}
+            with open(json_file, 'w') as f:
+                json.dump(raw_data, f, indent=2)
+            for stream in [False, True]:
+                runs = dict(read_runs(json_file, stream=stream, attributes=['nested']))
+                self.assertEqual(runs, {'run': {'id': ['base', 'd', 'p'], 'nested': {'id': 5, 'other': 6}}})
+        finally:
+            shutil.rmtree(folder)
+
+    def test_cache(self):
+        old_cache_dir = columns.CACHE_DIR
+        columns.CACHE_DIR = tempfile.mkdtemp()
+        try:
+            json_file = columns.CACHE_DIR + '/properties'
+            self.raw_data['base_unsat-bag-barman-prob01.pddl']['nullable'] = None
+            with open(json_file, 'w') as f:
+                json.dump(self.raw_data, f)
+            self.assertEqual(dict(read_runs(json_file, cache=True)), self.raw_data)
+            self.assertTrue(os.path.exists(columns.get_cache_folder(json_file) + '/meta.json'))
+            # the warm load comes from the cache
+            self.assertEqual(dict(read_runs(json_file, cache=True)), self.raw_data)
+            runs = dict(read_runs(json_file, cache=True, attributes=['nullable']))
+            self.assertEqual(runs['base_unsat-bag-barman-prob01.pddl'],
+                             {'id': ['base_unsat', 'bag-barman', 'prob01.pddl'], 'nullable': None})
+            self.assertEqual(runs['rave-bag-gripper-prob01.pddl'], {'id': ['rave', 'bag-gripper', 'prob01.pddl']})
+            # the cache is invalidated when the file changes
+            del self.raw_data['rave-bag-gripper-prob01.pddl']
+            with open(json_file, 'w') as f:
+                json.dump(self.raw_data, f, indent=2)
+            self.assertEqual(dict(read_runs(json_file, cache=True)), self.raw_data)
+        finally:
+            shutil.rmtree(columns.CACHE_DIR)
+            columns.CACHE_DIR = old_cache_dir
+
+    def test_multiple_files(self):
+        folder = tempfile.mkdtemp()
+        try:
+            keys = sorted(self.raw_data.keys())
+            first = {k: self.raw_data[k] for k in keys[:3]}
+            second = {k: dict(self.raw_data[k]) for k in keys[2:]}
+            second[keys[2]]['var_count'] = -1
+            with open(folder + '/a.json', 'w') as f:
+                json.dump(first, f)
+            with open(folder + '/b.json', 'w') as f:
+                json.dump(second, f)
+            self.assertEqual(expand_json_files(folder + '/*.json'), [folder + '/a.json', folder + '/b.json'])
+            with self.assertRaises(FileNotFoundError):
+                expand_json_files(folder + '/*.xml')
+            for jobs in [1, 2]:
+                runs = dict(read_runs(folder + '/*.json', jobs=jobs))
+                self.assertEqual(runs, self.raw_data)
+                runs = dict(read_runs([folder + '/a.json', folder + '/b.json'], jobs=jobs, on_duplicate='last'))
+                self.assertEqual(runs[keys[2]]['var_count'], -1)
+                with self.assertRaises(ValueError):
+                    list(read_runs(folder + '/*.json', jobs=jobs, on_duplicate='error'))
+            self.assertEqual(read_json_file(folder + '/*.json', False, False),
+                             read_json_file(self.json_file, False, False))
+        finally:
+            shutil.rmtree(folder)
+
+    def test_column_types(self):
+        # ints mixed with floats are promoted to float64 as long as they are exact
+        for vals, dtype in [([1, 2], 'int64'), ([0, 1.5, None], 'float64'), ([0, 2 ** 60, 1.5], 'object'),
+                            ([1, 'a'], 'object')]:
+            column = columns.Column.from_values(4, list(range(len(vals))), vals)
+            self.assertEqual(column.values.dtype, dtype)
+            self.assertEqual([column.values[row] for row, val in enumerate(vals) if val is not None],
+                             [val for val in vals if val is not None])
+
+    def test_parallel_chunks(self):
+        folder = tempfile.mkdtemp()
+        try:
+            for indent in [None, 0, 2, '\t']:
+                json_file = folder + '/properties'
+                with open(json_file, 'w') as f:
+                    json.dump(self.raw_data, f, indent=indent)
+                boundaries = find_run_boundaries(json_file, 3)
+                if indent is None or indent == 0:
+                    self.assertEqual(len(boundaries), 2)
+                else:
+                    self.assertEqual(len(boundaries), 4)
+                self.assertEqual(dict(read_runs(json_file, jobs=2)), self.raw_data)
+                for unsolvable_only in [False, True]:
+                    self.assertEqual(read_json_file(json_file, True, unsolvable_only, jobs=2),
+                                     read_json_file(json_file, True, unsolvable_only))
+        finally:
+            shutil.rmtree(folder)
+
+    def test_nested_keys(self):
+        # with indent=0 the keys of the runs are not indented, as the top level keys
+        folder = tempfile.mkdtemp()
+        try:
+            raw_data = {'run' + str(i): {'nested': {'a': i, 'b': {'c': i}}, 'var_count': i} for i in range(50)}
+            json_file = folder + '/properties'
+            with open(json_file, 'w') as f:
+                json.dump(raw_data, f, indent=0)
+            self.assertEqual(len(find_run_boundaries(json_file, 4)), 2)
+            self.assertEqual(dict(read_runs(json_file, jobs=2)), raw_data)
+        finally:
+            shutil.rmtree(folder)
+
+    def test_compressed(self):
+        folder = tempfile.mkdtemp()
+        try:
+            for name, module in [('properties.gz', gzip), ('properties.bz2', bz2), ('properties.xz', lzma)]:
+                json_file = folder + '/' + name
+                with module.open(json_file, 'wt') as f:
+                    json.dump(self.raw_data, f, indent=2)
+                self.assertEqual(dict(read_runs(json_file)), self.raw_data)
+                self.assertEqual(dict(read_runs(json_file, jobs=2)), self.raw_data)
+                self.assertEqual(read_json_file(json_file, False, False, jobs=2),
+                                 read_json_file(self.json_file, False, False))
+        finally:
+            shutil.rmtree(folder)
+
+    def test_algo_ids(self):
+        self.assertEqual(split_algo_id('linear-random3'), ('linear-random', '3'))
+        self.assertEqual(split_algo_id('perfect-linear-random12'), ('linear-random', '12'))
+        self.assertEqual(split_algo_id('base_unsat'), ('base_unsat', None))
+        self.assertEqual(parse_run_numbers('1-3, 8'), {1, 2, 3, 8})
+        with self.assertRaises(ValueError):
+            parse_run_numbers('1-x')
+        aliases = dict(get_algo_aliases())
+        try:
+            set_algo_aliases({'rave': 'uct'})
+            self.assertEqual(split_algo_id('rave2'), ('uct', '2'))
+            self.assertEqual(split_algo_id('perfect-linear-random12'), ('perfect-linear-random', '12'))
+        finally:
+            set_algo_aliases(aliases)
+
+        runs = [(str(i), {'id': [algo, 'd', 'p'], 'unsolvable': 1}) for i, algo in
+                enumerate(['random1', 'random2', 'random3', 'base'])]
+        grouped_data = group_runs(runs, False, run_numbers={1, 3})
+        self.assertEqual([get_run_number(run) for run in grouped_data['d']['p']['random']], [1, 3])
+        self.assertEqual(grouped_data['d']['p']['base'], [runs[3][1]])
@@ -0,0 +1,57 @@
+from compare_matrix import build_matrix, get_ratio_matrix, get_win_matrices, print_report
+import io
+import itertools
+import math
+import random
+import unittest
+
+
+class TestCompareMatrix(unittest.TestCase):
+    def setUp(self):
+        random.seed(3)
+        self.algos = ['a', 'b', 'c', 'd']
+        self.grouped_data = {}
+        for domain in ['d1', 'd2']:
+            for problem in range(30):
+                algos = {}
+                for algo in self.algos:
+                    if random.random() < 0.8:
+                        algos[algo] = [{'time': random.choice([0, 1, 2, 2.5, 4]) * (1 + random.random())}
+                                       for _ in range(random.randint(1, 3))]
+                        if random.random() < 0.1:
+                            algos[algo] = [{'unsolvable': 0}]
+                self.grouped_data[domain] = self.grouped_data.get(domain, {})
+                self.grouped_data[domain]['p' + str(problem)] = algos
+
+    def test_matrices(self):
+        problems, algos, values = build_matrix(self.grouped_data, 'time')
+        self.assertEqual(sorted(algos), self.algos)
+        for tolerance in [0.0, 0.2]:
+            for higher_better in [False, True]:
+                wins, losses, ties, common = get_win_matrices(values, higher_better, tolerance)
+                ratio = get_ratio_matrix(values)
+                for i, j in itertools.permutations(range(len(algos)), 2):
+                    pairs = []
+                    for domain, problem in problems:
+                        runs = self.grouped_data[domain][problem]
+                        a = [run['time'] for run in runs.get(algos[i], []) if 'time' in run]
+                        b = [run['time'] for run in runs.get(algos[j], []) if 'time' in run]
+                        if len(a) > 0 and len(b) > 0:
+                            pairs.append((sum(a) / len(a), sum(b) / len(b)))
+                    tie = [abs(x - y) <= tolerance * max(abs(x), abs(y)) for x, y in pairs]
+                    better = [(x > y if higher_better else x < y) and not t for (x, y), t in zip(pairs, tie)]
+                    worse = [(x < y if higher_better else x > y) and not t for (x, y), t in zip(pairs, tie)]
+                    self.assertEqual(common[i, j], len(pairs))
+                    self.assertEqual(wins[i, j], sum(better))
+                    self.assertEqual(losses[i, j], sum(worse))
+                    self.assertEqual(ties[i, j], sum(tie))
+                    logs = [math.log(x / y) for x, y in pairs if x > 0 and y > 0]
+                    self.assertAlmostEqual(ratio[i, j], math.exp(sum(logs) / len(logs)))
+
+    def test_output(self):
+        problems, algos, values = build_matrix(self.grouped_data, 'time', 'max')
+        out = io.StringIO()
+        print_report(algos, *get_win_matrices(values), get_ratio_matrix(values), ['a', 'b'], 'csv', out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0], 'algo,other,common,wins,losses,ties,gmean_ratio')
+        self.assertEqual([line.split(',')[:2] for line in lines[1:]], [['a', 'b'], ['b', 'a']])
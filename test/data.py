@@ -82,6 +82,35 @@ class TestDataClass(unittest.TestCase):
                     idx = test[item] + ' '
                 self.assertEqual(data, test['value'], 'wrong data at ' + idx)
 
+    def test_regrouping(self):
+        random.seed(2)
+        test_dir = os.path.dirname(os.path.realpath(__file__)) + '/../test_data'
+        raw_data = Data.from_file(test_dir + '/simple_report_data.json')
+        order = [DataType.ALGO, DataType.DOMAIN, DataType.PROBLEM, DataType.ATTRIBUTE]
+        for i in range(10):
+            temp_grouping = order.copy()
+            random.shuffle(temp_grouping)
+            temp_data = raw_data.group_data(temp_grouping)
+            for test in self.some_tests:
+                data = temp_data
+                for item in temp_grouping:
+                    self.assertIn(test[item], data)
+                    data = data[test[item]]
+                self.assertEqual(data, test['value'])
+        grouped = raw_data.group_data([])
+        self.assertEqual(grouped['base_unsat']['bag-barman'].keys(),
+                         ['bag-barman-prob01.pddl', 'bag-barman-prob02.pddl'])
+        self.assertEqual(grouped['rave'].keys(), ['bag-gripper'])
+        self.assertNotIn('bag-barman', grouped['rave'])
+        # unknown names and existing names without an entry raise on every axis
+        for path in [['rave', 'bag-barman'], ['ravee'], ['base_unsat', 'bag-barmann'],
+                     ['rave', 'bag-gripper', 'bag-barman-prob01.pddl'],
+                     ['base_unsat', 'bag-barman', 'bag-gripper-prob01.pddl']]:
+            with self.assertRaises(KeyError):
+                data = grouped
+                for item in path:
+                    data = data[item]
+
     def test_common_attributes(self):
         test_common = {
             DataType.ALGO: ['base_unsat', 'rave'],
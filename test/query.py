@@ -0,0 +1,109 @@
+from common import read_run_table
+from get_run_data import parse_query, query_table
+from query import parse
+import columns
+import os
+import query
+import query_server
+import shutil
+import tempfile
+import threading
+import unittest
+
+
+class TestQuery(unittest.TestCase):
+    def setUp(self):
+        self.json_file = os.path.dirname(os.path.realpath(__file__)) + '/../test_data/simple_report_data.json'
+        self.table = read_run_table(self.json_file)
+
+    def _query(self, query_string, attr='var_merged_max', unsolvable_only=False, domain=None, problem=None,
+               algo=None):
+        return query_table(self.table, attr, unsolvable_only, domain, problem, algo, parse_query(query_string))
+
+    def test_comparisons(self):
+        self.assertEqual(self._query('var_count>=15'),
+                         {'base_unsat-bag-barman-prob01.pddl': 22, 'base_unsat-bag-barman-prob02.pddl': 2})
+        self.assertEqual(self._query('var_count<=14&var_merged_last=5'),
+                         {'base_unsat-bag-gripper-prob01.pddl': 7, 'rave-bag-gripper-prob01.pddl': 8})
+        self.assertEqual(self._query('algorithm_nick=rave'), {'rave-bag-gripper-prob01.pddl': 8})
+        self.assertEqual(self._query('algorithm_nick<=base_unsat', attr='unsolvable'),
+                         {'base_unsat-bag-barman-prob01.pddl': 0, 'base_unsat-bag-barman-prob02.pddl': 1,
+                          'base_unsat-bag-gripper-prob01.pddl': 1})
+
+    def test_missing_attribute(self):
+        # runs without the attribute are not filtered out
+        self.assertEqual(len(self._query('dummy_attr=1')), 4)
+        self.assertEqual(len(self._query('dummy_attr=2')), 3)
+
+    def test_filters(self):
+        self.assertEqual(self._query(None, unsolvable_only=True, domain='bag-barman'),
+                         {'base_unsat-bag-barman-prob02.pddl': 2})
+        self.assertEqual(self._query(None, problem='prob01.pddl', algo='ra'), {'rave-bag-gripper-prob01.pddl': 8})
+
+    def test_grammar(self):
+        self.assertEqual(self._query('var_count>14&var_count<22'), {'base_unsat-bag-barman-prob02.pddl': 2})
+        self.assertEqual(set(self._query('algorithm_nick!=rave&(var_count=164|var_merged_last in (5, 6))')),
+                         {'base_unsat-bag-barman-prob01.pddl', 'base_unsat-bag-gripper-prob01.pddl'})
+        self.assertEqual(self._query('algorithm_nick~"^ra"'), {'rave-bag-gripper-prob01.pddl': 8})
+        self.assertEqual(len(self._query('exists(dummy_attr)')), 1)
+        self.assertEqual(self._query('exists(not_an_attr)'), {})
+
+    def test_syntax_errors(self):
+        for query_string in ['var_count', 'var_count>=', '(var_count=1', 'var_count=1)', 'a=1&|b=2']:
+            with self.assertRaises(ValueError):
+                parse(query_string)
+
+    def test_indexes(self):
+        old_cache_dir = columns.CACHE_DIR
+        old_selectivity = query.INDEX_SELECTIVITY
+        columns.CACHE_DIR = tempfile.mkdtemp()
+        # always use the indexes, even on this tiny table
+        query.INDEX_SELECTIVITY = 1.0
+        try:
+            read_run_table(self.json_file, cache=True)
+            indexed_table = read_run_table(self.json_file, cache=True)
+            self.assertIsNotNone(indexed_table.get_sorted_index('var_count'))
+            self.assertIsNone(indexed_table.get_sorted_index('algorithm_nick'))
+            self.assertIsNone(self.table.get_sorted_index('var_count'))
+            for query_string, domain, problem in [('var_count>=15', None, None), ('var_count=14', 'bag-gripper', None),
+                                                  ('var_count<16&dummy_attr=1', None, None),
+                                                  ('var_merged_last in (5, 22)', None, 'prob01.pddl'),
+                                                  ('exists(var_count)&var_count>1000', 'bag-barman', None)]:
+                plan = parse(query_string)
+                self.assertEqual(query_table(indexed_table, 'var_merged_max', False, domain, problem, None, plan),
+                                 query_table(self.table, 'var_merged_max', False, domain, problem, None, plan))
+        finally:
+            shutil.rmtree(columns.CACHE_DIR)
+            columns.CACHE_DIR = old_cache_dir
+            query.INDEX_SELECTIVITY = old_selectivity
+
+    def test_server(self):
+        folder = tempfile.mkdtemp()
+        socket_path = folder + '/query.sock'
+        self.assertIsNone(query_server.send_request({'command': 'ping'}, socket_path))
+        server = query_server.QueryServer(socket_path)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            response = query_server.send_query(self.json_file, 'var_merged_max', False, 'bag-barman', None, None,
+                                               'var_count>=15', socket_path=socket_path)
+            self.assertEqual(dict(response['data']), self._query('var_count>=15', domain='bag-barman'))
+            # the loader options of the client are forwarded, every set of options has its own table
+            response = query_server.send_query(self.json_file, 'var_merged_max', False, 'bag-barman', None, None,
+                                               'var_count>=15', stream=True, jobs=2, socket_path=socket_path)
+            self.assertEqual(dict(response['data']), self._query('var_count>=15', domain='bag-barman'))
+            self.assertEqual(sorted(dict(key[1])['stream'] for key in server.tables), [False, True])
+            response = query_server.send_query(self.json_file, 'var_count', False, None, None, None, 'var_count>',
+                                               socket_path=socket_path)
+            self.assertIn('error', response)
+            # a malformed request is answered with an error and the server keeps running
+            response = query_server.send_request({'json_files': [self.json_file]}, socket_path)
+            self.assertEqual(response['error'], "KeyError: 'query'")
+            self.assertEqual(query_server.send_request({'command': 'ping'}, socket_path), {'output': ''})
+            query_server.send_request({'command': 'stop'}, socket_path)
+            thread.join()
+        finally:
+            if thread.is_alive():
+                server.shutdown()
+            server.server_close()
+            shutil.rmtree(folder)
@@ -0,0 +1,156 @@
+import render
+from render import INDEX_LINES_PER_PAGE, GraphTemplate, RenderJob, render_graphs, render_jobs
+import contextlib
+import io
+import os
+import re
+import shutil
+import tempfile
+import time
+import unittest
+
+
+def render_test_graph(path, value):
+    import matplotlib.pyplot as plt
+    if value == -9:
+        # the worker process dies, as when it is killed by the out of memory killer
+        os._exit(1)
+    if value < 0:
+        raise ValueError('negative value')
+    plt.figure()
+    plt.plot([0, value], [0, value])
+    plt.savefig(path)
+
+
+def sleep_item(item):
+    time.sleep(item[0])
+    return item[0]
+
+
+class LineTemplate(GraphTemplate):
+    instances = 0
+
+    def __init__(self, color):
+        super().__init__()
+        LineTemplate.instances += 1
+        self.color = color
+        self.lines = []
+
+    def draw(self, path, value):
+        self.update_lines(self.lines, 1, color=self.color)
+        if value < 0:
+            raise ValueError('negative value')
+        self.lines[0].set_data([0, value], [0, value])
+        self.rescale()
+        self.fig.savefig(path)
+
+
+class TestRender(unittest.TestCase):
+    def test_render_jobs(self):
+        folder = tempfile.mkdtemp()
+        try:
+            values = [3, -1, 2, 5, -2, 1]
+            for processes in [1, 2]:
+                jobs = [RenderJob(folder + '/' + str(processes) + '-' + str(i) + '.png', render_test_graph, (value,),
+                                  str(i)) for i, value in enumerate(values)]
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    failed = render_jobs(iter(jobs), processes)
+                # a failing graph does not stop the others, the results are reported in the order of the jobs
+                self.assertEqual([job.name for job, error in failed], ['1', '4'])
+                self.assertIn('ValueError: negative value', failed[0][1])
+                created = [line.split()[-1] for line in output.getvalue().splitlines() if line.startswith('Created')]
+                self.assertEqual(created, ['0', '2', '3', '5'])
+                for i, value in enumerate(values):
+                    self.assertEqual(os.path.exists(jobs[i].path), value >= 0)
+        finally:
+            shutil.rmtree(folder)
+
+    def test_templates(self):
+        import matplotlib.pyplot as plt
+        folder = tempfile.mkdtemp()
+        try:
+            LineTemplate.instances = 0
+            values = [3, 2, -1, 5, 1]
+            jobs = [RenderJob(folder + '/' + str(i) + '.png', None, (value,), str(i), (LineTemplate, ('red',)))
+                    for i, value in enumerate(values)]
+            with contextlib.redirect_stdout(io.StringIO()):
+                failed = render_jobs(iter(jobs), 1)
+            self.assertEqual([job.name for job, error in failed], ['2'])
+            # the figure is shared by the graphs, the template is rebuilt after a failure and closed at the end
+            self.assertEqual(LineTemplate.instances, 2)
+            self.assertEqual(plt.get_fignums(), [])
+            for i, value in enumerate(values):
+                self.assertEqual(os.path.exists(jobs[i].path), value >= 0)
+        finally:
+            shutil.rmtree(folder)
+
+    def test_pdf_output(self):
+        folder = tempfile.mkdtemp()
+        try:
+            values = {'d1': [3, -1, 2], 'd2': [1] * (INDEX_LINES_PER_PAGE + 1)}
+            jobs = [RenderJob(folder + '/' + domain + '/' + str(i) + '.png', render_test_graph, (value,),
+                              domain + ' ' + str(i))
+                    for domain in sorted(values) for i, value in enumerate(values[domain])]
+            outputs = [('pdf', 1, {'graphs': 53 + 2}), ('domain-pdf', 2, {'d1': 2 + 1, 'd2': 51 + 2})]
+            for output_mode, processes, pages in outputs:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    failed = render_graphs(iter(jobs), folder, output_mode, processes)
+                self.assertEqual([job.name for job, error in failed], ['d1 1'])
+                # the graphs that did not fail and the index pages, no PNG file is created
+                for name, count in pages.items():
+                    with open(folder + '/' + name + '.pdf', 'rb') as pdf_file:
+                        self.assertEqual(len(re.findall(rb'/Type /Page\b', pdf_file.read())), count)
+                self.assertFalse(any(os.path.exists(job.path) for job in jobs))
+        finally:
+            shutil.rmtree(folder)
+
+    def test_manifest(self):
+        folder = tempfile.mkdtemp()
+        try:
+            def render(values, output_mode='png', force=False):
+                jobs = [RenderJob(folder + '/' + str(i) + '.png', render_test_graph, (value,), str(i))
+                        for i, value in enumerate(values)]
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output):
+                    render_graphs(iter(jobs), folder, output_mode, 1, force)
+                return [line.split()[-1] for line in output.getvalue().splitlines() if line.startswith('Created')]
+
+            self.assertEqual(render([3, -1, 2]), ['0', '2'])
+            # only the changed graphs and the graphs that failed are rendered again
+            self.assertEqual(render([3, -1, 2]), [])
+            self.assertEqual(render([3, 1, 4]), ['1', '2'])
+            os.remove(folder + '/0.png')
+            self.assertEqual(render([3, 1, 4]), ['0'])
+            self.assertEqual(render([3, 1, 4], force=True), ['0', '1', '2'])
+            self.assertEqual(render([3, 1, 4], 'pdf'), ['0', '1', '2', folder + '/graphs.pdf'])
+            self.assertEqual(render([3, 1, 4], 'pdf'), [])
+            self.assertEqual(render([3, 1, 5], 'pdf'), ['0', '1', '2', folder + '/graphs.pdf'])
+        finally:
+            shutil.rmtree(folder)
+
+    def test_lost_worker(self):
+        folder = tempfile.mkdtemp()
+        old_timeout = render.RENDER_TIMEOUT
+        try:
+            render.RENDER_TIMEOUT = 2
+            values = [3, -9, 2, 5]
+            jobs = [RenderJob(folder + '/' + str(i) + '.png', render_test_graph, (value,), str(i))
+                    for i, value in enumerate(values)]
+            with contextlib.redirect_stdout(io.StringIO()):
+                failed = render_jobs(iter(jobs), 2)
+            # the graph of the dead worker fails, the other graphs are rendered by the replaced worker
+            self.assertEqual([job.name for job, error in failed], ['1'])
+            self.assertIn('no result after 2 s', failed[0][1])
+            for i, value in enumerate(values):
+                self.assertEqual(os.path.exists(jobs[i].path), value >= 0)
+        finally:
+            render.RENDER_TIMEOUT = old_timeout
+            shutil.rmtree(folder)
+
+    def test_timeout_from_start(self):
+        # (sleep seconds, timeout): both worker processes are stuck on the first two items, the timeout of the third
+        # one only runs once a worker process is free
+        items = [(3, 1), (3, 1), (0, 0.5)]
+        results = list(render._run_ordered(sleep_item, items, 2, lambda item, error: 'lost', lambda item: item[1]))
+        self.assertEqual(results, [((3, 1), 'lost'), ((3, 1), 'lost'), ((0, 0.5), 0)])
@@ -0,0 +1,82 @@
+from significance import correct_p_values, mann_whitney, rank_columns, run_tests, wilcoxon
+import itertools
+import math
+import numpy as np
+import random
+import unittest
+
+
+class TestSignificance(unittest.TestCase):
+    def test_ranks(self):
+        random.seed(2)
+        x = np.array([[random.choice([1.0, 2.0, 3.0, 4.0, np.nan]) for _ in range(6)] for _ in range(20)])
+        ranks, tie_terms = rank_columns(x)
+        for j in range(x.shape[1]):
+            values = [v for v in x[:, j] if not math.isnan(v)]
+            for i in range(x.shape[0]):
+                if math.isnan(x[i, j]):
+                    self.assertTrue(math.isnan(ranks[i, j]))
+                else:
+                    smaller = sum(v < x[i, j] for v in values)
+                    tied = sum(v == x[i, j] for v in values)
+                    self.assertEqual(ranks[i, j], smaller + (tied + 1) / 2.0)
+            self.assertEqual(tie_terms[j], sum(values.count(v) ** 3 - values.count(v) for v in set(values)))
+
+    def test_reference_values(self):
+        # the examples of the scipy.stats documentation
+        d = np.array([[6, 8, 14, 16, 23, 24, 28, 29, 41, -48, 49, 56, 60, -67, 75]], dtype=np.float64).T
+        n, statistic, p_values, direction = wilcoxon(d, np.zeros_like(d))
+        self.assertEqual((n[0], statistic[0], direction[0]), (15, 24.0, 1))
+        self.assertAlmostEqual(p_values[0], 0.041259765625)
+        a = np.array([[19, 22, 16, 29, 24]], dtype=np.float64).T
+        b = np.array([[20, 11, 17, 12, np.nan]]).T
+        n, statistic, p_values, direction = mann_whitney(a, b)
+        self.assertEqual((n[0], statistic[0], direction[0]), (9, 17.0, 1))
+        self.assertAlmostEqual(p_values[0], 1.0 / 9.0)
+        # ties, normal approximation
+        n, statistic, p_values, direction = mann_whitney(np.vstack([a, [[20]]]), np.vstack([b, [[np.nan]]]))
+        self.assertEqual(statistic[0], 20.5)
+
+    def test_exact_wilcoxon(self):
+        # every sign assignment of the ranks of the absolute differences is equally likely
+        d = np.array([[1.5, -2, 3, 4, -5.5, 6, 7, 8.5]]).T
+        ranks = list(range(1, 9))
+        observed = 1 + 3 + 4 + 6 + 7 + 8
+        sums = [sum(r for r, s in zip(ranks, signs) if s) for signs in itertools.product([0, 1], repeat=8)]
+        expected = 2 * min(sum(s <= observed for s in sums), sum(s >= observed for s in sums)) / len(sums)
+        self.assertAlmostEqual(wilcoxon(d, np.zeros_like(d))[2][0], min(1.0, expected))
+
+    def test_exact_mann_whitney(self):
+        # exact as long as one of the samples is small: every choice of the ranks of a is equally likely
+        values = [0.5, 1.5, 2, 3.5, 4, 5.5, 6, 7.5, 8, 9.5, 10, 11.5, 12, 13.5, 14]
+        for a_count in [3, 12]:
+            a = np.array([values[1:a_count + 1]]).T
+            b = np.array([values[:1] + values[a_count + 1:]]).T
+            observed = mann_whitney(a, b)[1][0]
+            n1, n2 = len(a), len(b)
+            us = [sum(ranks) - n1 * (n1 + 1) / 2 for ranks in itertools.combinations(range(1, n1 + n2 + 1), n1)]
+            expected = 2 * min(sum(u <= observed for u in us), sum(u >= observed for u in us)) / len(us)
+            self.assertAlmostEqual(mann_whitney(a, b)[2][0], min(1.0, expected))
+
+    def test_corrections(self):
+        p = [0.01, 0.04, np.nan, 0.03, 0.5]
+        np.testing.assert_allclose(correct_p_values(p, 'bonferroni'), [0.04, 0.16, np.nan, 0.12, 1.0])
+        np.testing.assert_allclose(correct_p_values(p, 'holm'), [0.04, 0.09, np.nan, 0.09, 0.5])
+        np.testing.assert_allclose(correct_p_values(p, 'bh'), [0.04, 0.16 / 3, np.nan, 0.16 / 3, 0.5])
+        np.testing.assert_allclose(correct_p_values(p, 'none'), p)
+
+    def test_run_tests(self):
+        rng = np.random.default_rng(4)
+        problems = [('d' + str(d), 'p' + str(p)) for d in range(3) for p in range(40)]
+        values = rng.lognormal(size=(len(problems), 4))
+        values[:, 0] *= 3
+        values[rng.random(values.shape) < 0.1] = np.nan
+        for test in ['wilcoxon', 'mannwhitney']:
+            results = run_tests(problems, ['a', 'b', 'c', 'd'], values, test, 'holm')
+            self.assertEqual(len(results), 4 * 6)
+            self.assertEqual(results, run_tests(problems, ['a', 'b', 'c', 'd'], values, test, 'holm', jobs=2))
+            for domain, algo, other, n, statistic, p, direction, p_adjusted in results:
+                self.assertGreaterEqual(p_adjusted, p)
+                if algo == 'a' and domain == '(all)':
+                    self.assertLess(p_adjusted, 0.001)
+                    self.assertEqual(direction, 1)
@@ -0,0 +1,32 @@
+from sketch import KLLSketch, read_sketches
+import numpy as np
+import os
+import unittest
+
+
+class TestSketch(unittest.TestCase):
+    def test_exact_when_small(self):
+        sketch = KLLSketch(k=100)
+        sketch.update_many([3, 1, 2, 2, 5])
+        self.assertEqual(sketch.cumulative(), ([1, 2, 3, 5], [1, 3, 4, 5]))
+        self.assertEqual(sketch.quantiles([0, 0.5, 1]), [1, 2, 5])
+
+    def test_merge_error(self):
+        values = np.random.default_rng(7).lognormal(0, 2, 200000)
+        sketch = KLLSketch.from_error(0.01)
+        for part in np.array_split(values, 8):
+            shard = KLLSketch.from_error(0.01)
+            for chunk in np.array_split(part, 10):
+                shard.update_many(chunk)
+            sketch.merge(shard)
+        self.assertEqual(sketch.count, len(values))
+        self.assertLess(sketch.size(), 2000)
+        values.sort()
+        for q, estimate in zip([0.1, 0.5, 0.9, 0.99], sketch.quantiles([0.1, 0.5, 0.9, 0.99])):
+            self.assertLess(abs(np.searchsorted(values, estimate) / len(values) - q), 0.01)
+
+    def test_read_sketches(self):
+        json_file = os.path.dirname(os.path.realpath(__file__)) + '/../test_data/simple_report_data.json'
+        sketches = read_sketches(json_file, 'var_count', False, 0.01, stream=True)
+        self.assertEqual(sketches['base_unsat'].cumulative(), ([14, 16, 164], [1, 2, 3]))
+        self.assertEqual(read_sketches(json_file, 'var_count', True, 0.01)['base_unsat'].count, 2)
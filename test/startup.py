@@ -0,0 +1,10 @@
+from bench_startup import ALLOWED_LIBRARIES, import_in_subprocess
+import unittest
+
+
+class TestStartup(unittest.TestCase):
+    def test_heavy_imports(self):
+        # the scripts import the plotting libraries in the functions drawing the graphs only
+        for module, allowed in sorted(ALLOWED_LIBRARIES.items()):
+            wall_time, import_time, libraries = import_in_subprocess(module)
+            self.assertEqual([library for library in libraries if library not in allowed], [], module)
@@ -0,0 +1,74 @@
+from suites import Suite, classify_runs, derive_suites, get_suite, parse_suite, register_suite
+import columns
+import itertools
+import json
+import os
+import random
+import shutil
+import suites
+import tempfile
+import unittest
+
+
+class TestSuites(unittest.TestCase):
+    def setUp(self):
+        random.seed(5)
+        self.pairs = [('d' + str(d), 'p' + str(p)) for d in range(4) for p in range(6)]
+
+    def random_suite(self):
+        domains = random.sample(['d0', 'd1', 'd2', 'd3'], random.randint(0, 2))
+        entries = domains + [d + ':' + p for d, p in random.sample(self.pairs, 6)]
+        entries += ['-' + d + ':' + p for d, p in random.sample(self.pairs, 4) if d in domains]
+        return Suite.from_entries(entries)
+
+    def test_algebra(self):
+        for _ in range(50):
+            a = self.random_suite()
+            b = self.random_suite()
+            for result, operation in [(a | b, lambda x, y: x or y), (a & b, lambda x, y: x and y),
+                                      (a - b, lambda x, y: x and not y)]:
+                for pair in self.pairs + [('d0', 'unlisted'), ('other', 'p0')]:
+                    self.assertEqual(pair in result, operation(pair in a, pair in b))
+            self.assertEqual(Suite.from_entries(a.entries()), a)
+
+    def test_registry(self):
+        nontrivial = get_suite('nontrivial-unsolvable')
+        self.assertIs(get_suite('nontrivial-unsolvable'), nontrivial)
+        self.assertTrue(nontrivial.contains('bag-gripper', 'prob01.pddl'))
+        self.assertTrue(get_suite('too-large').contains('bag-barman', 'prob01.pddl'))
+        register_suite('test-barman', Suite([('bag-barman', 'prob01.pddl'), ('bag-gripper', 'prob01.pddl')]))
+        suite = parse_suite('test-barman-minus-too-large or nontrivial-unsolvable-and-test-barman')
+        self.assertEqual(suite.entries(), ['bag-gripper:prob01.pddl'])
+        with self.assertRaises(ValueError):
+            parse_suite('nontrivial-unsolvable-minus-no-such-suite')
+
+        from common import SUITE_TOO_LARGE, SUITE_NONTRIVIAL_UNSOLVABLE
+        self.assertEqual(SUITE_TOO_LARGE, ['bag-barman'])
+        self.assertEqual(len(SUITE_NONTRIVIAL_UNSOLVABLE), 239)
+
+    def test_derive(self):
+        runs = [('1', {'id': ['a', 'd', 'p1'], 'unsolvable': 1}), ('2', {'id': ['b', 'd', 'p1'], 'coverage': 1}),
+                ('3', {'id': ['a', 'd', 'p2'], 'coverage': 1}), ('4', {'id': ['a', 'd', 'p3']})]
+        for permutation in itertools.permutations(runs):
+            derived = classify_runs(permutation)
+            self.assertEqual(derived['unsolvable'].entries(), ['d:p1'])
+            self.assertEqual(derived['solvable'].entries(), ['d:p2'])
+            self.assertEqual(derived['unknown'].entries(), ['d:p3'])
+
+        old_cache_dir = columns.CACHE_DIR
+        columns.CACHE_DIR = tempfile.mkdtemp()
+        try:
+            json_file = columns.CACHE_DIR + '/properties'
+            with open(json_file, 'w') as f:
+                json.dump(dict(runs), f)
+            self.assertEqual(derive_suites(json_file), classify_runs(runs))
+            self.assertEqual(len(os.listdir(columns.CACHE_DIR + '/suites')), 1)
+            # a cached classification is used as long as the file does not change
+            suites.classify_runs = None
+            try:
+                self.assertEqual(derive_suites(json_file), classify_runs(runs))
+            finally:
+                suites.classify_runs = classify_runs
+        finally:
+            shutil.rmtree(columns.CACHE_DIR)
+            columns.CACHE_DIR = old_cache_dir
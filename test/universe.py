@@ -0,0 +1,44 @@
+from universe import AlgoProblemSets, ProblemUniverse, at_least, count, filter_problems, intersection, union
+import random
+import unittest
+
+
+class TestUniverse(unittest.TestCase):
+    def setUp(self):
+        random.seed(11)
+        self.universe = ProblemUniverse()
+        self.pairs = [('d' + str(d), 'p' + str(p)) for d in range(7) for p in range(150)]
+        self.sets = [set(random.sample(self.pairs, 600)) for _ in range(4)]
+        self.bitsets = [self.universe.from_pairs(s) for s in self.sets]
+
+    def test_operations(self):
+        for bitset, pairs in zip(self.bitsets, self.sets):
+            self.assertEqual(set(self.universe.to_pairs(bitset)), pairs)
+            self.assertEqual(count(bitset), len(pairs))
+        self.assertEqual(set(self.universe.to_pairs(intersection(self.bitsets))), set.intersection(*self.sets))
+        self.assertEqual(set(self.universe.to_pairs(union(self.bitsets))), set.union(*self.sets))
+        for k in range(1, 5):
+            expected = {pair for pair in self.pairs if sum(pair in s for s in self.sets) >= k}
+            self.assertEqual(set(self.universe.to_pairs(at_least(self.bitsets, k))), expected)
+        self.assertTrue(self.universe.contains(self.universe.from_pairs(['d1:p2']), 'd1', 'p2'))
+        self.assertFalse(self.universe.contains(self.bitsets[0], 'unknown', 'p2'))
+
+    def test_algo_problem_sets(self):
+        grouped_data = {'d': {'p1': {'a': [{'unsolvable': 1}], 'b': [{'unsolvable': 1}]},
+                              'p2': {'a': [{'unsolvable': 0, 'coverage': 1}], 'b': [{'unsolvable': 1}]},
+                              'p3': {'a': [{'unsolvable': 1}]}},
+                        'e': {'p1': {'b': [{'unsolvable': 0, 'coverage': 1}]}}}
+        sets = AlgoProblemSets.from_grouped_data(grouped_data)
+        universe = sets.universe
+        self.assertEqual(universe.to_pairs(sets.present()['a']), [('d', 'p1'), ('d', 'p2'), ('d', 'p3')])
+        self.assertEqual(universe.to_pairs(sets.most_present()), [('d', 'p1'), ('d', 'p2')])
+        existing_problems = {domain: set(problems) for domain, problems in grouped_data.items()}
+        filter_problems(grouped_data, existing_problems, universe, sets.most_present())
+        self.assertEqual(existing_problems, {'d': {'p1', 'p2'}})
+        self.assertEqual(list(grouped_data.keys()), ['d'])
+        # without a problem common to every algorithm, the problems most algorithms ran on are kept
+        sets = AlgoProblemSets()
+        for algo, problem in [('a', 'p1'), ('b', 'p1'), ('b', 'p2'), ('c', 'p2'), ('c', 'p3')]:
+            sets.add(algo, 'd', problem)
+        self.assertEqual(sets.universe.to_pairs(sets.most_present()), [('d', 'p1'), ('d', 'p2')])
+        self.assertEqual(AlgoProblemSets().most_present(), 0)
@@ -0,0 +1,168 @@
+"""
+
+problem universe: every (domain, problem) pair gets an integer id and a set of problems is a python int used as a
+bitset (bit i set for the problem with id i), so that intersections, unions and suite membership are bitwise
+operations on n / 64 machine words
+
+"""
+import numpy as np
+
+
+class ProblemUniverse:
+    """
+    Integer ids of (domain, problem) pairs, problems[i] is the pair with id i
+    """
+    def __init__(self, pairs=()):
+        self.ids = {}
+        self.problems = []
+        for domain, problem in pairs:
+            self.get_id(domain, problem)
+
+    def get_id(self, domain, problem):
+        """
+        Returns the id of (domain, problem), a new id is given to an unknown pair
+        """
+        pair = (domain, problem)
+        if pair not in self.ids:
+            self.ids[pair] = len(self.problems)
+            self.problems.append(pair)
+        return self.ids[pair]
+
+    def from_ids(self, ids):
+        """
+        Returns the bitset of the problem ids
+        """
+        bits = np.zeros(len(self.problems), dtype=bool)
+        bits[np.asarray(list(ids), dtype=np.int64)] = True
+        return int.from_bytes(np.packbits(bits, bitorder='little').tobytes(), 'little')
+
+    def from_pairs(self, pairs):
+        """
+        Returns the bitset of (domain, problem) pairs or 'domain:problem' strings, unknown pairs get a new id
+        """
+        ids = []
+        for pair in pairs:
+            if isinstance(pair, str):
+                pair = tuple(pair.split(':', 1))
+            ids.append(self.get_id(*pair))
+        return self.from_ids(ids)
+
+    def to_ids(self, bitset):
+        """
+        Returns the sorted ids of the problems of bitset
+        """
+        if bitset == 0:
+            return []
+        data = np.frombuffer(bitset.to_bytes((bitset.bit_length() + 7) // 8, 'little'), dtype=np.uint8)
+        return np.flatnonzero(np.unpackbits(data, bitorder='little')).tolist()
+
+    def to_mask(self, bitset):
+        """
+        Returns the boolean array of the problem ids in bitset, for many membership tests against the same bitset
+        """
+        data = np.frombuffer(bitset.to_bytes((len(self.problems) + 7) // 8, 'little'), dtype=np.uint8)
+        return np.unpackbits(data, bitorder='little', count=len(self.problems)).astype(bool)
+
+    def to_pairs(self, bitset):
+        return [self.problems[i] for i in self.to_ids(bitset)]
+
+    def contains(self, bitset, domain, problem):
+        problem_id = self.ids.get((domain, problem))
+        return problem_id is not None and (bitset >> problem_id) & 1 == 1
+
+
+def count(bitset):
+    return bin(bitset).count('1')
+
+
+def intersection(bitsets):
+    result = None
+    for bitset in bitsets:
+        result = bitset if result is None else result & bitset
+    return 0 if result is None else result
+
+
+def union(bitsets):
+    result = 0
+    for bitset in bitsets:
+        result |= bitset
+    return result
+
+
+def at_least(bitsets, k):
+    """
+    Returns the bitset of the problems belonging to at least k (>= 1) of the bitsets
+    """
+    # counts[j] holds the problems seen in at least j + 1 of the bitsets so far
+    counts = [0] * k
+    for bitset in bitsets:
+        for j in range(k - 1, 0, -1):
+            counts[j] |= counts[j - 1] & bitset
+        counts[0] |= bitset
+    return counts[k - 1]
+
+
+class AlgoProblemSets:
+    """
+    Bitsets of the problems every algorithm ran on
+    """
+    def __init__(self, universe=None):
+        self.universe = ProblemUniverse() if universe is None else universe
+        self._ids = {}
+        self._bitsets = None
+
+    def add(self, algo, domain, problem):
+        self._bitsets = None
+        self._ids.setdefault(algo, []).append(self.universe.get_id(domain, problem))
+
+    @staticmethod
+    def from_grouped_data(grouped_data, universe=None):
+        """
+        Returns the sets of a dict[domain][problem][algo] = run or list of runs
+        """
+        sets = AlgoProblemSets(universe)
+        for domain, problems in grouped_data.items():
+            for problem, algos in problems.items():
+                for algo in algos:
+                    sets.add(algo, domain, problem)
+        return sets
+
+    def present(self):
+        """
+        Returns dict[algo] = bitset of the problems algo ran on
+        """
+        if self._bitsets is None:
+            self._bitsets = {algo: self.universe.from_ids(algo_ids) for algo, algo_ids in self._ids.items()}
+        return self._bitsets
+
+    def most_present(self):
+        """
+        Returns the bitset of the problems the largest number of algorithms ran on, which are the problems every
+        algorithm ran on if there is any
+        """
+        bitsets = list(self.present().values())
+        for k in range(len(bitsets), 0, -1):
+            keep = at_least(bitsets, k)
+            if keep != 0:
+                return keep
+        return 0
+
+
+def filter_problems(grouped_data, existing_problems, universe, keep):
+    """
+    Removes the problems not in the bitset keep (and the domains left empty) from grouped_data and
+    existing_problems (if not None), in a single pass
+    """
+    mask = universe.to_mask(keep)
+    for domain in list(grouped_data.keys()):
+        problems = grouped_data[domain]
+        for problem in list(problems.keys()):
+            problem_id = universe.ids.get((domain, problem))
+            if problem_id is None or not mask[problem_id]:
+                del problems[problem]
+                if existing_problems is not None:
+                    existing_problems[domain].discard(problem)
+        if len(problems) == 0:
+            del grouped_data[domain]
+            if existing_problems is not None:
+                del existing_problems[domain]
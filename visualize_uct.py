@@ -2,13 +2,10 @@
 
 import argparse
 import math
-import matplotlib.pyplot as plt
-import numpy as np
 import os
 import re
 
 from common import get_file_list
-from PIL import Image, ImageDraw
 
 
 class Node:
@@ -120,6 +117,7 @@ def print_node(node, prefix=''):
 
 
 def visualize_node(node, output_folder='./'):
+    import matplotlib.pyplot as plt
     node_at_depth = []
     queue = [(node, 0)]
     while len(queue) != 0: